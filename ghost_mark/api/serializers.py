@@ -2,12 +2,116 @@
 from rest_framework import serializers
 import uuid
 
+from pdf_app.job_listing import (
+    DEFAULT_JOB_LIST_LIMIT,
+    JOB_LIST_FIELDS,
+    MAX_JOB_LIST_LIMIT,
+)
+from pdf_app.models import PDFProcessingJob
+from pdf_app.utils import (
+    PAGE_FRAME_HEADER_BITS,
+    cover_text_fits_footer,
+    page_frame_chunk_bytes,
+    payload_bit_length,
+    single_page_message_capacity,
+)
+from pdf_app.webhooks import callback_url_error
+
+# Longest secret message (UTF-8 bytes) for single-page font steganography,
+# from the footer geometry; multi-page mode spreads the payload across page
+# footers and allows much more
+FONT_STEGO_MAX_MESSAGE_LENGTH = single_page_message_capacity()
+FONT_STEGO_MULTI_PAGE_MAX_MESSAGE_LENGTH = 8192
+
+
+def validate_font_stego_capacity(secret_message, cover_text, multi_page=False):
+    """Raise a ValidationError if the cover text cannot carry the message"""
+    # Layout check first, so a job is never queued with a cover text that
+    # would overflow the page footer
+    fits, lines_needed, lines_available = cover_text_fits_footer(cover_text)
+    if not fits:
+        raise serializers.ValidationError(
+            {
+                "cover_text": f"Cover text too long! It needs {lines_needed} footer lines "
+                f"but only {lines_available} fit on a page."
+            }
+        )
+
+    non_space_chars = len([char for char in cover_text if char != " "])
+
+    if multi_page:
+        if page_frame_chunk_bytes(non_space_chars) == 0:
+            raise serializers.ValidationError(
+                {
+                    "cover_text": f"Cover text too short for multi-page mode! Each page needs at least "
+                    f"{PAGE_FRAME_HEADER_BITS + 8} non-space characters, your cover text has {non_space_chars}."
+                }
+            )
+        return
+
+    message_bytes = len(secret_message.encode("utf-8"))
+    if message_bytes > FONT_STEGO_MAX_MESSAGE_LENGTH:
+        raise serializers.ValidationError(
+            {
+                "secret_message": f"Secret message too long for one page! A page footer holds at most "
+                f"{FONT_STEGO_MAX_MESSAGE_LENGTH} bytes, your message has {message_bytes}. "
+                f"Enable multi_page for longer messages."
+            }
+        )
+
+    # Calculate required characters (message bits plus length/CRC header)
+    message_bits = payload_bit_length(secret_message)
+
+    if message_bits > non_space_chars:
+        raise serializers.ValidationError(
+            {
+                "cover_text": f"Cover text too short! Your message needs {message_bits} characters "
+                f"but your cover text only has {non_space_chars} non-space characters."
+            }
+        )
+
+
+def validate_method_params(methods, data):
+    """Raise a ValidationError if a selected method is missing its parameters"""
+    # Validate required fields for selected methods
+    if "qr_code" in methods and not data.get("email"):
+        raise serializers.ValidationError(
+            {"email": "Email is required when qr_code method is selected."}
+        )
+
+    if "font_stego" in methods:
+        if not data.get("secret_message"):
+            raise serializers.ValidationError(
+                {
+                    "secret_message": "Secret message is required when font_stego method is selected."
+                }
+            )
+        if not data.get("cover_text"):
+            raise serializers.ValidationError(
+                {
+                    "cover_text": "Cover text is required when font_stego method is selected."
+                }
+            )
+
+        # Validate cover text length
+        validate_font_stego_capacity(
+            data.get("secret_message", ""),
+            data.get("cover_text", ""),
+            data.get("multi_page", False),
+        )
+
+    # Set default watermark text if watermark is selected but no text provided
+    if "watermark" in methods and not data.get("watermark_text"):
+        raise serializers.ValidationError(
+            {
+                "watermark_text": "Watermark text is required when watermarking is enabled."
+            }
+        )
+
 
 class WatermarkSerializer(serializers.Serializer):
     pdf_file = serializers.FileField()
-    watermark_text = serializers.CharField(
-        max_length=255,  allow_blank=True
-    )
+    watermark_text = serializers.CharField(max_length=255, allow_blank=True)
 
     def validate_pdf_file(self, value):
         if not value.name.lower().endswith(".pdf"):
@@ -32,8 +136,11 @@ class QRCodeSerializer(serializers.Serializer):
 
 class FontSteganographySerializer(serializers.Serializer):
     pdf_file = serializers.FileField()
-    secret_message = serializers.CharField(max_length=200)
+    secret_message = serializers.CharField(
+        max_length=FONT_STEGO_MULTI_PAGE_MAX_MESSAGE_LENGTH
+    )
     cover_text = serializers.CharField()
+    multi_page = serializers.BooleanField(default=False)
 
     def validate_pdf_file(self, value):
         if not value.name.lower().endswith(".pdf"):
@@ -45,17 +152,9 @@ class FontSteganographySerializer(serializers.Serializer):
         cover_text = data.get("cover_text", "")
 
         if secret_message and cover_text:
-            # Calculate required characters
-            message_bits = len(secret_message) * 8
-            non_space_chars = len([char for char in cover_text if char != " "])
-
-            if message_bits > non_space_chars:
-                raise serializers.ValidationError(
-                    {
-                        "cover_text": f"Cover text too short! Your message needs {message_bits} characters "
-                        f"but your cover text only has {non_space_chars} non-space characters."
-                    }
-                )
+            validate_font_stego_capacity(
+                secret_message, cover_text, data.get("multi_page", False)
+            )
 
         return data
 
@@ -76,9 +175,12 @@ class CombinedSteganographySerializer(serializers.Serializer):
     # Font Steganography fields (optional)
     enable_font_stego = serializers.BooleanField(default=False)
     secret_message = serializers.CharField(
-        max_length=200, required=False, allow_blank=True
+        max_length=FONT_STEGO_MULTI_PAGE_MAX_MESSAGE_LENGTH,
+        required=False,
+        allow_blank=True,
     )
     cover_text = serializers.CharField(required=False, allow_blank=True)
+    multi_page = serializers.BooleanField(default=False)
 
     def validate_pdf_file(self, value):
         if not value.name.lower().endswith(".pdf"):
@@ -120,18 +222,11 @@ class CombinedSteganographySerializer(serializers.Serializer):
                 )
 
             # Validate cover text length
-            secret_message = data.get("secret_message", "")
-            cover_text = data.get("cover_text", "")
-            message_bits = len(secret_message) * 8
-            non_space_chars = len([char for char in cover_text if char != " "])
-
-            if message_bits > non_space_chars:
-                raise serializers.ValidationError(
-                    {
-                        "cover_text": f"Cover text too short! Your message needs {message_bits} characters "
-                        f"but your cover text only has {non_space_chars} non-space characters."
-                    }
-                )
+            validate_font_stego_capacity(
+                data.get("secret_message", ""),
+                data.get("cover_text", ""),
+                data.get("multi_page", False),
+            )
 
         # Set default watermark text if watermark is enabled but no text provided
         if data.get("enable_watermark") and not data.get("watermark_text"):
@@ -157,9 +252,12 @@ class SelectedSteganographySerializer(serializers.Serializer):
     )
     email = serializers.EmailField(required=False, allow_blank=True)
     secret_message = serializers.CharField(
-        max_length=200, required=False, allow_blank=True
+        max_length=FONT_STEGO_MULTI_PAGE_MAX_MESSAGE_LENGTH,
+        required=False,
+        allow_blank=True,
     )
     cover_text = serializers.CharField(required=False, allow_blank=True)
+    multi_page = serializers.BooleanField(default=False)
 
     def validate_pdf_file(self, value):
         if not value.name.lower().endswith(".pdf"):
@@ -167,46 +265,123 @@ class SelectedSteganographySerializer(serializers.Serializer):
         return value
 
     def validate(self, data):
-        methods = data.get("methods", [])
+        validate_method_params(data.get("methods", []), data)
+        return data
 
-        # Validate required fields for selected methods
-        if "qr_code" in methods and not data.get("email"):
-            raise serializers.ValidationError(
-                {"email": "Email is required when qr_code method is selected."}
-            )
 
-        if "font_stego" in methods:
-            if not data.get("secret_message"):
-                raise serializers.ValidationError(
-                    {
-                        "secret_message": "Secret message is required when font_stego method is selected."
-                    }
-                )
-            if not data.get("cover_text"):
-                raise serializers.ValidationError(
-                    {
-                        "cover_text": "Cover text is required when font_stego method is selected."
-                    }
-                )
+class AsyncJobSerializer(serializers.Serializer):
+    """Fields only the async endpoints take (the sync views answer directly)"""
 
-            # Validate cover text length
-            secret_message = data.get("secret_message", "")
-            cover_text = data.get("cover_text", "")
-            message_bits = len(secret_message) * 8
-            non_space_chars = len([char for char in cover_text if char != " "])
+    # Completion webhook
+    callback_url = serializers.URLField(
+        max_length=500, required=False, allow_blank=True
+    )
 
-            if message_bits > non_space_chars:
-                raise serializers.ValidationError(
-                    {
-                        "cover_text": f"Cover text too short! Your message needs {message_bits} characters "
-                        f"but your cover text only has {non_space_chars} non-space characters."
-                    }
-                )
+    def validate_callback_url(self, value):
+        if value:
+            error = callback_url_error(value)
+            if error:
+                raise serializers.ValidationError(error)
+        return value
 
-        # Set default watermark text if watermark is selected but no text provided
-        if "watermark" in methods and not data.get("watermark_text"):
-            raise serializers.ValidationError(
-                {"watermark_text": "Watermark text is required when watermarking is enabled."}
-            )
 
+class AsyncWatermarkSerializer(AsyncJobSerializer, WatermarkSerializer):
+    pass
+
+
+class AsyncQRCodeSerializer(AsyncJobSerializer, QRCodeSerializer):
+    pass
+
+
+class AsyncFontSteganographySerializer(AsyncJobSerializer, FontSteganographySerializer):
+    pass
+
+
+class AsyncCombinedSteganographySerializer(
+    AsyncJobSerializer, CombinedSteganographySerializer
+):
+    pass
+
+
+class AsyncSelectedSteganographySerializer(
+    AsyncJobSerializer, SelectedSteganographySerializer
+):
+    pass
+
+
+class BatchFileParamsSerializer(serializers.Serializer):
+    """Parameters of one file in a batch (batch defaults + manifest entry)"""
+
+    watermark_text = serializers.CharField(
+        max_length=255, required=False, allow_blank=True
+    )
+    email = serializers.EmailField(required=False, allow_blank=True)
+    secret_message = serializers.CharField(
+        max_length=FONT_STEGO_MULTI_PAGE_MAX_MESSAGE_LENGTH,
+        required=False,
+        allow_blank=True,
+    )
+    cover_text = serializers.CharField(required=False, allow_blank=True)
+    multi_page = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        validate_method_params(self.context["methods"], data)
         return data
+
+
+class BatchSerializer(BatchFileParamsSerializer):
+    archive = serializers.FileField()
+    methods = serializers.ListField(
+        child=serializers.ChoiceField(choices=["watermark", "qr_code", "font_stego"]),
+        min_length=1,
+    )
+    # Per-file parameters; a manifest.json inside the archive works too
+    manifest = serializers.JSONField(required=False)
+
+    def validate_archive(self, value):
+        if not value.name.lower().endswith(".zip"):
+            raise serializers.ValidationError("Only ZIP archives are allowed.")
+        return value
+
+    def validate(self, data):
+        # Defaults are checked per file, once the manifest has been applied
+        return data
+
+
+def comma_separated(value, allowed, label):
+    """Split a comma-separated query parameter and check every item"""
+    items = [item.strip() for item in value.split(",") if item.strip()]
+    unknown = [item for item in items if item not in allowed]
+    if unknown:
+        raise serializers.ValidationError(
+            f"Unknown {label}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}."
+        )
+    return items
+
+
+class JobListQuerySerializer(serializers.Serializer):
+    """Query parameters of the job listing (lists are comma-separated)"""
+
+    status = serializers.CharField(required=False)
+    job_type = serializers.CharField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    fields = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_JOB_LIST_LIMIT, default=DEFAULT_JOB_LIST_LIMIT
+    )
+    cursor = serializers.CharField(required=False)
+    counts = serializers.BooleanField(default=False)
+
+    def validate_status(self, value):
+        return comma_separated(
+            value, [s for s, _ in PDFProcessingJob.JOB_STATUS_CHOICES], "status"
+        )
+
+    def validate_job_type(self, value):
+        return comma_separated(
+            value, [t for t, _ in PDFProcessingJob.JOB_TYPE_CHOICES], "job type"
+        )
+
+    def validate_fields(self, value):
+        return comma_separated(value, list(JOB_LIST_FIELDS), "field")
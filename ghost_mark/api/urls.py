@@ -31,19 +31,43 @@ urlpatterns = [
         views_async.add_selected_steganography_async,
         name="add_selected_steganography_async",
     ),
+    # Batch of PDFs in one ZIP archive (async)
+    path("async/batch/", views_async.create_batch_async, name="create_batch_async"),
+    path("batch/<str:batch_id>/", views_async.batch_status, name="batch_status"),
+    path(
+        "batch/<str:batch_id>/download/",
+        views_async.download_batch,
+        name="download_batch",
+    ),
+    # Resumable chunked uploads (tus-style), finalized into an async job
+    path("uploads/", views_async.create_upload, name="create_upload"),
+    path(
+        "uploads/<str:upload_id>/",
+        views_async.chunked_upload,
+        name="chunked_upload",
+    ),
+    path(
+        "uploads/<str:upload_id>/finalize/",
+        views_async.finalize_chunked_upload,
+        name="finalize_chunked_upload",
+    ),
     # Job management endpoints
     path("status/<str:job_id>/", views_async.job_status, name="job_status"),
+    path("events/<str:job_id>/", views_async.job_events, name="job_events"),
     path(
         "download/<str:job_id>/",
         views_async.download_processed_pdf,
         name="download_processed_pdf",
     ),
     path("jobs/", views_async.job_list, name="job_list"),  # For debugging/admin
-    
+    # Audit record of an expired job
+    path("archive/<str:job_id>/", views_async.archived_job, name="archived_job"),
+    path("dedup/", views_async.dedup_status, name="dedup_status"),
+    path("scratch/", views_async.scratch_status, name="scratch_status"),
+    path("admission/", views_async.admission_status, name="admission_status"),
     # ===================
     # LEGACY ENDPOINTS (BLOCKING) - Keep for backward compatibility
     # ===================
-    
     # Individual steganography methods
     path("watermark/", views.add_watermark_api, name="add_watermark"),
     path("qr-code/", views.add_qr_code_api, name="add_qr_code"),
@@ -1,8 +1,5 @@
 # api/views.py - FIXED VERSION
-import os
-import uuid
 from django.http import HttpResponse
-from django.conf import settings
 from rest_framework import status
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.parsers import MultiPartParser, FormParser
@@ -10,7 +7,12 @@ from rest_framework.response import Response
 
 # Import from your existing pdf_app
 from pdf_app.watermark.service import PDFWatermarkService
-from pdf_app.utils import add_qr_code_to_pdf, encode_message_in_pdf_font_stego
+from pdf_app.utils import (
+    add_qr_code_to_pdf_bytes,
+    encode_message_in_pdf_font_stego_bytes,
+)
+from pdf_app.pipeline.engine import ALL_METHODS, run_pipeline
+from pdf_app.uploads import rejected_upload_errors
 
 from .serializers import (
     WatermarkSerializer,
@@ -21,50 +23,6 @@ from .serializers import (
 )
 
 
-def create_temp_file_from_content(file_content, prefix="temp_"):
-    """Helper function to create temporary files from file content (bytes)"""
-    temp_dir = getattr(settings, "MEDIA_ROOT", "/tmp")
-    os.makedirs(temp_dir, exist_ok=True)
-
-    temp_filename = f"{prefix}{uuid.uuid4().hex}.pdf"
-    temp_path = os.path.join(temp_dir, temp_filename)
-
-    with open(temp_path, "wb") as destination:
-        destination.write(file_content)
-
-    return temp_path
-
-
-def create_temp_file_from_django_file(pdf_file, prefix="temp_"):
-    """Helper function to create temporary files from Django uploaded file"""
-    temp_dir = getattr(settings, "MEDIA_ROOT", "/tmp")
-    os.makedirs(temp_dir, exist_ok=True)
-
-    temp_filename = f"{prefix}{uuid.uuid4().hex}.pdf"
-    temp_path = os.path.join(temp_dir, temp_filename)
-
-    with open(temp_path, "wb+") as destination:
-        if hasattr(pdf_file, "chunks"):
-            # Django uploaded file
-            for chunk in pdf_file.chunks():
-                destination.write(chunk)
-        else:
-            # Regular file object
-            pdf_file.seek(0)
-            destination.write(pdf_file.read())
-
-    return temp_path
-
-
-def cleanup_temp_file(file_path):
-    """Helper function to clean up temporary files"""
-    try:
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
-    except Exception as e:
-        print(f"Error cleaning up temp file {file_path}: {e}")
-
-
 @api_view(["GET"])
 def api_info(request):
     """API endpoint to get information about available steganography methods"""
@@ -95,6 +53,7 @@ def api_info(request):
                     "method": "POST",
                     "description": "Hide message using font size variations",
                     "required_fields": ["pdf_file", "secret_message", "cover_text"],
+                    "note": "Set multi_page to spread long messages across page footers",
                 },
                 "all_methods": {
                     "url": "/api/all/",
@@ -122,7 +81,10 @@ def add_watermark_api(request):
     serializer = WatermarkSerializer(data=request.data)
 
     if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            rejected_upload_errors(request) or serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
     pdf_file = serializer.validated_data["pdf_file"]
     watermark_text = serializer.validated_data["watermark_text"]
@@ -157,43 +119,30 @@ def add_qr_code_api(request):
     serializer = QRCodeSerializer(data=request.data)
 
     if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            rejected_upload_errors(request) or serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
     pdf_file = serializer.validated_data["pdf_file"]
     email = serializer.validated_data["email"]
 
-    temp_input_path = None
-    temp_output_path = None
-
     try:
-        # Create temporary files
-        temp_input_path = create_temp_file_from_django_file(pdf_file, "qr_input_")
-        temp_output_path = os.path.join(
-            os.path.dirname(temp_input_path), f"qr_output_{uuid.uuid4().hex}.pdf"
-        )
-
-        # Add QR code
-        add_qr_code_to_pdf(temp_input_path, temp_output_path, email)
+        # Add QR code in memory
+        pdf_content = add_qr_code_to_pdf_bytes(pdf_file, email)
 
         # Create response
-        with open(temp_output_path, "rb") as pdf_file_result:
-            response = HttpResponse(
-                pdf_file_result.read(), content_type="application/pdf"
-            )
-            response["Content-Disposition"] = (
-                f'attachment; filename="qr_code_{pdf_file.name}"'
-            )
-            return response
+        response = HttpResponse(pdf_content, content_type="application/pdf")
+        response["Content-Disposition"] = (
+            f'attachment; filename="qr_code_{pdf_file.name}"'
+        )
+        return response
 
     except Exception as e:
         return Response(
             {"error": f"Error adding QR code: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
-    finally:
-        # Cleanup
-        cleanup_temp_file(temp_input_path)
-        cleanup_temp_file(temp_output_path)
 
 
 @api_view(["POST"])
@@ -203,25 +152,23 @@ def add_font_steganography_api(request):
     serializer = FontSteganographySerializer(data=request.data)
 
     if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            rejected_upload_errors(request) or serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
     pdf_file = serializer.validated_data["pdf_file"]
     secret_message = serializer.validated_data["secret_message"]
     cover_text = serializer.validated_data["cover_text"]
-
-    temp_input_path = None
-    temp_output_path = None
+    multi_page = serializer.validated_data.get("multi_page", False)
 
     try:
-        # Create temporary files
-        temp_input_path = create_temp_file_from_django_file(pdf_file, "font_input_")
-        temp_output_path = os.path.join(
-            os.path.dirname(temp_input_path), f"font_output_{uuid.uuid4().hex}.pdf"
-        )
-
-        # Add font steganography
-        result = encode_message_in_pdf_font_stego(
-            temp_input_path, temp_output_path, secret_message, cover_text
+        # Add font steganography in memory
+        result = encode_message_in_pdf_font_stego_bytes(
+            pdf_file,
+            secret_message,
+            cover_text,
+            multi_page=multi_page,
         )
 
         if not result["success"]:
@@ -230,24 +177,17 @@ def add_font_steganography_api(request):
             )
 
         # Create response
-        with open(temp_output_path, "rb") as pdf_file_result:
-            response = HttpResponse(
-                pdf_file_result.read(), content_type="application/pdf"
-            )
-            response["Content-Disposition"] = (
-                f'attachment; filename="font_stego_{pdf_file.name}"'
-            )
-            return response
+        response = HttpResponse(result["pdf_content"], content_type="application/pdf")
+        response["Content-Disposition"] = (
+            f'attachment; filename="font_stego_{pdf_file.name}"'
+        )
+        return response
 
     except Exception as e:
         return Response(
             {"error": f"Error adding font steganography: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
-    finally:
-        # Cleanup
-        cleanup_temp_file(temp_input_path)
-        cleanup_temp_file(temp_output_path)
 
 
 @api_view(["POST"])
@@ -257,7 +197,10 @@ def add_all_steganography_api(request):
     serializer = CombinedSteganographySerializer(data=request.data)
 
     if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            rejected_upload_errors(request) or serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
     pdf_file = serializer.validated_data["pdf_file"]
 
@@ -271,80 +214,38 @@ def add_all_steganography_api(request):
     email = serializer.validated_data.get("email")
     secret_message = serializer.validated_data.get("secret_message")
     cover_text = serializer.validated_data.get("cover_text")
+    multi_page = serializer.validated_data.get("multi_page", False)
 
-    temp_files = []
-    current_pdf_content = None
+    # Only the enabled methods run, in the fixed all-methods order
+    enabled = {
+        "watermark": enable_watermark,
+        "qr_code": enable_qr_code,
+        "font_stego": enable_font_stego,
+    }
+    methods = [method for method in ALL_METHODS if enabled[method]]
 
     try:
         # Read the original PDF content
         pdf_file.seek(0)  # Ensure we're at the beginning
-        current_pdf_content = pdf_file.read()
-        methods_applied = []
-
-        # Step 1: Add watermark if enabled
-        if enable_watermark and watermark_text:
-            from io import BytesIO
-
-            # Create BytesIO object from current PDF content
-            pdf_buffer = BytesIO(current_pdf_content)
-
-            # Add watermark
-            watermarked_pdf = PDFWatermarkService.add_invisible_watermark(
-                pdf_buffer, watermark_text, PDFWatermarkService.WATERMARK_COLOR
-            )
-
-            # Update current PDF content
-            current_pdf_content = watermarked_pdf.getvalue()
-            methods_applied.append("watermark")
-
-        # Step 2: Add QR code if enabled
-        if enable_qr_code and email:
-            # Create temp file from current content
-            temp_input_path = create_temp_file_from_content(
-                current_pdf_content, "qr_step_"
-            )
-            temp_output_path = os.path.join(
-                os.path.dirname(temp_input_path),
-                f"qr_step_output_{uuid.uuid4().hex}.pdf",
-            )
-
-            # Add QR code
-            add_qr_code_to_pdf(temp_input_path, temp_output_path, email)
-
-            # Read the result and update current content
-            with open(temp_output_path, "rb") as f:
-                current_pdf_content = f.read()
-
-            temp_files.extend([temp_input_path, temp_output_path])
-            methods_applied.append("qr_code")
-
-        # Step 3: Add font steganography if enabled
-        if enable_font_stego and secret_message and cover_text:
-            # Create temp file from current content
-            temp_input_path = create_temp_file_from_content(
-                current_pdf_content, "font_step_"
-            )
-            temp_output_path = os.path.join(
-                os.path.dirname(temp_input_path),
-                f"font_step_output_{uuid.uuid4().hex}.pdf",
-            )
+        result = run_pipeline(
+            pdf_file.read(),
+            methods,
+            {
+                "watermark_text": watermark_text,
+                "email": email,
+                "secret_message": secret_message,
+                "cover_text": cover_text,
+                "multi_page": multi_page,
+            },
+        )
 
-            # Add font steganography
-            result = encode_message_in_pdf_font_stego(
-                temp_input_path, temp_output_path, secret_message, cover_text
+        if not result["success"]:
+            return Response(
+                {"error": result["error"]}, status=status.HTTP_400_BAD_REQUEST
             )
 
-            if not result["success"]:
-                return Response(
-                    {"error": result["error"]}, status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Read the result and update current content
-            with open(temp_output_path, "rb") as f:
-                current_pdf_content = f.read()
-
-            temp_files.extend([temp_input_path, temp_output_path])
-            methods_applied.append("font_stego")
+        current_pdf_content = result["pdf_content"]
+        methods_applied = result["methods_applied"]
 
         # Create final response
         response = HttpResponse(current_pdf_content, content_type="application/pdf")
@@ -360,10 +261,6 @@ def add_all_steganography_api(request):
             {"error": f"Error applying steganography methods: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
-    finally:
-        # Cleanup all temp files
-        for temp_file in temp_files:
-            cleanup_temp_file(temp_file)
 
 
 @api_view(["POST"])
@@ -373,7 +270,10 @@ def add_selected_steganography_api(request):
     serializer = SelectedSteganographySerializer(data=request.data)
 
     if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            rejected_upload_errors(request) or serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
     pdf_file = serializer.validated_data["pdf_file"]
     methods = serializer.validated_data["methods"]
@@ -383,79 +283,32 @@ def add_selected_steganography_api(request):
     email = serializer.validated_data.get("email")
     secret_message = serializer.validated_data.get("secret_message")
     cover_text = serializer.validated_data.get("cover_text")
-
-    temp_files = []
-    current_pdf_content = None
+    multi_page = serializer.validated_data.get("multi_page", False)
 
     try:
         # Read the original PDF content
         pdf_file.seek(0)  # Ensure we're at the beginning
-        current_pdf_content = pdf_file.read()
-        methods_applied = []
 
         # Apply methods in order
-        for method in methods:
-            if method == "watermark" and watermark_text:
-                from io import BytesIO
-
-                # Create BytesIO object from current PDF content
-                pdf_buffer = BytesIO(current_pdf_content)
-
-                # Add watermark
-                watermarked_pdf = PDFWatermarkService.add_invisible_watermark(
-                    pdf_buffer, watermark_text, PDFWatermarkService.WATERMARK_COLOR
-                )
-
-                # Update current PDF content
-                current_pdf_content = watermarked_pdf.getvalue()
-                methods_applied.append("watermark")
-
-            elif method == "qr_code" and email:
-                # Create temp file from current content
-                temp_input_path = create_temp_file_from_content(
-                    current_pdf_content, "qr_selected_"
-                )
-                temp_output_path = os.path.join(
-                    os.path.dirname(temp_input_path),
-                    f"qr_selected_output_{uuid.uuid4().hex}.pdf",
-                )
-
-                # Add QR code
-                add_qr_code_to_pdf(temp_input_path, temp_output_path, email)
-
-                # Read the result and update current content
-                with open(temp_output_path, "rb") as f:
-                    current_pdf_content = f.read()
-
-                temp_files.extend([temp_input_path, temp_output_path])
-                methods_applied.append("qr_code")
-
-            elif method == "font_stego" and secret_message and cover_text:
-                # Create temp file from current content
-                temp_input_path = create_temp_file_from_content(
-                    current_pdf_content, "font_selected_"
-                )
-                temp_output_path = os.path.join(
-                    os.path.dirname(temp_input_path),
-                    f"font_selected_output_{uuid.uuid4().hex}.pdf",
-                )
-
-                # Add font steganography
-                result = encode_message_in_pdf_font_stego(
-                    temp_input_path, temp_output_path, secret_message, cover_text
-                )
-
-                if not result["success"]:
-                    return Response(
-                        {"error": result["error"]}, status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                # Read the result and update current content
-                with open(temp_output_path, "rb") as f:
-                    current_pdf_content = f.read()
-
-                temp_files.extend([temp_input_path, temp_output_path])
-                methods_applied.append("font_stego")
+        result = run_pipeline(
+            pdf_file.read(),
+            methods,
+            {
+                "watermark_text": watermark_text,
+                "email": email,
+                "secret_message": secret_message,
+                "cover_text": cover_text,
+                "multi_page": multi_page,
+            },
+        )
+
+        if not result["success"]:
+            return Response(
+                {"error": result["error"]}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        current_pdf_content = result["pdf_content"]
+        methods_applied = result["methods_applied"]
 
         # Create final response
         response = HttpResponse(current_pdf_content, content_type="application/pdf")
@@ -471,7 +324,3 @@ def add_selected_steganography_api(request):
             {"error": f"Error applying selected steganography methods: {str(e)}"},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
-    finally:
-        # Cleanup all temp files
-        for temp_file in temp_files:
-            cleanup_temp_file(temp_file)
@@ -1,41 +1,191 @@
 # api/views_async.py
+import asyncio
+import functools
+import json
 import os
 import uuid
-from django.http import HttpResponse, Http404
+
+import redis
+from celery import group
+from django.db import transaction
+from django.db.models import Count
+from django.http import (
+    Http404,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.conf import settings
 from rest_framework import status
 from rest_framework.decorators import api_view, parser_classes
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 
-from pdf_app.models import PDFProcessingJob
-from pdf_app.tasks import process_pdf_task
+from pdf_app.admission import (
+    admission_stats,
+    admit,
+    request_client_id,
+    request_size,
+    track_job_bytes,
+)
+from pdf_app.batch import (
+    BatchArchiveError,
+    extract_archive_member,
+    open_batch_archive,
+    parse_manifest,
+    read_archive_manifest,
+    stream_zip,
+)
+from pdf_app.downloads import file_download_response
+from pdf_app.models import (
+    ArchivedJob,
+    ChunkedUpload,
+    PDFBatchJob,
+    PDFProcessingJob,
+)
+from pdf_app.chunked_uploads import (
+    DEFAULT_CHUNKED_UPLOAD_MAX_BYTES,
+    TUS_VERSION,
+    AssembledUpload,
+    ChunkError,
+    append_chunk,
+    create_chunked_upload,
+    delete_chunked_upload,
+    parse_upload_metadata,
+)
+from pdf_app.dedup import dedup_stats, reuse_processed_output
+from pdf_app.job_listing import filter_jobs, job_counts, page_jobs
+from pdf_app.routing import job_route
+from pdf_app.job_state import (
+    aapply_job_state,
+    apply_job_state,
+    get_cached_job,
+    init_job_states,
+)
+from pdf_app.scratch import scratch_stats
+from pdf_app.storage import get_job_storage
+from pdf_app.uploads import check_pdf_file, rejected_upload_errors
+from pdf_app.tasks import process_pdf_task, queue_job_callback
+from pdf_app.progress import (
+    aget_progress,
+    async_redis_client,
+    get_progress,
+    job_events_channel,
+)
 from .serializers import (
-    WatermarkSerializer,
-    QRCodeSerializer,
-    FontSteganographySerializer,
-    CombinedSteganographySerializer,
-    SelectedSteganographySerializer,
+    AsyncWatermarkSerializer,
+    AsyncQRCodeSerializer,
+    AsyncFontSteganographySerializer,
+    AsyncCombinedSteganographySerializer,
+    AsyncSelectedSteganographySerializer,
+    BatchSerializer,
+    BatchFileParamsSerializer,
+    JobListQuerySerializer,
 )
 
+# Statuses after which a job no longer changes
+JOB_FINAL_STATUSES = ["COMPLETED", "FAILED"]
 
-def save_uploaded_file(uploaded_file, job_id):
-    """Save uploaded file to temp location and return path"""
-    temp_dir = os.path.join(settings.MEDIA_ROOT, "temp_uploads")
-    os.makedirs(temp_dir, exist_ok=True)
+# Serializer validating each job type (used when finalizing chunked uploads)
+ASYNC_JOB_SERIALIZERS = {
+    "watermark": AsyncWatermarkSerializer,
+    "qr_code": AsyncQRCodeSerializer,
+    "font_stego": AsyncFontSteganographySerializer,
+    "all_methods": AsyncCombinedSteganographySerializer,
+    "selected_methods": AsyncSelectedSteganographySerializer,
+}
 
-    temp_filename = f"{job_id}_{uploaded_file.name}"
-    temp_path = os.path.join(temp_dir, temp_filename)
+# Batch defaults that a manifest entry can override per file
+BATCH_FILE_PARAMS = [
+    "watermark_text",
+    "email",
+    "secret_message",
+    "cover_text",
+    "multi_page",
+]
 
-    with open(temp_path, "wb+") as destination:
-        if hasattr(uploaded_file, "chunks"):
-            for chunk in uploaded_file.chunks():
-                destination.write(chunk)
-        else:
-            uploaded_file.seek(0)
-            destination.write(uploaded_file.read())
 
-    return temp_path
+def input_file_key(job_id, filename):
+    """Storage key of a job's uploaded PDF"""
+    return f"temp_uploads/{job_id}_{os.path.basename(filename)}"
+
+
+def save_uploaded_file(uploaded_file, job_id):
+    """
+    Save uploaded file to job storage, hashing it on the way
+
+    Returns:
+        (storage key, hex SHA-256 of the content) tuple
+    """
+    storage = get_job_storage()
+    key = input_file_key(job_id, uploaded_file.name)
+
+    # Streamed PDF uploads are already on disk and hashed: just move them
+    content_hash = getattr(uploaded_file, "sha256", None)
+    if content_hash and hasattr(uploaded_file, "temporary_file_path"):
+        storage.save_file(key, uploaded_file.temporary_file_path(), move=True)
+        return key, content_hash
+
+    uploaded_file.seek(0)
+    content_hash = storage.save(key, uploaded_file)
+
+    return key, content_hash
+
+
+def submit_job(job, input_size, page_count=None):
+    """Queue a new job, or complete it from an identical job's output"""
+    reused = reuse_processed_output(job)
+    init_job_states([job])
+    if not reused:
+        track_job_bytes({job.job_id: input_size})
+        # After the job row is committed (right away outside a transaction)
+        route = job_route(job, input_size, page_count)
+        transaction.on_commit(
+            lambda: process_pdf_task.apply_async(args=[job.job_id], **route)
+        )
+        return
+
+    queue_job_callback(job)
+
+
+def create_async_job(job_type, data):
+    """
+    Create and submit a job from validated serializer data
+
+    Args:
+        job_type: One of PDFProcessingJob.JOB_TYPE_CHOICES
+        data: validated_data with pdf_file and the method parameters
+
+    Returns:
+        The created PDFProcessingJob
+    """
+    job_id = str(uuid.uuid4())
+
+    # Save uploaded file
+    pdf_file = data["pdf_file"]
+    input_file_path, content_hash = save_uploaded_file(pdf_file, job_id)
+
+    # Create job record
+    job = PDFProcessingJob.objects.create(
+        job_id=job_id,
+        job_type=job_type,
+        original_filename=pdf_file.name,
+        selected_methods=(
+            ",".join(data["methods"]) if job_type == "selected_methods" else None
+        ),
+        watermark_text=data.get("watermark_text"),
+        email=data.get("email"),
+        secret_message=data.get("secret_message"),
+        cover_text=data.get("cover_text"),
+        multi_page=data.get("multi_page", False),
+        input_file_path=input_file_path,
+        callback_url=data.get("callback_url") or None,
+        content_hash=content_hash,
+    )
+
+    # Queue the task (unless an identical job's output can be reused)
+    submit_job(job, pdf_file.size, getattr(pdf_file, "page_count", None))
+    return job
 
 
 def create_job_response(job):
@@ -47,7 +197,9 @@ def create_job_response(job):
             "job_type": job.job_type,
             "created_at": job.created_at.isoformat(),
             "message": "Job created successfully. Use the job_id to check status.",
+            "deduplicated": job.dedup_hit,
             "status_url": f"/api/status/{job.job_id}/",
+            "events_url": f"/api/events/{job.job_id}/",
             "download_url": (
                 f"/api/download/{job.job_id}/" if job.status == "COMPLETED" else None
             ),
@@ -56,35 +208,67 @@ def create_job_response(job):
     )
 
 
+def admission_response(admission):
+    """429 for a request turned away by admission control"""
+    response = Response(
+        {
+            "error": admission.message,
+            "reason": admission.reason,
+            "retry_after": admission.retry_after,
+        },
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response["Retry-After"] = str(admission.retry_after)
+    return response
+
+
+def admission_controlled(view=None, size=None):
+    """
+    Run a job-creating view only if admission control lets the request in
+
+    Checked before the body is parsed, so a rejected upload is never
+    written anywhere. The request's bytes count as in flight until the
+    view returns.
+
+    Args:
+        size: func(request, *args, **kwargs) -> bytes the request brings
+            into processing (request_size if None)
+    """
+    if view is None:
+        return functools.partial(admission_controlled, size=size)
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if size is None:
+            request_bytes = request_size(request)
+        else:
+            request_bytes = size(request, *args, **kwargs)
+        admission = admit(request_client_id(request), request_bytes)
+        if not admission.admitted:
+            return admission_response(admission)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            admission.release()
+
+    return wrapper
+
+
 @api_view(["POST"])
 @parser_classes([MultiPartParser, FormParser])
+@admission_controlled
 def add_watermark_async(request):
     """Async API endpoint to add invisible watermark to PDF"""
-    serializer = WatermarkSerializer(data=request.data)
+    serializer = AsyncWatermarkSerializer(data=request.data)
 
     if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-    try:
-        # Generate unique job ID
-        job_id = str(uuid.uuid4())
-
-        # Save uploaded file
-        pdf_file = serializer.validated_data["pdf_file"]
-        input_file_path = save_uploaded_file(pdf_file, job_id)
-
-        # Create job record
-        job = PDFProcessingJob.objects.create(
-            job_id=job_id,
-            job_type="watermark",
-            original_filename=pdf_file.name,
-            watermark_text=serializer.validated_data["watermark_text"],
-            input_file_path=input_file_path,
+        return Response(
+            rejected_upload_errors(request) or serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
-        # Queue the task
-        process_pdf_task.delay(job_id)
-
+    try:
+        job = create_async_job("watermark", serializer.validated_data)
         return create_job_response(job)
 
     except Exception as e:
@@ -96,28 +280,19 @@ def add_watermark_async(request):
 
 @api_view(["POST"])
 @parser_classes([MultiPartParser, FormParser])
+@admission_controlled
 def add_qr_code_async(request):
     """Async API endpoint to add QR code to PDF"""
-    serializer = QRCodeSerializer(data=request.data)
+    serializer = AsyncQRCodeSerializer(data=request.data)
 
     if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-    try:
-        job_id = str(uuid.uuid4())
-        pdf_file = serializer.validated_data["pdf_file"]
-        input_file_path = save_uploaded_file(pdf_file, job_id)
-
-        job = PDFProcessingJob.objects.create(
-            job_id=job_id,
-            job_type="qr_code",
-            original_filename=pdf_file.name,
-            email=serializer.validated_data["email"],
-            input_file_path=input_file_path,
+        return Response(
+            rejected_upload_errors(request) or serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
-        process_pdf_task.delay(job_id)
-
+    try:
+        job = create_async_job("qr_code", serializer.validated_data)
         return create_job_response(job)
 
     except Exception as e:
@@ -129,29 +304,19 @@ def add_qr_code_async(request):
 
 @api_view(["POST"])
 @parser_classes([MultiPartParser, FormParser])
+@admission_controlled
 def add_font_steganography_async(request):
     """Async API endpoint to add font steganography to PDF"""
-    serializer = FontSteganographySerializer(data=request.data)
+    serializer = AsyncFontSteganographySerializer(data=request.data)
 
     if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-    try:
-        job_id = str(uuid.uuid4())
-        pdf_file = serializer.validated_data["pdf_file"]
-        input_file_path = save_uploaded_file(pdf_file, job_id)
-
-        job = PDFProcessingJob.objects.create(
-            job_id=job_id,
-            job_type="font_stego",
-            original_filename=pdf_file.name,
-            secret_message=serializer.validated_data["secret_message"],
-            cover_text=serializer.validated_data["cover_text"],
-            input_file_path=input_file_path,
+        return Response(
+            rejected_upload_errors(request) or serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
-        process_pdf_task.delay(job_id)
-
+    try:
+        job = create_async_job("font_stego", serializer.validated_data)
         return create_job_response(job)
 
     except Exception as e:
@@ -163,31 +328,19 @@ def add_font_steganography_async(request):
 
 @api_view(["POST"])
 @parser_classes([MultiPartParser, FormParser])
+@admission_controlled
 def add_all_steganography_async(request):
     """Async API endpoint to apply all steganography methods"""
-    serializer = CombinedSteganographySerializer(data=request.data)
+    serializer = AsyncCombinedSteganographySerializer(data=request.data)
 
     if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-    try:
-        job_id = str(uuid.uuid4())
-        pdf_file = serializer.validated_data["pdf_file"]
-        input_file_path = save_uploaded_file(pdf_file, job_id)
-
-        job = PDFProcessingJob.objects.create(
-            job_id=job_id,
-            job_type="all_methods",
-            original_filename=pdf_file.name,
-            watermark_text=serializer.validated_data.get("watermark_text"),
-            email=serializer.validated_data.get("email"),
-            secret_message=serializer.validated_data.get("secret_message"),
-            cover_text=serializer.validated_data.get("cover_text"),
-            input_file_path=input_file_path,
+        return Response(
+            rejected_upload_errors(request) or serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
-        process_pdf_task.delay(job_id)
-
+    try:
+        job = create_async_job("all_methods", serializer.validated_data)
         return create_job_response(job)
 
     except Exception as e:
@@ -199,34 +352,19 @@ def add_all_steganography_async(request):
 
 @api_view(["POST"])
 @parser_classes([MultiPartParser, FormParser])
+@admission_controlled
 def add_selected_steganography_async(request):
     """Async API endpoint to apply selected steganography methods"""
-    serializer = SelectedSteganographySerializer(data=request.data)
+    serializer = AsyncSelectedSteganographySerializer(data=request.data)
 
     if not serializer.is_valid():
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-    try:
-        job_id = str(uuid.uuid4())
-        pdf_file = serializer.validated_data["pdf_file"]
-        input_file_path = save_uploaded_file(pdf_file, job_id)
-
-        methods = serializer.validated_data["methods"]
-
-        job = PDFProcessingJob.objects.create(
-            job_id=job_id,
-            job_type="selected_methods",
-            original_filename=pdf_file.name,
-            selected_methods=",".join(methods),
-            watermark_text=serializer.validated_data.get("watermark_text"),
-            email=serializer.validated_data.get("email"),
-            secret_message=serializer.validated_data.get("secret_message"),
-            cover_text=serializer.validated_data.get("cover_text"),
-            input_file_path=input_file_path,
+        return Response(
+            rejected_upload_errors(request) or serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
-        process_pdf_task.delay(job_id)
-
+    try:
+        job = create_async_job("selected_methods", serializer.validated_data)
         return create_job_response(job)
 
     except Exception as e:
@@ -240,7 +378,8 @@ def add_selected_steganography_async(request):
 def job_status(request, job_id):
     """Get job status and details"""
     try:
-        job = PDFProcessingJob.objects.get(job_id=job_id)
+        # Served from the Redis job state; the table only when it is missing
+        job = get_cached_job(job_id) or PDFProcessingJob.objects.get(job_id=job_id)
 
         response_data = {
             "job_id": job.job_id,
@@ -257,17 +396,125 @@ def job_status(request, job_id):
             ),
         }
 
+        # Live progress (stage, pages, ETA, stage timings) from Redis
+        progress = get_progress(job.job_id)
+        if progress:
+            response_data["progress"] = progress
+
+        # Completion webhook delivery (attempts, latency, last error)
+        if job.callback_url:
+            response_data["callback"] = {
+                "url": job.callback_url,
+                "status": job.callback_status,
+                "attempts": job.callback_attempts,
+                "latency": job.callback_latency,
+                "error": job.callback_error,
+            }
+
+        # Large jobs run as page-range shards: report how many are done
+        if job.shard_count:
+            response_data["shards"] = {
+                "total": job.shard_count,
+                "completed": job.shards_completed,
+            }
+
         return Response(response_data)
 
     except PDFProcessingJob.DoesNotExist:
         return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
+async def job_events(request, job_id):
+    """
+    Server-Sent Events stream of a job's status and progress
+
+    The job row is read once when the stream opens and once when the job
+    finishes; everything in between is pushed from the Redis pub/sub
+    notifications published by the processing tasks. restart.sh serves
+    ghost_mark.asgi with uvicorn workers, where a waiting client costs no
+    thread; under WSGI Django would consume the stream synchronously and
+    hold a worker thread for its whole duration.
+    """
+    job = await PDFProcessingJob.objects.filter(job_id=job_id).afirst()
+    if job is None:
+        return JsonResponse({"error": "Job not found"}, status=404)
+
+    response = StreamingHttpResponse(
+        _job_event_stream(job), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Don't let nginx buffer the stream
+    return response
+
+
+async def _job_event_stream(job):
+    """Yield SSE messages until the job finishes or the stream times out"""
+    timeout = getattr(settings, "JOB_EVENTS_TIMEOUT", 300)
+    keepalive = getattr(settings, "JOB_EVENTS_KEEPALIVE", 15)
+
+    if job.status in JOB_FINAL_STATUSES:
+        yield _sse_message("status", _job_event_payload(job, None))
+        return
+
+    client = async_redis_client()
+    pubsub = client.pubsub()
+    try:
+        # Subscribe before the first snapshot so no change slips in between
+        await pubsub.subscribe(job_events_channel(job.job_id))
+        await aapply_job_state(client, job)
+        progress = await aget_progress(client, job.job_id)
+        yield _sse_message("status", _job_event_payload(job, progress))
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            if progress and progress.get("status") in JOB_FINAL_STATUSES:
+                break
+
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=keepalive
+            )
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+
+            progress = await aget_progress(client, job.job_id)
+            if progress and progress.get("status") in JOB_FINAL_STATUSES:
+                # Final event carries the stored result (download/error)
+                job = await PDFProcessingJob.objects.aget(job_id=job.job_id)
+                await aapply_job_state(client, job)
+            yield _sse_message("progress", _job_event_payload(job, progress))
+
+    except redis.RedisError as e:
+        print(f"⚠️  Job events unavailable for {job.job_id}: {e}")
+        yield _sse_message("error", {"error": "Live updates unavailable"})
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
+
+
+def _job_event_payload(job, progress):
+    status_value = (progress or {}).get("status") or job.status
+    return {
+        "job_id": job.job_id,
+        "status": status_value,
+        "progress": progress,
+        "error_message": job.error_message,
+        "download_url": (
+            f"/api/download/{job.job_id}/" if status_value == "COMPLETED" else None
+        ),
+    }
+
+
+def _sse_message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @api_view(["GET"])
 def download_processed_pdf(request, job_id):
     """Download processed PDF file"""
     try:
-        job = PDFProcessingJob.objects.get(job_id=job_id)
+        job = apply_job_state(PDFProcessingJob.objects.get(job_id=job_id))
 
         if job.status != "COMPLETED":
             return Response(
@@ -275,40 +522,575 @@ def download_processed_pdf(request, job_id):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if not job.output_file_path or not os.path.exists(job.output_file_path):
+        storage = get_job_storage()
+        if not job.output_file_path or not storage.exists(job.output_file_path):
             return Response(
                 {"error": "Processed file not found or expired"},
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        # Read and return the file
-        with open(job.output_file_path, "rb") as f:
-            response = HttpResponse(f.read(), content_type="application/pdf")
-            response["Content-Disposition"] = (
-                f'attachment; filename="{job.original_filename}"'
-            )
-            return response
+        # Object storage: the client fetches the file with a presigned URL
+        filename = os.path.basename(job.original_filename)
+        url = storage.url(job.output_file_path, filename)
+        if url:
+            return HttpResponseRedirect(url)
+
+        # Stream the file (Range / conditional GET aware, or offloaded)
+        return file_download_response(
+            request, storage.local_path(job.output_file_path), filename
+        )
 
     except PDFProcessingJob.DoesNotExist:
         return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(["GET"])
+def archived_job(request, job_id):
+    """Audit record of a job that has expired (see pdf_app/archive.py)"""
+    try:
+        job = ArchivedJob.objects.get(job_id=job_id)
+    except ArchivedJob.DoesNotExist:
+        return Response(
+            {"error": "Archived job not found"}, status=status.HTTP_404_NOT_FOUND
+        )
+
+    return Response(
+        {
+            "job_id": job.job_id,
+            "status": job.status,
+            "job_type": job.job_type,
+            "original_filename": job.original_filename,
+            "batch_id": job.batch_id,
+            "params": job.params,
+            "processing_time": job.processing_time,
+            "created_at": job.created_at.isoformat(),
+            "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+            "archived_at": job.archived_at.isoformat(),
+        }
+    )
+
+
+@api_view(["GET"])
+def dedup_status(request):
+    """Deduplication hit rate over the jobs currently kept"""
+    return Response(dedup_stats())
+
+
+@api_view(["GET"])
+def admission_status(request):
+    """Queue length and bytes in flight against the limits, with rejections"""
+    return Response(admission_stats())
+
+
+@api_view(["GET"])
+def scratch_status(request):
+    """Scratch bytes in use per tier in this process, with the quotas"""
+    return Response(scratch_stats())
+
+
 @api_view(["GET"])
 def job_list(request):
-    """Get list of recent jobs (for debugging/admin)"""
-    jobs = PDFProcessingJob.objects.all()[:50]  # Last 50 jobs
+    """
+    List jobs newest first, a page at a time
+
+    Query parameters: status, job_type (comma-separated), created_after /
+    created_before (ISO 8601), fields (comma-separated, see
+    JOB_LIST_FIELDS), limit, cursor (next_cursor of the previous page) and
+    counts=true for the number of matching jobs per status and job type.
+    """
+    serializer = JobListQuerySerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    params = serializer.validated_data
+    jobs = filter_jobs(
+        statuses=params.get("status"),
+        job_types=params.get("job_type"),
+        created_after=params.get("created_after"),
+        created_before=params.get("created_before"),
+    )
+
+    try:
+        page = page_jobs(
+            jobs, params.get("fields"), params["limit"], params.get("cursor")
+        )
+    except ValueError as e:
+        return Response({"cursor": [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+
+    response_data = {
+        "jobs": page["jobs"],
+        "total_count": len(page["jobs"]),
+        "next_cursor": page["next_cursor"],
+        "next_url": None,
+    }
+    if page["next_cursor"]:
+        query = request.query_params.copy()
+        query["cursor"] = page["next_cursor"]
+        response_data["next_url"] = f"{request.path}?{query.urlencode()}"
+    if params["counts"]:
+        response_data["counts"] = job_counts(jobs)
 
-    job_data = []
-    for job in jobs:
-        job_data.append(
+    return Response(response_data)
+
+
+@api_view(["POST"])
+@parser_classes([MultiPartParser, FormParser])
+@admission_controlled
+def create_batch_async(request):
+    """
+    Async API endpoint to process every PDF of a ZIP archive
+
+    The form fields are the defaults for all files; a manifest (form field
+    or manifest.json in the archive) can override them per file name. Each
+    PDF becomes a job of the batch and the jobs run as one Celery group.
+    """
+    serializer = BatchSerializer(data=request.data)
+
+    if not serializer.is_valid():
+        return Response(
+            rejected_upload_errors(request) or serializer.errors,
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    data = serializer.validated_data
+    methods = data["methods"]
+
+    try:
+        archive, members = open_batch_archive(data["archive"])
+        if data.get("manifest") is not None:
+            manifest = parse_manifest(data["manifest"])
+        else:
+            manifest = read_archive_manifest(archive)
+    except (BatchArchiveError, ValueError) as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Validate every file before anything is queued
+    defaults = {
+        name: data[name] for name in BATCH_FILE_PARAMS if data.get(name) is not None
+    }
+    file_params = {}
+    file_errors = {}
+    for member, name in members:
+        params_serializer = BatchFileParamsSerializer(
+            data={**defaults, **manifest.get(name, {})}, context={"methods": methods}
+        )
+        if params_serializer.is_valid():
+            file_params[name] = params_serializer.validated_data
+        else:
+            file_errors[name] = params_serializer.errors
+
+    if file_errors:
+        return Response({"files": file_errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    storage = get_job_storage()
+    input_keys = []
+    try:
+        batch = PDFBatchJob.objects.create(
+            batch_id=str(uuid.uuid4()),
+            job_type=methods[0] if len(methods) == 1 else "selected_methods",
+            original_filename=data["archive"].name,
+            total_jobs=len(members),
+        )
+
+        jobs = []
+        input_sizes = {}
+        for member, name in members:
+            job_id = str(uuid.uuid4())
+            input_file_path = input_file_key(job_id, name)
+            content_hash = extract_archive_member(
+                archive, member, storage, input_file_path
+            )
+            input_keys.append(input_file_path)
+            input_sizes[job_id] = member.file_size
+
+            params = file_params[name]
+            jobs.append(
+                PDFProcessingJob(
+                    job_id=job_id,
+                    job_type=batch.job_type,
+                    batch=batch,
+                    original_filename=name,
+                    selected_methods=(
+                        ",".join(methods)
+                        if batch.job_type == "selected_methods"
+                        else None
+                    ),
+                    watermark_text=params.get("watermark_text"),
+                    email=params.get("email"),
+                    secret_message=params.get("secret_message"),
+                    cover_text=params.get("cover_text"),
+                    multi_page=params.get("multi_page", False),
+                    input_file_path=input_file_path,
+                    content_hash=content_hash,
+                )
+            )
+
+        PDFProcessingJob.objects.bulk_create(jobs, batch_size=500)
+
+        # Fan out: one processing task per file not served from an
+        # identical earlier job
+        queued = []
+        for job in jobs:
+            if reuse_processed_output(job):
+                queue_job_callback(job)
+            else:
+                queued.append(job)
+        init_job_states(jobs)
+        if queued:
+            track_job_bytes({job.job_id: input_sizes[job.job_id] for job in queued})
+            group(
+                process_pdf_task.s(job.job_id).set(
+                    **job_route(job, input_sizes[job.job_id])
+                )
+                for job in queued
+            ).apply_async()
+
+        print(
+            f"📦 Batch {batch.batch_id}: queued {len(queued)} jobs, "
+            f"{len(jobs) - len(queued)} reused"
+        )
+
+        return Response(
             {
-                "job_id": job.job_id,
-                "status": job.status,
-                "job_type": job.job_type,
-                "original_filename": job.original_filename,
-                "created_at": job.created_at.isoformat(),
-                "processing_time": job.processing_time,
-            }
+                "batch_id": batch.batch_id,
+                "job_type": batch.job_type,
+                "total_jobs": batch.total_jobs,
+                "created_at": batch.created_at.isoformat(),
+                "message": "Batch created successfully. Use the batch_id to check status.",
+                "status_url": f"/api/batch/{batch.batch_id}/",
+                "download_url": f"/api/batch/{batch.batch_id}/download/",
+            },
+            status=status.HTTP_202_ACCEPTED,
         )
 
-    return Response({"jobs": job_data, "total_count": len(job_data)})
+    except Exception as e:
+        storage.delete_many(input_keys)
+        return Response(
+            {"error": f"Error creating batch: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+    finally:
+        archive.close()
+
+
+def batch_progress(batch):
+    """Aggregate status of a batch from its jobs' statuses"""
+    counts = dict(
+        batch.jobs.order_by()
+        .values_list("status")
+        .annotate(count=Count("id"))
+        .values_list("status", "count")
+    )
+    completed = counts.get("COMPLETED", 0)
+    failed = counts.get("FAILED", 0)
+    finished = completed + failed
+
+    if batch.total_jobs and finished >= batch.total_jobs:
+        batch_status_value = "COMPLETED"
+    elif finished or counts.get("PROCESSING"):
+        batch_status_value = "PROCESSING"
+    else:
+        batch_status_value = "PENDING"
+
+    return {
+        "status": batch_status_value,
+        "pending": counts.get("PENDING", 0),
+        "processing": counts.get("PROCESSING", 0),
+        "completed": completed,
+        "failed": failed,
+        "percent": (
+            round(100 * finished / batch.total_jobs, 1) if batch.total_jobs else None
+        ),
+    }
+
+
+@api_view(["GET"])
+def batch_status(request, batch_id):
+    """Get aggregate progress of a batch and the files that failed"""
+    try:
+        batch = PDFBatchJob.objects.get(batch_id=batch_id)
+    except PDFBatchJob.DoesNotExist:
+        return Response({"error": "Batch not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    progress = batch_progress(batch)
+    failed_jobs = list(
+        batch.jobs.filter(status="FAILED").values(
+            "job_id", "original_filename", "error_message"
+        )[:100]
+    )
+
+    return Response(
+        {
+            "batch_id": batch.batch_id,
+            "status": progress.pop("status"),
+            "job_type": batch.job_type,
+            "original_filename": batch.original_filename,
+            "created_at": batch.created_at.isoformat(),
+            "total_jobs": batch.total_jobs,
+            "progress": progress,
+            "failed_jobs": failed_jobs,
+            "download_url": (
+                f"/api/batch/{batch.batch_id}/download/"
+                if progress["completed"]
+                else None
+            ),
+        }
+    )
+
+
+@api_view(["GET"])
+def download_batch(request, batch_id):
+    """Download the processed PDFs of a batch as a ZIP streamed on the fly"""
+    try:
+        batch = PDFBatchJob.objects.get(batch_id=batch_id)
+    except PDFBatchJob.DoesNotExist:
+        return Response({"error": "Batch not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    progress = batch_progress(batch)
+    if progress["status"] != "COMPLETED":
+        return Response(
+            {"error": f"Batch not completed. Current status: {progress['status']}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    storage = get_job_storage()
+    outputs = [
+        (name, key)
+        for name, key in batch.jobs.filter(status="COMPLETED")
+        .order_by("id")
+        .values_list("original_filename", "output_file_path")
+        .iterator()
+        if storage.exists(key)
+    ]
+    if not outputs:
+        return Response(
+            {"error": "No processed files found or they have expired"},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    archive_name = os.path.splitext(batch.original_filename)[0]
+    response = StreamingHttpResponse(
+        stream_zip(outputs, storage), content_type="application/zip"
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="processed_{archive_name}.zip"'
+    )
+    return response
+
+
+def chunked_upload_headers(response, upload):
+    """tus headers describing an upload's state"""
+    response["Tus-Resumable"] = TUS_VERSION
+    response["Upload-Offset"] = str(upload.upload_offset)
+    response["Upload-Length"] = str(upload.upload_length)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+@api_view(["POST"])
+@parser_classes([FormParser, MultiPartParser, JSONParser])
+@admission_controlled
+def create_upload(request):
+    """
+    Start a resumable upload
+
+    The size comes from the Upload-Length header (or an upload_length
+    field) and the file name from Upload-Metadata "filename" (or a
+    filename field).
+    """
+    metadata = parse_upload_metadata(request.headers.get("Upload-Metadata"))
+    filename = metadata.get("filename") or request.data.get("filename") or ""
+    upload_length = request.headers.get("Upload-Length") or request.data.get(
+        "upload_length"
+    )
+    max_bytes = getattr(
+        settings, "CHUNKED_UPLOAD_MAX_BYTES", DEFAULT_CHUNKED_UPLOAD_MAX_BYTES
+    )
+
+    if not filename.lower().endswith(".pdf"):
+        return Response(
+            {"error": "Only PDF files are allowed."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        upload_length = int(upload_length)
+    except (TypeError, ValueError):
+        return Response(
+            {"error": "Upload-Length is required."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if not 0 < upload_length <= max_bytes:
+        return Response(
+            {"error": f"Upload-Length must be between 1 and {max_bytes} bytes."},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
+
+    upload = create_chunked_upload(filename, upload_length)
+    upload_url = f"/api/uploads/{upload.upload_id}/"
+
+    response = Response(
+        {
+            "upload_id": upload.upload_id,
+            "upload_url": upload_url,
+            "finalize_url": f"{upload_url}finalize/",
+            "upload_offset": upload.upload_offset,
+            "upload_length": upload.upload_length,
+        },
+        status=status.HTTP_201_CREATED,
+    )
+    response["Location"] = upload_url
+    return chunked_upload_headers(response, upload)
+
+
+@api_view(["HEAD", "PATCH", "DELETE"])
+def chunked_upload(request, upload_id):
+    """
+    HEAD: current offset, to resume after an interruption
+    PATCH: append the request body at Upload-Offset
+        (Content-Type: application/offset+octet-stream, optional
+        Upload-Checksum)
+    DELETE: abandon the upload
+    """
+    try:
+        upload = ChunkedUpload.objects.get(upload_id=upload_id)
+    except ChunkedUpload.DoesNotExist:
+        return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == "HEAD":
+        return chunked_upload_headers(Response(status=status.HTTP_200_OK), upload)
+
+    if request.method == "DELETE":
+        delete_chunked_upload(upload)
+        response = Response(status=status.HTTP_204_NO_CONTENT)
+        response["Tus-Resumable"] = TUS_VERSION
+        return response
+
+    if request.content_type != "application/offset+octet-stream":
+        return Response(
+            {"error": "Content-Type must be application/offset+octet-stream"},
+            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
+
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+        content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        return Response(
+            {"error": "Upload-Offset is required."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        upload = append_chunk(
+            upload_id,
+            offset,
+            request.stream,
+            content_length,
+            request.headers.get("Upload-Checksum"),
+        )
+    except ChunkError as e:
+        upload.refresh_from_db()
+        return chunked_upload_headers(
+            Response({"error": str(e)}, status=e.status_code), upload
+        )
+
+    return chunked_upload_headers(Response(status=status.HTTP_204_NO_CONTENT), upload)
+
+
+def finalized_upload_size(request, upload_id):
+    """Bytes a finalize brings into processing: the whole assembled upload"""
+    upload_length = (
+        ChunkedUpload.objects.filter(upload_id=upload_id)
+        .values_list("upload_length", flat=True)
+        .first()
+    )
+    return upload_length or 0
+
+
+@api_view(["POST"])
+@parser_classes([FormParser, MultiPartParser, JSONParser])
+@admission_controlled(size=finalized_upload_size)
+def finalize_chunked_upload(request, upload_id):
+    """
+    Turn a complete upload into a job
+
+    Takes job_type plus the same parameters as the matching async endpoint;
+    the assembled file is passed on as its pdf_file.
+    """
+    try:
+        upload = ChunkedUpload.objects.get(upload_id=upload_id)
+    except ChunkedUpload.DoesNotExist:
+        return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    # Finalizing again (e.g. after a lost response) returns the same job
+    if upload.job_id:
+        return finalized_upload_response(upload)
+
+    if not upload.is_complete():
+        return chunked_upload_headers(
+            Response(
+                {
+                    "error": f"Upload incomplete: {upload.upload_offset} of "
+                    f"{upload.upload_length} bytes received"
+                },
+                status=status.HTTP_409_CONFLICT,
+            ),
+            upload,
+        )
+
+    job_type = request.data.get("job_type")
+    serializer_class = ASYNC_JOB_SERIALIZERS.get(job_type)
+    if serializer_class is None:
+        return Response(
+            {"job_type": [f"Must be one of: {', '.join(ASYNC_JOB_SERIALIZERS)}"]},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        # A concurrent finalize (a retry racing the original request) waits
+        # here for the row and then returns the job the first one created,
+        # before touching the scratch file that job has taken; the job's
+        # task is queued once this transaction commits
+        with transaction.atomic():
+            upload = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+            if upload.job_id:
+                return finalized_upload_response(upload)
+
+            check = check_pdf_file(upload.scratch_path)
+            if not check["success"]:
+                return Response(
+                    {"pdf_file": [check["error"]]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            data = request.data.copy()
+            pdf_file = AssembledUpload(upload)
+            pdf_file.page_count = check["page_count"]
+            data["pdf_file"] = pdf_file
+            try:
+                serializer = serializer_class(data=data)
+                if not serializer.is_valid():
+                    return Response(
+                        serializer.errors, status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                job = create_async_job(job_type, serializer.validated_data)
+                upload.job_id = job.job_id
+                upload.save(update_fields=["job_id", "updated_at"])
+                return create_job_response(job)
+            finally:
+                pdf_file.close()
+
+    except Exception as e:
+        return Response(
+            {"error": f"Error creating job: {str(e)}"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
+
+
+def finalized_upload_response(upload):
+    """Response for an upload already turned into a job"""
+    job = PDFProcessingJob.objects.filter(job_id=upload.job_id).first()
+    if job is None:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+    return create_job_response(job)
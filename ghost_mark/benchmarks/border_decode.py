@@ -0,0 +1,99 @@
+# benchmarks/border_decode.py
+"""
+Benchmark for decoding the email border stamp.
+
+Compares reading the step indents from the page's vector drawings against
+the raster fallback used for scans, on a clean bordered PDF and on an
+image-only copy of it.
+
+Run from the project directory:
+    python -m benchmarks.border_decode
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_app.utils import (  # noqa: E402
+    _read_border_steps_raster,
+    _read_border_steps_vector,
+    add_border_to_pdf,
+    email_to_number,
+)
+
+EMAIL = "john.doe@example.com"
+SCAN_DPI = 200
+REPEATS = 10
+
+
+def make_input_pdf(path):
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 120), "Border decoding benchmark", fontsize=12)
+    doc.save(path)
+    doc.close()
+
+
+def make_scan_pdf(bordered_pdf, scan_pdf):
+    """Image-only copy of the first page, as a scanner would produce"""
+    doc = fitz.open(bordered_pdf)
+    page = doc[0]
+    pix = page.get_pixmap(dpi=SCAN_DPI)
+    scan = fitz.open()
+    scan_page = scan.new_page(width=page.rect.width, height=page.rect.height)
+    scan_page.insert_image(scan_page.rect, pixmap=pix)
+    scan.save(scan_pdf)
+    scan.close()
+    doc.close()
+
+
+def best_of(reader, pdf_path):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        doc = fitz.open(pdf_path)
+        digit_pairs = reader(doc[0])
+        doc.close()
+        timings.append(time.perf_counter() - start)
+    return min(timings), digit_pairs
+
+
+def main():
+    number, _ = email_to_number(EMAIL)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_pdf = os.path.join(work_dir, "input.pdf")
+        bordered_pdf = os.path.join(work_dir, "bordered.pdf")
+        scan_pdf = os.path.join(work_dir, "scan.pdf")
+
+        make_input_pdf(input_pdf)
+        with contextlib.redirect_stdout(io.StringIO()):
+            add_border_to_pdf(input_pdf, bordered_pdf, number)
+        make_scan_pdf(bordered_pdf, scan_pdf)
+
+        print(f"{'document':>8} | {'decoder':>7} | {'time (ms)':>9} | number")
+        print("-" * 55)
+
+        for document, pdf_path in [("vector", bordered_pdf), ("scan", scan_pdf)]:
+            for name, reader in [
+                ("vector", _read_border_steps_vector),
+                ("raster", _read_border_steps_raster),
+            ]:
+                elapsed, digit_pairs = best_of(reader, pdf_path)
+                decoded = (
+                    "".join(f"{pair:02d}" for pair in digit_pairs)
+                    if digit_pairs
+                    else "not found"
+                )
+                print(f"{document:>8} | {name:>7} | {elapsed * 1000:>9.2f} | {decoded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/font_stego_decode.py
+"""
+Benchmark for font steganography decoding on text-heavy last pages.
+
+Compares the footer-clipped extraction used by
+decode_message_from_pdf_font_stego against extracting the whole last page
+with get_text("dict") and classifying every block afterwards.
+
+Run from the project directory:
+    python -m benchmarks.font_stego_decode
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_app.utils import (  # noqa: E402
+    _classify_text_area,
+    decode_message_from_pdf_font_stego,
+    encode_message_in_pdf_font_stego,
+)
+
+BODY_LINE_COUNTS = [0, 60, 240]
+REPEATS = 10
+
+
+def make_dense_pdf(path, body_lines):
+    """Single page whose body is packed with small table-like text lines"""
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 60
+    row = " | ".join(f"cell {c:03d}" for c in range(9))
+    for i in range(body_lines):
+        page.insert_text((40, y), f"{i:04d} {row}", fontsize=2.2)
+        y += 2.4
+    doc.save(path)
+    doc.close()
+
+
+def full_page_footer_spans(pdf_path):
+    """Whole-page extraction followed by block classification"""
+    doc = fitz.open(pdf_path)
+    page = doc[len(doc) - 1]
+    spans = []
+    for block in page.get_text("dict")["blocks"]:
+        if block.get("type") != 0:
+            continue
+        if _classify_text_area(fitz.Rect(block["bbox"]), page.rect) != "footer":
+            continue
+        for line in block["lines"]:
+            spans.extend(line["spans"])
+    doc.close()
+    return spans
+
+
+def best_of(func, *args):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    cover_text = "Please keep this document for your records and future reference " * 3
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f"{'body lines':>10} | {'full page (ms)':>14} | {'clipped (ms)':>12}")
+        print("-" * 44)
+
+        for body_lines in BODY_LINE_COUNTS:
+            input_pdf = os.path.join(work_dir, f"dense_{body_lines}.pdf")
+            stego_pdf = os.path.join(work_dir, f"stego_{body_lines}.pdf")
+            make_dense_pdf(input_pdf, body_lines)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                encode_message_in_pdf_font_stego(
+                    input_pdf, stego_pdf, "bench msg", cover_text
+                )
+
+            full = best_of(full_page_footer_spans, stego_pdf)
+            clipped = best_of(decode_message_from_pdf_font_stego, stego_pdf)
+            print(f"{body_lines:>10} | {full * 1000:>14.2f} | {clipped * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# benchmarks/font_stego_encode.py
+"""
+Benchmark for font steganography encoding.
+
+Compares the batched TextWriter encoder against the legacy approach of one
+page.insert_text call per glyph, reporting encoding time, the size of the
+last page's content stream and the size of the saved PDF. Cover texts fill
+a quarter, half and all of the footer of a REFERENCE_PAGE_SIZE page, with
+the longest message each can carry.
+
+Run from the project directory:
+    python -m benchmarks.font_stego_encode
+"""
+
+import contextlib
+import io
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_app.font_stego.layout import (  # noqa: E402
+    REFERENCE_PAGE_SIZE,
+    footer_line_capacity,
+)
+from pdf_app.utils import (  # noqa: E402
+    PAYLOAD_HEADER_BITS,
+    cover_text_fits_footer,
+    encode_message_in_pdf_font_stego,
+    font_size_map,
+    single_page_message_capacity,
+    string_to_binary,
+)
+
+FOOTER_FILLS = [0.25, 0.5, 1.0]
+REPEATS = 5
+
+
+def make_cover_text(length, seed=0):
+    """Build a pseudo-random cover text of roughly `length` characters"""
+    rng = random.Random(seed)
+    words = []
+    while sum(len(w) + 1 for w in words) < length:
+        words.append("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))))
+    return " ".join(words)[:length]
+
+
+def longest_fitting_cover_text(page_size=REFERENCE_PAGE_SIZE):
+    """Longest prefix of a cover text that fits in one page footer"""
+    text = make_cover_text(10000)
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if cover_text_fits_footer(text[:middle], page_size)[0]:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip()
+
+
+def make_input_pdf(path, page_size=REFERENCE_PAGE_SIZE, pages=3):
+    doc = fitz.open()
+    width, height = page_size
+    for i in range(pages):
+        page = doc.new_page(width=width, height=height)
+        page.insert_text((72, 72), f"Benchmark page {i + 1}", fontsize=12)
+    doc.save(path)
+    doc.close()
+
+
+def legacy_encode(input_pdf, output_pdf, secret_message, cover_text):
+    """Per-glyph insert_text emission, as the encoder worked before batching"""
+    binary_data = string_to_binary(secret_message)
+    doc = fitz.open(input_pdf)
+    page = doc[len(doc) - 1]
+    page_rect = page.rect
+    footer_y = page_rect.height - 60 + 18
+    current_x = 50
+    binary_index = 0
+
+    for char in cover_text:
+        if char == " ":
+            current_x += 3
+        else:
+            if binary_index < len(binary_data):
+                font_size = font_size_map[binary_data[binary_index]]
+                binary_index += 1
+            else:
+                font_size = 8.0
+            page.insert_text((current_x, footer_y), char, fontsize=font_size)
+            current_x += 4.5 * font_size / 8.0
+        if current_x > page_rect.width - 100:
+            current_x = 50
+            footer_y += 12
+
+    doc.save(output_pdf)
+    doc.close()
+
+
+def measure(encoder, input_pdf, output_pdf, secret_message, cover_text):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = encoder(input_pdf, output_pdf, secret_message, cover_text)
+        if result and not result["success"]:
+            raise RuntimeError(result["error"])
+        timings.append(time.perf_counter() - start)
+
+    doc = fitz.open(output_pdf)
+    stream_size = len(doc[len(doc) - 1].read_contents())
+    doc.close()
+
+    return min(timings), stream_size, os.path.getsize(output_pdf)
+
+
+def main():
+    width, height = REFERENCE_PAGE_SIZE
+    full_cover_text = longest_fitting_cover_text()
+    print(
+        f"{width:.0f}x{height:.0f} pt page: {footer_line_capacity(height)} footer "
+        f"lines, {len(full_cover_text)} cover chars, at most "
+        f"{single_page_message_capacity()} message bytes"
+    )
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_pdf = os.path.join(work_dir, "input.pdf")
+        output_pdf = os.path.join(work_dir, "output.pdf")
+        make_input_pdf(input_pdf)
+
+        print(
+            f"{'cover chars':>11} | {'message B':>9} | {'encoder':>10} | "
+            f"{'time (ms)':>10} | {'page stream (B)':>15} | {'file (B)':>9}"
+        )
+        print("-" * 80)
+
+        for fill in FOOTER_FILLS:
+            cover_text = full_cover_text[: int(len(full_cover_text) * fill)]
+            non_space = len(cover_text.replace(" ", ""))
+            secret_message = "x" * ((non_space - PAYLOAD_HEADER_BITS) // 8)
+
+            for name, encoder in [
+                ("legacy", legacy_encode),
+                ("batched", encode_message_in_pdf_font_stego),
+            ]:
+                elapsed, stream_size, file_size = measure(
+                    encoder, input_pdf, output_pdf, secret_message, cover_text
+                )
+                print(
+                    f"{len(cover_text):>11} | {len(secret_message):>9} | "
+                    f"{name:>10} | {elapsed * 1000:>10.1f} | "
+                    f"{stream_size:>15} | {file_size:>9}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+# benchmarks/job_list.py
+"""
+Benchmark for the job listing API on a large jobs table.
+
+Builds a throwaway test database (test_<NAME>, created and dropped by
+Django's test machinery) holding ROWS jobs spread over 30 days, then times
+keyset pages against the OFFSET paging they replace, the filtered
+listings, and the per-value counts against a single GROUP BY.
+
+PostgreSQL fills the table with INSERT ... SELECT generate_series (10M rows
+take a few minutes); other databases fall back to bulk_create, so pass a
+smaller --rows there.
+
+Run from the project directory:
+    python -m benchmarks.job_list [--rows 10000000] [--keepdb] [--explain]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ghost_mark.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.db.models import Count  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from pdf_app.job_listing import (  # noqa: E402
+    DEFAULT_JOB_LIST_FIELDS,
+    after_cursor,
+    encode_cursor,
+    filter_jobs,
+    job_counts,
+    page_jobs,
+)
+from pdf_app.models import PDFProcessingJob  # noqa: E402
+
+REPEATS = 5
+PAGE_SIZE = 50
+FILL_CHUNK = 1_000_000
+DAYS = 30
+
+JOB_TYPES = [value for value, _ in PDFProcessingJob.JOB_TYPE_CHOICES]
+
+# Share of each status (per 100 rows)
+STATUS_SHARES = [("COMPLETED", 90), ("FAILED", 5), ("PROCESSING", 3), ("PENDING", 2)]
+
+
+def fill_postgresql(rows):
+    table = PDFProcessingJob._meta.db_table
+    job_types = ",".join(f"'{job_type}'" for job_type in JOB_TYPES)
+    with connection.cursor() as cursor:
+        for start in range(0, rows, FILL_CHUNK):
+            end = min(start + FILL_CHUNK, rows)
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (
+                    job_id, job_type, status, original_filename, multi_page,
+                    shard_count, shards_completed, dedup_hit, callback_attempts,
+                    created_at
+                )
+                SELECT
+                    'bench-' || g,
+                    (ARRAY[{job_types}])[1 + g % {len(JOB_TYPES)}],
+                    CASE
+                        WHEN g % 100 < 90 THEN 'COMPLETED'
+                        WHEN g % 100 < 95 THEN 'FAILED'
+                        WHEN g % 100 < 98 THEN 'PROCESSING'
+                        ELSE 'PENDING'
+                    END,
+                    'bench.pdf', false, 0, 0, false, 0,
+                    now() - random() * interval '{DAYS} days'
+                FROM generate_series(%s, %s) AS g
+                """,
+                [start + 1, end],
+            )
+            print(f"  {end:,} rows")
+        cursor.execute(f"VACUUM ANALYZE {table}")
+
+
+def fill_generic(rows):
+    now = timezone.now()
+    statuses = [status for status, share in STATUS_SHARES for _ in range(share)]
+    for start in range(0, rows, 10_000):
+        PDFProcessingJob.objects.bulk_create(
+            [
+                PDFProcessingJob(
+                    job_id=f"bench-{i}",
+                    job_type=JOB_TYPES[i % len(JOB_TYPES)],
+                    status=statuses[i % 100],
+                    original_filename="bench.pdf",
+                )
+                for i in range(start, min(start + 10_000, rows))
+            ]
+        )
+    # created_at is auto_now_add: spread it over the days afterwards
+    pks = list(PDFProcessingJob.objects.values_list("pk", flat=True))
+    for start in range(0, len(pks), 10_000):
+        PDFProcessingJob.objects.bulk_update(
+            [
+                PDFProcessingJob(
+                    pk=pk, created_at=now - timedelta(days=random.random() * DAYS)
+                )
+                for pk in pks[start : start + 10_000]
+            ],
+            ["created_at"],
+        )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+
+
+def best_of(func):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def offset_page(offset):
+    """Paging the way the old listing would have to: ORDER BY ... OFFSET"""
+    return list(
+        PDFProcessingJob.objects.order_by("-created_at", "-id").values(
+            "id", *DEFAULT_JOB_LIST_FIELDS
+        )[offset : offset + PAGE_SIZE]
+    )
+
+
+def group_by_counts(jobs):
+    return dict(jobs.order_by().values_list("status").annotate(Count("id"))), dict(
+        jobs.order_by().values_list("job_type").annotate(Count("id"))
+    )
+
+
+def cursor_at(offset):
+    """Cursor of the row just before `offset` (found once, not timed)"""
+    if offset == 0:
+        return None
+    created_at, pk = PDFProcessingJob.objects.order_by(
+        "-created_at", "-id"
+    ).values_list("created_at", "id")[offset - 1]
+    return encode_cursor(created_at, pk)
+
+
+def run(rows, explain):
+    depth = min(1_000_000, rows // 2)
+    day_ago = timezone.now() - timedelta(days=1)
+    deep_cursor = cursor_at(depth)
+
+    scenarios = [
+        ("first page", "keyset", lambda: page_jobs(filter_jobs(), limit=PAGE_SIZE)),
+        ("first page", "offset", lambda: offset_page(0)),
+        (
+            f"page at row {depth:,}",
+            "keyset",
+            lambda: page_jobs(filter_jobs(), limit=PAGE_SIZE, cursor=deep_cursor),
+        ),
+        (f"page at row {depth:,}", "offset", lambda: offset_page(depth)),
+        (
+            "status=FAILED",
+            "keyset",
+            lambda: page_jobs(filter_jobs(statuses=["FAILED"]), limit=PAGE_SIZE),
+        ),
+        (
+            "qr_code, last 24h",
+            "keyset",
+            lambda: page_jobs(
+                filter_jobs(job_types=["qr_code"], created_after=day_ago),
+                limit=PAGE_SIZE,
+            ),
+        ),
+        (
+            "counts, last 24h",
+            "per value",
+            lambda: job_counts(filter_jobs(created_after=day_ago)),
+        ),
+        (
+            "counts, last 24h",
+            "group by",
+            lambda: group_by_counts(filter_jobs(created_after=day_ago)),
+        ),
+    ]
+
+    print(f"{'scenario':>22} | {'method':>9} | {'time (ms)':>10}")
+    print("-" * 48)
+    for scenario, method, func in scenarios:
+        elapsed = best_of(func)
+        print(f"{scenario:>22} | {method:>9} | {elapsed * 1000:>10.1f}")
+
+    if explain:
+        query = after_cursor(filter_jobs(), deep_cursor).order_by("-created_at", "-id")
+        print(f"\nPlan of the page at row {depth:,}:")
+        print(query.values("id", *DEFAULT_JOB_LIST_FIELDS)[:PAGE_SIZE].explain())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--keepdb", action="store_true", help="reuse test DB")
+    parser.add_argument("--explain", action="store_true", help="print a plan")
+    args = parser.parse_args()
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=True)
+    try:
+        existing = PDFProcessingJob.objects.count()
+        if existing != args.rows:
+            print(f"Filling {args.rows:,} jobs ({connection.vendor})")
+            PDFProcessingJob.objects.all().delete()
+            if connection.vendor == "postgresql":
+                fill_postgresql(args.rows)
+            else:
+                fill_generic(args.rows)
+        run(args.rows, args.explain)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=args.keepdb)
+
+
+if __name__ == "__main__":
+    main()
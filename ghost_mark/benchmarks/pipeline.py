@@ -0,0 +1,121 @@
+# benchmarks/pipeline.py
+"""
+Benchmark for multi-method jobs.
+
+Compares the fused pipeline (one parse, one save) against chaining the
+per-method functions, which serializes the PDF between every stage and
+round-trips the QR and font-stego stages through temp files.
+
+Run from the project directory:
+    python -m benchmarks.pipeline
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_app.pipeline.engine import ALL_METHODS, run_pipeline  # noqa: E402
+from pdf_app.utils import (  # noqa: E402
+    add_qr_code_to_pdf,
+    encode_message_in_pdf_font_stego,
+)
+from pdf_app.watermark.service import PDFWatermarkService  # noqa: E402
+
+PAGE_COUNTS = [1, 20, 100]
+REPEATS = 3
+
+PARAMS = {
+    "watermark_text": "reader@example.com",
+    "email": "reader@example.com",
+    "secret_message": "bench msg",
+    "cover_text": "Please keep this document for your records and future reference "
+    * 3,
+    "multi_page": False,
+}
+
+
+def make_pdf_content(pages):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        for line in range(40):
+            page.insert_text(
+                (72, 72 + line * 16), f"Page {i + 1} line {line + 1}", fontsize=11
+            )
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def chained(pdf_content, work_dir):
+    """Per-method chaining, as multi-method jobs worked before the pipeline"""
+    content = PDFWatermarkService.add_invisible_watermark(
+        io.BytesIO(pdf_content), PARAMS["watermark_text"]
+    ).getvalue()
+
+    for step, apply in [
+        ("qr", lambda src, dst: add_qr_code_to_pdf(src, dst, PARAMS["email"])),
+        (
+            "font",
+            lambda src, dst: encode_message_in_pdf_font_stego(
+                src, dst, PARAMS["secret_message"], PARAMS["cover_text"]
+            ),
+        ),
+    ]:
+        input_path = os.path.join(work_dir, f"{step}_input.pdf")
+        output_path = os.path.join(work_dir, f"{step}_output.pdf")
+        with open(input_path, "wb") as f:
+            f.write(content)
+        apply(input_path, output_path)
+        with open(output_path, "rb") as f:
+            content = f.read()
+
+    return content
+
+
+def fused(pdf_content, work_dir):
+    result = run_pipeline(pdf_content, ALL_METHODS, PARAMS)
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+    return result["pdf_content"]
+
+
+def best_of(func, *args):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(output)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(
+            f"{'pages':>5} | {'pipeline':>8} | {'time (ms)':>10} | {'file (B)':>9} | "
+            f"{'vs chained':>10}"
+        )
+        print("-" * 56)
+
+        for pages in PAGE_COUNTS:
+            pdf_content = make_pdf_content(pages)
+            chained_size = None
+            for name, func in [("chained", chained), ("fused", fused)]:
+                elapsed, size = best_of(func, pdf_content, work_dir)
+                chained_size = chained_size or size
+                print(
+                    f"{pages:>5} | {name:>8} | {elapsed * 1000:>10.1f} | {size:>9} | "
+                    f"{size / chained_size:>9.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# benchmarks/queue_routing.py
+"""
+Benchmark for size-aware queue routing under a mixed load.
+
+Times each kind of job of a mixed workload on a generated PDF with the
+real pipeline (mean of REPEATS runs), then replays the same seeded stream of
+arrivals (Poisson, at --load utilization of all workers) through:
+
+- one FIFO queue served by every worker (the single pdf_processing queue)
+- the fast / bulk queues of pdf_app/routing.py, served by the pools of
+  start_workers.sh (--pools sets their concurrency), each taking its own
+  queue first and the other when it is empty. As with the Redis broker's
+  "priority" queue order, a worker takes the best priority level first,
+  then the queue listed first, then the oldest job
+- the same queues with the fast pool kept for fast jobs only, to show
+  what reserving workers costs the large jobs
+
+and prints the p50 / p99 latency (queue wait + processing) per kind of job
+and overall. The replay is an event simulation driven by the measured
+processing times, so no broker or worker is needed.
+
+Run from the project directory:
+    python -m benchmarks.queue_routing [--jobs 5000] [--load 0.7] [--pools 2,6]
+"""
+
+import argparse
+import contextlib
+import heapq
+import io
+import os
+import random
+import sys
+import time
+
+import django
+import fitz  # PyMuPDF
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ghost_mark.settings")
+django.setup()
+
+from pdf_app.dedup import job_methods  # noqa: E402
+from pdf_app.models import PDFProcessingJob  # noqa: E402
+from pdf_app.pipeline.engine import run_pipeline  # noqa: E402
+from pdf_app.routing import (  # noqa: E402
+    classify_job,
+    job_priority,
+    job_queues,
+    priority_level,
+)
+
+SEED = 42
+REPEATS = 3
+
+# Kind of job -> (job type, pages, share of the jobs in %)
+JOB_MIX = {
+    "1p watermark": ("watermark", 1, 45),
+    "5p qr_code": ("qr_code", 5, 20),
+    "3p font_stego": ("font_stego", 3, 10),
+    "200p watermark": ("watermark", 200, 10),
+    "200p qr_code": ("qr_code", 200, 8),
+    "200p all_methods": ("all_methods", 200, 7),
+}
+
+PARAMS = {
+    "watermark_text": "reader@example.com",
+    "email": "reader@example.com",
+    "secret_message": "bench msg",
+    "cover_text": "Please keep this document for your records and future reference "
+    * 3,
+    "multi_page": True,
+}
+
+
+def make_pdf_content(pages):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        for line in range(40):
+            page.insert_text(
+                (72, 72 + line * 16), f"Page {i + 1} line {line + 1}", fontsize=11
+            )
+    content = doc.tobytes()
+    doc.close()
+    return content
+
+
+def measure_kinds():
+    """Processing time, queue and priority of each kind of job"""
+    kinds = {}
+    for name, (job_type, pages, share) in JOB_MIX.items():
+        content = make_pdf_content(pages)
+        job = PDFProcessingJob(job_type=job_type, selected_methods=None)
+        timings = []
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                result = run_pipeline(content, job_methods(job), PARAMS)
+            timings.append(time.perf_counter() - start)
+            if not result["success"]:
+                raise RuntimeError(result["error"])
+        kinds[name] = {
+            "seconds": sum(timings) / REPEATS,
+            "share": share,
+            "class": classify_job(job, len(content), pages),
+            # The broker only tells apart its priority steps
+            "priority": priority_level(job_priority(len(content), pages)),
+        }
+    return kinds
+
+
+def arrivals(kinds, jobs, load, workers):
+    """Seeded stream of (arrival time, kind) at `load` utilization"""
+    rng = random.Random(SEED)
+    names = list(kinds)
+    weights = [kinds[name]["share"] for name in names]
+    mean_seconds = sum(kinds[n]["seconds"] * kinds[n]["share"] for n in names) / sum(
+        weights
+    )
+    rate = load * workers / mean_seconds
+
+    now = 0.0
+    stream = []
+    for _ in range(jobs):
+        now += rng.expovariate(rate)
+        stream.append((now, rng.choices(names, weights)[0]))
+    return stream
+
+
+def routed_pools(fast, bulk, reserve_fast=False):
+    """
+    Pools of start_workers.sh: name -> (workers, queues in the order taken)
+
+    With reserve_fast the fast pool only takes fast jobs
+    """
+    queues = job_queues()
+    return {
+        "fast": (fast, [queues["fast"]] + ([] if reserve_fast else [queues["bulk"]])),
+        "bulk": (bulk, [queues["bulk"], queues["fast"]]),
+    }
+
+
+def simulate(stream, kinds, pools, route):
+    """
+    Latency of every job of the stream
+
+    Args:
+        pools: Pool name -> (workers, queues it takes jobs from, in order)
+        route: func(kind) -> (queue, priority)
+
+    Returns:
+        List of (kind, latency in seconds)
+    """
+    waiting = {queue: [] for _, queues in pools.values() for queue in queues}
+    idle = {name: workers for name, (workers, _) in pools.items()}
+    latencies = [None] * len(stream)
+
+    def take(pool, now):
+        """Start the next job a pool's idle worker would take, if any"""
+        queues = pools[pool][1]
+        heads = [
+            (waiting[queue][0][0], order, waiting[queue][0][1], queue)
+            for order, queue in enumerate(queues)
+            if waiting[queue]
+        ]
+        if not heads:
+            return False
+        _, _, arrival, queue = min(heads)
+        _, _, index = heapq.heappop(waiting[queue])
+        idle[pool] -= 1
+        finish = now + kinds[stream[index][1]]["seconds"]
+        latencies[index] = (stream[index][1], finish - arrival)
+        heapq.heappush(events, (finish, 0, pool))
+        return True
+
+    # (time, 0 = a worker of the pool finished / 1 = a job arrived, pool or
+    # job index)
+    events = [(arrival, 1, index) for index, (arrival, _) in enumerate(stream)]
+    heapq.heapify(events)
+    while events:
+        now, event, subject = heapq.heappop(events)
+        if event == 0:
+            idle[subject] += 1
+            take(subject, now)
+            continue
+
+        queue, priority = route(stream[subject][1])
+        heapq.heappush(waiting[queue], (priority, now, subject))
+        # An idle worker of the queue's own pool first, then any other
+        serving = sorted(
+            (pools[pool][1].index(queue), pool)
+            for pool in pools
+            if idle[pool] and queue in pools[pool][1]
+        )
+        for _, pool in serving:
+            if take(pool, now):
+                break
+
+    return latencies
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(kinds, results):
+    print(
+        f"{'job':>17} | {'queue':>9} | "
+        + " | ".join(f"{policy:>17}" for policy in results)
+    )
+    print(
+        f"{'':>17} | {'':>9} | " + " | ".join(f"{'p50 / p99 (s)':>17}" for _ in results)
+    )
+    print("-" * (32 + 20 * len(results)))
+
+    for name in [*kinds, "all jobs"]:
+        cells = []
+        for latencies in results.values():
+            values = [
+                latency for kind, latency in latencies if name in (kind, "all jobs")
+            ]
+            cells.append(
+                f"{percentile(values, 0.5):>8.2f}/{percentile(values, 0.99):>8.2f}"
+            )
+        queue = job_queues()[kinds[name]["class"]] if name in kinds else ""
+        print(f"{name:>17} | {queue:>9} | " + " | ".join(cells))
+
+    means = [
+        sum(latency for _, latency in latencies) / len(latencies)
+        for latencies in results.values()
+    ]
+    print(f"{'mean (s)':>17} | {'':>9} | " + " | ".join(f"{m:>17.3f}" for m in means))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--load", type=float, default=0.7, help="utilization")
+    parser.add_argument("--pools", default="2,6", help="workers of the fast,bulk pools")
+    args = parser.parse_args()
+
+    queues = job_queues()
+    sizes = list(map(int, args.pools.split(",")))
+    pools = routed_pools(*sizes)
+    workers = sum(size for size, _ in pools.values())
+
+    print("Timing each kind of job...")
+    kinds = measure_kinds()
+    for name, kind in kinds.items():
+        print(
+            f"  {name:>17}: {kind['seconds'] * 1000:>8.1f} ms -> "
+            f"{queues[kind['class']]}, priority {kind['priority']}"
+        )
+    print()
+
+    stream = arrivals(kinds, args.jobs, args.load, workers)
+
+    def route(kind):
+        return queues[kinds[kind]["class"]], kinds[kind]["priority"]
+
+    results = {
+        "single FIFO": simulate(
+            stream,
+            kinds,
+            {"all": (workers, ["pdf_processing"])},
+            lambda kind: ("pdf_processing", 0),
+        ),
+        "routed": simulate(stream, kinds, pools, route),
+        "reserved fast": simulate(
+            stream, kinds, routed_pools(*sizes, reserve_fast=True), route
+        ),
+    }
+    print(
+        f"{args.jobs} jobs, {workers} workers (fast,bulk = {args.pools}), "
+        f"{args.load:.0%} load"
+    )
+    report(kinds, results)
+
+
+if __name__ == "__main__":
+    main()
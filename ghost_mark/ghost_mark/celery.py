@@ -19,8 +19,24 @@ app.autodiscover_tasks()
 app.conf.update(
     # Task routing
     task_routes={
-        "pdf_app.tasks.process_pdf_task": {"queue": "pdf_processing"},
+        # Jobs are sent to pdf_fast / pdf_bulk with a priority
+        # when they are created (pdf_app/routing.py); this is the fallback
+        "pdf_app.tasks.process_pdf_task": {"queue": "pdf_bulk"},
+        # Shards and merges only exist for large jobs
+        "pdf_app.tasks.process_pdf_shard": {"queue": "pdf_bulk"},
+        "pdf_app.tasks.merge_pdf_shards": {"queue": "pdf_bulk"},
+        "pdf_app.tasks.deliver_job_callbacks": {"queue": "webhooks"},
         "pdf_app.tasks.cleanup_expired_jobs": {"queue": "cleanup"},
+        "pdf_app.tasks.sweep_orphan_files": {"queue": "cleanup"},
+        "pdf_app.tasks.flush_job_states": {"queue": "job_state"},
+    },
+    # Priorities on the Redis broker: one list per level, 0 served first
+    # (kombu's default priority_steps and sep, so queue keys are unchanged).
+    # The "priority" order applies to every worker: one listening on several
+    # queues drains them in the order given, so the job_state queue has its
+    # own worker (start_workers.sh)
+    broker_transport_options={
+        "queue_order_strategy": "priority",
     },
     # Task execution settings
     task_always_eager=False,  # Set to True for testing without Redis
@@ -53,5 +69,15 @@ app.conf.beat_schedule = {
         "schedule": crontab(minute="*/15"),  # Run every 15 minutes
         "options": {"queue": "cleanup"},
     },
+    "sweep-orphan-files": {
+        "task": "pdf_app.tasks.sweep_orphan_files",
+        "schedule": crontab(minute=30),  # Run every hour
+        "options": {"queue": "cleanup"},
+    },
+    "flush-job-states": {
+        "task": "pdf_app.tasks.flush_job_states",
+        "schedule": crontab(),  # Every minute, in case a queued flush was lost
+        "options": {"queue": "job_state"},
+    },
 }
 app.conf.timezone = "UTC"
@@ -81,13 +81,13 @@ WSGI_APPLICATION = "ghost_mark.wsgi.application"  # Replace with your project na
 # DATABASE CONFIGURATION
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
-        'NAME': 'ghostmark',
-        'USER': 'ghostmarkuser',
-        'PASSWORD': 'GhostPos12#',
-        'HOST': 'localhost',
-        'PORT': '5432',
+    "default": {
+        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "NAME": "ghostmark",
+        "USER": "ghostmarkuser",
+        "PASSWORD": "GhostPos12#",
+        "HOST": "localhost",
+        "PORT": "5432",
     }
 }
 
@@ -110,16 +110,91 @@ CELERY_WORKER_CONCURRENCY = 6  # Number of concurrent workers
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1  # Important for large files
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 50  # Restart workers to prevent memory leaks
 
-# Task routing (optional but recommended)
+# Task routing (optional but recommended). Jobs are sent to the fast or bulk
+# queue when they are created (pdf_app/routing.py); the routes below are the
+# fallback and the home of the shards of large jobs
 CELERY_TASK_ROUTES = {
-    "pdf_app.tasks.process_pdf_task": {"queue": "pdf_processing"},
+    "pdf_app.tasks.process_pdf_task": {"queue": "pdf_bulk"},
+    "pdf_app.tasks.process_pdf_shard": {"queue": "pdf_bulk"},
+    "pdf_app.tasks.merge_pdf_shards": {"queue": "pdf_bulk"},
+    "pdf_app.tasks.deliver_job_callbacks": {"queue": "webhooks"},
     "pdf_app.tasks.cleanup_expired_jobs": {"queue": "cleanup"},
+    "pdf_app.tasks.sweep_orphan_files": {"queue": "cleanup"},
+    "pdf_app.tasks.flush_job_states": {"queue": "job_state"},
 }
 
+# Celery priorities on the Redis broker: one list per level, 0 served first.
+# kombu's default priority_steps and sep are kept, so the Redis keys of
+# queues are unchanged (changing them strands the tasks already queued)
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "queue_order_strategy": "priority",
+}
+
+# Job classes and their queues. Jobs of up to JOB_ROUTING_FAST_MAX_PAGES
+# pages and JOB_ROUTING_FAST_MAX_BYTES bytes are "fast", larger ones "bulk".
+# Every worker pool takes both queues (start_workers.sh)
+JOB_QUEUES = {"fast": "pdf_fast", "bulk": "pdf_bulk"}
+JOB_ROUTING_FAST_MAX_PAGES = 20
+JOB_ROUTING_FAST_MAX_BYTES = 5 * 1024 * 1024  # 5MB
+
 # Task time limits
 CELERY_TASK_SOFT_TIME_LIMIT = 300  # 5 minutes
 CELERY_TASK_TIME_LIMIT = 600  # 10 minutes hard limit
 
+# Large watermark jobs are split into page-range shards of at most this
+# many pages / bytes, each processed by its own task
+PDF_SHARD_MAX_PAGES = 250
+PDF_SHARD_MAX_BYTES = 25 * 1024 * 1024  # 25MB
+
+# Live job progress is kept in Redis, written at most every
+# JOB_PROGRESS_MIN_INTERVAL seconds per worker
+JOB_PROGRESS_REDIS_URL = CELERY_BROKER_URL
+JOB_PROGRESS_MIN_INTERVAL = 0.5
+JOB_PROGRESS_TTL = 3600  # 1 hour
+
+# Job status, timings and shard counts are kept in Redis (same server as the
+# progress) and written back to the database in batches on the "job_state"
+# queue, at most once every JOB_STATE_FLUSH_INTERVAL seconds
+JOB_STATE_TTL = 3600  # 1 hour
+JOB_STATE_FLUSH_INTERVAL = 2  # seconds
+JOB_STATE_FLUSH_BATCH_SIZE = 500
+
+# Server-Sent Events status stream (/api/events/<job_id>/); needs the ASGI
+# server of restart.sh to avoid holding a worker thread per open stream
+JOB_EVENTS_TIMEOUT = 300  # Close the stream after 5 minutes; clients reconnect
+JOB_EVENTS_KEEPALIVE = 15  # Seconds between keepalive comments
+
+# Batch submissions (/api/async/batch/): limits on the uploaded ZIP and the
+# chunk size used when extracting it and streaming the result ZIP
+BATCH_MAX_FILES = 5000
+BATCH_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2GB uncompressed
+BATCH_CHUNK_SIZE = 64 * 1024
+
+# Downloads are streamed from disk with Range support. Set DOWNLOAD_OFFLOAD to
+# "nginx" (X-Accel-Redirect to a signed, expiring DOWNLOAD_ACCEL_PREFIX path;
+# see pdf_app/downloads.py for the nginx location) or "sendfile"
+# (X-Sendfile) to let the web server send the file instead
+DOWNLOAD_OFFLOAD = None
+DOWNLOAD_ACCEL_PREFIX = "/protected-media/"
+DOWNLOAD_ACCEL_SECRET = SECRET_KEY
+DOWNLOAD_ACCEL_EXPIRY = 300  # seconds
+
+# Completion webhooks (callback_url on async jobs). Deliveries run on the
+# "webhooks" queue; events for one endpoint are batched for
+# WEBHOOK_BATCH_WINDOW seconds and failed requests are retried with
+# exponential backoff (WEBHOOK_RETRY_BACKOFF doubling up to the max).
+# Callback URLs must resolve to public addresses; WEBHOOK_ALLOWED_HOSTS
+# limits them to these domains (and their subdomains) when not empty
+WEBHOOK_SIGNING_SECRET = SECRET_KEY
+WEBHOOK_TIMEOUT = 5  # seconds
+WEBHOOK_BATCH_WINDOW = 2  # seconds
+WEBHOOK_BATCH_SIZE = 50
+WEBHOOK_MAX_RETRIES = 6
+WEBHOOK_RETRY_BACKOFF = 10  # seconds
+WEBHOOK_RETRY_BACKOFF_MAX = 600  # seconds
+WEBHOOK_ALLOWED_HOSTS = []
+WEBHOOK_ALLOW_PRIVATE_HOSTS = False  # only for local receivers in development
+
 # INTERNATIONALIZATION
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
@@ -129,26 +204,33 @@ USE_TZ = True
 
 # Add for HTTPS
 SECURE_SSL_REDIRECT = True
-SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
 # STATIC FILES
 # STATIC_URL = "/static/"
 # STATIC_ROOT = BASE_DIR / "staticfiles"
 
-STATIC_URL = 'static/'
+STATIC_URL = "static/"
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
 # DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
+STATIC_ROOT = os.path.join(BASE_DIR, "static/")
 
 # MEDIA FILES
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
 # Create required directories
-MEDIA_SUBDIRS = ["temp_uploads", "processed", "watermarked"]
+MEDIA_SUBDIRS = [
+    "temp_uploads",
+    "processed",
+    "watermarked",
+    "shards",
+    "chunked_uploads",
+    "temp",
+]
 for subdir in MEDIA_SUBDIRS:
     os.makedirs(os.path.join(MEDIA_ROOT, subdir), exist_ok=True)
 
@@ -168,24 +250,24 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 CORS_ALLOW_METHODS = [
-    'DELETE',
-    'GET',
-    'OPTIONS',
-    'PATCH',
-    'POST',
-    'PUT',
+    "DELETE",
+    "GET",
+    "OPTIONS",
+    "PATCH",
+    "POST",
+    "PUT",
 ]
 
 CORS_ALLOW_HEADERS = [
-    'accept',
-    'accept-encoding',
-    'authorization',
-    'content-type',
-    'dnt',
-    'origin',
-    'user-agent',
-    'x-csrftoken',
-    'x-requested-with',
+    "accept",
+    "accept-encoding",
+    "authorization",
+    "content-type",
+    "dnt",
+    "origin",
+    "user-agent",
+    "x-csrftoken",
+    "x-requested-with",
 ]
 
 # REST FRAMEWORK SETTINGS
@@ -205,5 +287,76 @@ REST_FRAMEWORK = {
 }
 
 # FILE UPLOAD SETTINGS
-FILE_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
+# PDFs stream straight to disk (hashed and checked on the way, see
+# pdf_app/uploads.py); other uploads are kept in memory only while small.
+# Temporary files live next to the job files so they can be moved into place.
+FILE_UPLOAD_HANDLERS = [
+    "pdf_app.uploads.PDFUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+FILE_UPLOAD_TEMP_DIR = os.path.join(MEDIA_ROOT, "temp_uploads")
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2.5 * 1024 * 1024  # 2.5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 50 * 1024 * 1024  # 50MB
+PDF_UPLOAD_MAX_BYTES = 200 * 1024 * 1024  # 200MB
+PDF_UPLOAD_MAX_PAGES = 5000
+
+# Resumable chunked uploads (/api/uploads/) for files too large or links
+# too unreliable for one request
+CHUNKED_UPLOAD_MAX_BYTES = 1024 * 1024 * 1024  # 1GB per file
+CHUNKED_UPLOAD_MAX_CHUNK = 16 * 1024 * 1024  # 16MB per PATCH
+CHUNKED_UPLOAD_EXPIRY = 24 * 3600  # Unfinished uploads are removed after a day
+
+# Cleanup deletes expired rows this many at a time; scratch files nothing
+# refers to are swept once they are older than CLEANUP_ORPHAN_MAX_AGE
+CLEANUP_BATCH_SIZE = 500
+CLEANUP_ORPHAN_MAX_AGE = 6 * 3600  # seconds
+
+# Expired jobs are copied into a compact audit archive (ArchivedJob) before
+# cleanup deletes them, and kept there this many days (0 = no archive)
+JOB_ARCHIVE_DAYS = 90
+
+# Scratch space for short-lived files (pdf_app/scratch.py). Small files go
+# to the RAM-backed tier when SCRATCH_TMPFS_DIR is set (e.g.
+# "/dev/shm/ghost_mark"), everything else to MEDIA_ROOT/temp (or
+# SCRATCH_DISK_DIR when set)
+SCRATCH_TMPFS_DIR = None
+SCRATCH_TMPFS_MAX_FILE = 8 * 1024 * 1024  # 8MB
+SCRATCH_TMPFS_QUOTA = 256 * 1024 * 1024  # 256MB
+SCRATCH_JOB_QUOTA = 512 * 1024 * 1024  # 512MB per job / request
+SCRATCH_GLOBAL_QUOTA = 4 * 1024 * 1024 * 1024  # 4GB per process
+
+# Where job inputs, outputs and shards are kept (pdf_app/storage.py):
+# "local" (MEDIA_ROOT, shared by web and worker nodes) or "s3" (an
+# S3-compatible bucket; needs boto3, credentials come from the usual AWS
+# environment variables / profile / instance role)
+JOB_STORAGE_BACKEND = "local"
+JOB_STORAGE_S3_BUCKET = "ghost-mark-jobs"
+JOB_STORAGE_S3_PREFIX = ""
+JOB_STORAGE_S3_ENDPOINT_URL = None  # e.g. "http://localhost:9000" for MinIO
+JOB_STORAGE_S3_REGION = None
+JOB_STORAGE_PRESIGN_EXPIRY = 300  # seconds a download URL stays valid
+JOB_STORAGE_MULTIPART_THRESHOLD = 8 * 1024 * 1024  # multipart above 8MB
+JOB_STORAGE_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+JOB_STORAGE_TRANSFER_CONCURRENCY = 4  # parts transferred in parallel
+
+# Admission control of the job-creating endpoints (pdf_app/admission.py):
+# requests get 429 + Retry-After while the processing queue or the input
+# bytes held for unfinished jobs are above these limits (None = no limit),
+# or when a client exceeds its token bucket. Per-client limiting is off
+# (ADMISSION_CLIENT_RATE = None): behind the proxy of restart.sh every
+# REMOTE_ADDR is the proxy's, so enable it together with
+# ADMISSION_CLIENT_HEADER = "HTTP_X_FORWARDED_FOR"; the client is then the
+# entry ADMISSION_TRUSTED_PROXIES hops from the end (the one the proxy adds)
+ADMISSION_ENABLED = True
+ADMISSION_QUEUES = ["pdf_fast", "pdf_bulk"]
+ADMISSION_MAX_QUEUE_LENGTH = 500
+ADMISSION_MAX_BYTES_IN_FLIGHT = 4 * 1024 * 1024 * 1024  # 4GB
+ADMISSION_CLIENT_RATE = None  # requests per second per client
+ADMISSION_CLIENT_BURST = 20
+ADMISSION_CLIENT_HEADER = None
+ADMISSION_TRUSTED_PROXIES = 1
+ADMISSION_DRAIN_WINDOW = 300  # seconds of finished jobs behind Retry-After
+ADMISSION_RETRY_AFTER = 30  # seconds, until a drain rate has been measured
+ADMISSION_MAX_RETRY_AFTER = 600
+ADMISSION_HOLD_TTL = 3600  # seconds before a crashed request's bytes are dropped
@@ -0,0 +1,440 @@
+# pdf_app/admission.py
+"""
+Admission control for job creation.
+
+Without it a burst of submissions is accepted whatever the load: every
+upload is written to storage and queued until the disk fills and the
+queue (and with it every job's latency) keeps growing. The job-creating
+endpoints now check, before the request body is read:
+
+- the tasks waiting in the processing queues (ADMISSION_MAX_QUEUE_LENGTH),
+- the bytes in flight: inputs of queued or running jobs plus the uploads
+  being received (ADMISSION_MAX_BYTES_IN_FLIGHT),
+- a token bucket per client (ADMISSION_CLIENT_RATE requests per second,
+  bursts of up to ADMISSION_CLIENT_BURST), off unless the rate is set.
+
+A rejected request gets a Retry-After computed from how fast jobs finished
+over the last ADMISSION_DRAIN_WINDOW seconds (or from the bucket's refill
+time). Counters, buckets and rejection metrics live in Redis (the progress
+server, which is also the broker by default) so they hold across web
+processes; while Redis is unavailable every request is admitted.
+"""
+
+import math
+import time
+import uuid
+
+import redis
+from django.conf import settings
+
+from .models import PDFProcessingJob
+from .progress import _get_redis, _redis_failed
+from .routing import broker_queue_keys
+
+# Defaults used when the ADMISSION_* settings are not set
+DEFAULT_ADMISSION_QUEUES = ["pdf_fast", "pdf_bulk"]
+DEFAULT_ADMISSION_MAX_QUEUE_LENGTH = 500
+DEFAULT_ADMISSION_MAX_BYTES_IN_FLIGHT = 4 * 1024 * 1024 * 1024  # 4GB
+DEFAULT_ADMISSION_CLIENT_RATE = None  # requests per second (None = no limit)
+DEFAULT_ADMISSION_CLIENT_BURST = 20
+DEFAULT_ADMISSION_TRUSTED_PROXIES = 1
+DEFAULT_ADMISSION_DRAIN_WINDOW = 300  # seconds
+DEFAULT_ADMISSION_RETRY_AFTER = 30  # seconds, when no drain rate is known
+DEFAULT_ADMISSION_MAX_RETRY_AFTER = 600  # seconds
+DEFAULT_ADMISSION_HOLD_TTL = 3600  # seconds a request's bytes can stay held
+
+# Bytes held by requests in progress: sorted set of "<token>:<bytes>"
+# scored by start time (holds of crashed processes age out)
+HELD_KEY = "admission:held"
+# Input bytes of queued / running jobs: job_id -> bytes, plus their sum
+JOBS_KEY = "admission:jobs"
+JOB_BYTES_KEY = "admission:job_bytes"
+METRICS_KEY = "admission:metrics"
+
+REJECTION_MESSAGES = {
+    "queue": "Too many jobs are waiting to be processed.",
+    "bytes": "Too much data is waiting to be processed.",
+    "client": "Too many jobs submitted by this client.",
+}
+
+LIVE_STATUSES = ["PENDING", "PROCESSING"]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def drained_key(minute):
+    """Jobs and bytes finished during one minute (epoch minute)"""
+    return f"admission:drained:{minute}"
+
+
+def bucket_key(client_id):
+    return f"admission:bucket:{client_id}"
+
+
+def request_client_id(request):
+    """
+    Who a request is charged to: the peer address, or the address our own
+    proxies recorded in ADMISSION_CLIENT_HEADER
+
+    Each of the ADMISSION_TRUSTED_PROXIES proxies appends the address it
+    was connected from, so the client is that many entries from the end;
+    anything before them was sent by the client and can be forged.
+    """
+    remote_addr = request.META.get("REMOTE_ADDR") or "unknown"
+    header = _setting("ADMISSION_CLIENT_HEADER", None)
+    value = request.META.get(header) if header else None
+    if not value:
+        return remote_addr
+
+    hops = [hop.strip() for hop in value.split(",") if hop.strip()]
+    trusted = _setting("ADMISSION_TRUSTED_PROXIES", DEFAULT_ADMISSION_TRUSTED_PROXIES)
+    if trusted < 1 or len(hops) < trusted:
+        return remote_addr
+    return hops[-trusted]
+
+
+def request_size(request):
+    """Bytes a request brings: its body, or the announced size of an upload"""
+    sizes = []
+    for name in ("CONTENT_LENGTH", "HTTP_UPLOAD_LENGTH"):
+        try:
+            sizes.append(int(request.META.get(name) or 0))
+        except ValueError:
+            pass
+    return max(sizes, default=0)
+
+
+class Admission:
+    """
+    Outcome of admit()
+
+    reason is None for an admitted request; otherwise one of
+    REJECTION_MESSAGES with retry_after in seconds. An admitted request
+    holds its bytes until release() is called.
+    """
+
+    def __init__(self, reason=None, retry_after=0, hold=None):
+        self.reason = reason
+        self.retry_after = retry_after
+        self.hold = hold
+
+    @property
+    def admitted(self):
+        return self.reason is None
+
+    @property
+    def message(self):
+        return REJECTION_MESSAGES.get(self.reason)
+
+    def release(self):
+        if self.hold is None:
+            return
+        client = _get_redis()
+        if client is not None:
+            try:
+                client.zrem(HELD_KEY, self.hold)
+            except redis.RedisError as e:
+                _redis_failed(e)
+        self.hold = None
+
+
+def admit(client_id, size):
+    """
+    Decide whether a job-creating request may proceed
+
+    Args:
+        client_id: Who the request is charged to (see request_client_id)
+        size: Bytes the request brings (see request_size)
+
+    Returns:
+        Admission; release() it once the request is done
+    """
+    if not _setting("ADMISSION_ENABLED", True):
+        return Admission()
+    client = _get_redis()
+    if client is None:
+        return Admission()
+
+    now = time.time()
+    hold_ttl = _setting("ADMISSION_HOLD_TTL", DEFAULT_ADMISSION_HOLD_TTL)
+    queues = _setting("ADMISSION_QUEUES", DEFAULT_ADMISSION_QUEUES)
+    admission = Admission(hold=f"{uuid.uuid4().hex}:{size}")
+
+    try:
+        # Hold first, then look: two requests racing for the last bytes
+        # see each other's holds
+        pipe = client.pipeline(transaction=False)
+        pipe.zremrangebyscore(HELD_KEY, "-inf", now - hold_ttl)
+        pipe.zadd(HELD_KEY, {admission.hold: now})
+        pipe.expire(HELD_KEY, hold_ttl)
+        pipe.zrange(HELD_KEY, 0, -1)
+        pipe.get(JOB_BYTES_KEY)
+        _queue_lengths(pipe, queues)
+        results = pipe.execute()
+
+        held = sum(int(member.rsplit(":", 1)[1]) for member in results[3])
+        in_flight = held + int(results[4] or 0)
+        queue_length = sum(results[5:])
+
+        reason, retry_after = _check_load(client, queue_length, in_flight, size, now)
+        if reason is None:
+            reason, retry_after = _take_token(client, client_id, now)
+
+        if reason is None:
+            client.hincrby(METRICS_KEY, "admitted", 1)
+            return admission
+
+        admission.release()
+        admission.reason = reason
+        admission.retry_after = retry_after
+        client.hincrby(METRICS_KEY, f"rejected_{reason}", 1)
+        print(
+            f"🚦 Rejected job from {client_id} ({reason}), "
+            f"retry after {retry_after}s"
+        )
+        return admission
+
+    except redis.RedisError as e:
+        _redis_failed(e)
+        return Admission()
+
+
+def _queue_lengths(pipe, queues):
+    """Queue LLENs on a pipeline, one per queue and priority level"""
+    for queue in queues:
+        for key in broker_queue_keys(queue):
+            pipe.llen(key)
+
+
+def _check_load(client, queue_length, in_flight, size, now):
+    """(reason, retry_after) if the queues or bytes in flight are full"""
+    max_queue = _setting(
+        "ADMISSION_MAX_QUEUE_LENGTH", DEFAULT_ADMISSION_MAX_QUEUE_LENGTH
+    )
+    max_bytes = _setting(
+        "ADMISSION_MAX_BYTES_IN_FLIGHT", DEFAULT_ADMISSION_MAX_BYTES_IN_FLIGHT
+    )
+
+    if max_queue and queue_length >= max_queue:
+        jobs_per_second, _ = drain_rates(client, now)
+        excess = queue_length - max_queue + 1
+        return "queue", _retry_after(excess, jobs_per_second)
+
+    # A request larger than the limit still gets in when nothing else is
+    # in flight
+    if max_bytes and in_flight > max_bytes and in_flight > size:
+        _, bytes_per_second = drain_rates(client, now)
+        excess = in_flight - max_bytes
+        return "bytes", _retry_after(excess, bytes_per_second)
+
+    return None, 0
+
+
+def _take_token(client, client_id, now):
+    """Take a token from the client's bucket: (reason, retry_after)"""
+    rate = _setting("ADMISSION_CLIENT_RATE", DEFAULT_ADMISSION_CLIENT_RATE)
+    burst = _setting("ADMISSION_CLIENT_BURST", DEFAULT_ADMISSION_CLIENT_BURST)
+    if not rate:
+        return None, 0
+    key = bucket_key(client_id)
+
+    def take(pipe):
+        tokens, stamp = pipe.hmget(key, "tokens", "stamp")
+        if tokens is None:
+            tokens = burst
+        else:
+            tokens = min(burst, float(tokens) + max(0.0, now - float(stamp)) * rate)
+        allowed = tokens >= 1
+        pipe.multi()
+        pipe.hset(
+            key, mapping={"tokens": tokens - 1 if allowed else tokens, "stamp": now}
+        )
+        pipe.expire(key, math.ceil(burst / rate) + 60)
+        return allowed, tokens
+
+    allowed, tokens = client.transaction(take, key, value_from_callable=True)
+    if allowed:
+        return None, 0
+    return "client", _retry_after(1 - tokens, rate)
+
+
+def _retry_after(excess, rate):
+    """Seconds until `excess` has drained at `rate` per second (clamped)"""
+    if rate > 0:
+        seconds = math.ceil(excess / rate)
+    else:
+        seconds = _setting("ADMISSION_RETRY_AFTER", DEFAULT_ADMISSION_RETRY_AFTER)
+    return max(
+        1,
+        min(
+            seconds,
+            _setting("ADMISSION_MAX_RETRY_AFTER", DEFAULT_ADMISSION_MAX_RETRY_AFTER),
+        ),
+    )
+
+
+def drain_rates(client, now=None):
+    """
+    Jobs and input bytes finished per second over the drain window
+
+    Raises:
+        redis.RedisError
+    """
+    now = now or time.time()
+    window = _setting("ADMISSION_DRAIN_WINDOW", DEFAULT_ADMISSION_DRAIN_WINDOW)
+    minutes = max(1, math.ceil(window / 60))
+    current = int(now // 60)
+
+    pipe = client.pipeline(transaction=False)
+    for minute in range(current - minutes + 1, current + 1):
+        pipe.hgetall(drained_key(minute))
+    counts = pipe.execute()
+
+    # At least a second, so the start of a minute does not divide by zero
+    elapsed = max(1.0, (minutes - 1) * 60 + now % 60)
+    jobs = sum(int(count.get("jobs", 0)) for count in counts)
+    size = sum(int(count.get("bytes", 0)) for count in counts)
+    return jobs / elapsed, size / elapsed
+
+
+def track_job_bytes(sizes):
+    """
+    Count the inputs of queued jobs as in flight (call before queuing)
+
+    Args:
+        sizes: Dict of job_id -> input bytes
+    """
+    client = _get_redis()
+    if client is None or not sizes:
+        return
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.hset(JOBS_KEY, mapping=sizes)
+        pipe.incrby(JOB_BYTES_KEY, sum(sizes.values()))
+        pipe.execute()
+    except redis.RedisError as e:
+        _redis_failed(e)
+
+
+def release_job_bytes(job_id):
+    """Stop counting a finished job's input and record it as drained"""
+    client = _get_redis()
+    if client is None:
+        return
+
+    try:
+        size = client.hget(JOBS_KEY, job_id)
+        # Only the caller whose HDEL removed the entry gives the bytes back
+        if size is None or not client.hdel(JOBS_KEY, job_id):
+            return
+
+        key = drained_key(int(time.time() // 60))
+        window = _setting("ADMISSION_DRAIN_WINDOW", DEFAULT_ADMISSION_DRAIN_WINDOW)
+        pipe = client.pipeline(transaction=False)
+        pipe.decrby(JOB_BYTES_KEY, int(size))
+        pipe.hincrby(key, "jobs", 1)
+        pipe.hincrby(key, "bytes", int(size))
+        pipe.expire(key, window + 120)
+        pipe.execute()
+    except redis.RedisError as e:
+        _redis_failed(e)
+
+
+def reconcile_jobs_in_flight():
+    """
+    Drop jobs that finished or were deleted without being released
+    (worker killed, Redis briefly unavailable) and recount the bytes
+
+    Returns:
+        Number of jobs dropped
+    """
+    client = _get_redis()
+    if client is None:
+        return 0
+
+    try:
+        tracked = client.hkeys(JOBS_KEY)
+        live = set(
+            PDFProcessingJob.objects.filter(
+                job_id__in=tracked, status__in=LIVE_STATUSES
+            ).values_list("job_id", flat=True)
+        )
+        stale = [job_id for job_id in tracked if job_id not in live]
+        if stale:
+            client.hdel(JOBS_KEY, *stale)
+
+        def recount(pipe):
+            total = sum(int(size) for size in pipe.hvals(JOBS_KEY))
+            pipe.multi()
+            pipe.set(JOB_BYTES_KEY, total)
+
+        client.transaction(recount, JOBS_KEY)
+        return len(stale)
+    except redis.RedisError as e:
+        _redis_failed(e)
+        return 0
+
+
+def admission_stats():
+    """Current load against the thresholds, drain rates and decisions so far"""
+    stats = {
+        "enabled": _setting("ADMISSION_ENABLED", True),
+        "max_queue_length": _setting(
+            "ADMISSION_MAX_QUEUE_LENGTH", DEFAULT_ADMISSION_MAX_QUEUE_LENGTH
+        ),
+        "max_bytes_in_flight": _setting(
+            "ADMISSION_MAX_BYTES_IN_FLIGHT", DEFAULT_ADMISSION_MAX_BYTES_IN_FLIGHT
+        ),
+        "client_rate": _setting("ADMISSION_CLIENT_RATE", DEFAULT_ADMISSION_CLIENT_RATE),
+        "client_burst": _setting(
+            "ADMISSION_CLIENT_BURST", DEFAULT_ADMISSION_CLIENT_BURST
+        ),
+        "redis_available": False,
+    }
+
+    client = _get_redis()
+    if client is None:
+        return stats
+
+    queues = _setting("ADMISSION_QUEUES", DEFAULT_ADMISSION_QUEUES)
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.zrange(HELD_KEY, 0, -1)
+        pipe.get(JOB_BYTES_KEY)
+        pipe.hlen(JOBS_KEY)
+        pipe.hgetall(METRICS_KEY)
+        _queue_lengths(pipe, queues)
+        results = pipe.execute()
+        jobs_per_second, bytes_per_second = drain_rates(client)
+    except redis.RedisError as e:
+        _redis_failed(e)
+        return stats
+
+    held = sum(int(member.rsplit(":", 1)[1]) for member in results[0])
+    lengths = iter(results[4:])
+    metrics = {name: int(value) for name, value in results[3].items()}
+    stats.update(
+        {
+            "redis_available": True,
+            "queue_length": {
+                queue: sum(next(lengths) for _ in broker_queue_keys(queue))
+                for queue in queues
+            },
+            "bytes_in_flight": held + int(results[1] or 0),
+            "requests_in_progress": len(results[0]),
+            "jobs_in_flight": results[2],
+            "drain": {
+                "jobs_per_second": round(jobs_per_second, 3),
+                "bytes_per_second": round(bytes_per_second),
+            },
+            "admitted": metrics.get("admitted", 0),
+            "rejected": {
+                reason: metrics.get(f"rejected_{reason}", 0)
+                for reason in REJECTION_MESSAGES
+            },
+        }
+    )
+    return stats
@@ -0,0 +1,136 @@
+# pdf_app/archive.py
+"""
+Audit archive of expired jobs.
+
+PDFProcessingJob is the hot table: it only holds jobs that are queued,
+running or still downloadable, so job_status, the workers and cleanup
+work on a small table however long the deployment runs. When cleanup
+deletes an expired job it first copies it into ArchivedJob, where it is
+kept for JOB_ARCHIVE_DAYS days (0 turns the archive off).
+
+Archived rows are compact: the method parameters, error and webhook
+delivery details go into one JSON blob with only the values that were
+set. The secret message and cover text are not kept; the archive records
+their length and the secret's SHA-256, so a message can be checked
+against the record without being stored for months.
+"""
+
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ArchivedJob, PDFProcessingJob
+
+DEFAULT_JOB_ARCHIVE_DAYS = 90
+
+# Columns read from the hot table for each archived job
+ARCHIVE_COLUMNS = [
+    "job_id",
+    "job_type",
+    "status",
+    "original_filename",
+    "batch__batch_id",
+    "selected_methods",
+    "watermark_text",
+    "email",
+    "secret_message",
+    "cover_text",
+    "multi_page",
+    "callback_url",
+    "callback_status",
+    "callback_attempts",
+    "error_message",
+    "content_hash",
+    "dedup_hit",
+    "shard_count",
+    "processing_time",
+    "created_at",
+    "started_at",
+    "completed_at",
+]
+
+# Columns copied into params as they are (when set)
+PARAM_COLUMNS = [
+    "watermark_text",
+    "email",
+    "multi_page",
+    "callback_url",
+    "callback_status",
+    "callback_attempts",
+    "error_message",
+    "content_hash",
+    "dedup_hit",
+    "shard_count",
+]
+
+
+def archive_days():
+    return getattr(settings, "JOB_ARCHIVE_DAYS", DEFAULT_JOB_ARCHIVE_DAYS)
+
+
+def archived_job(values):
+    """ArchivedJob (unsaved) from a hot-table row read with ARCHIVE_COLUMNS"""
+    params = {name: values[name] for name in PARAM_COLUMNS if values[name]}
+    if values["selected_methods"]:
+        params["methods"] = values["selected_methods"].split(",")
+    if values["secret_message"]:
+        params["secret_message_length"] = len(values["secret_message"])
+        params["secret_message_sha256"] = hashlib.sha256(
+            values["secret_message"].encode()
+        ).hexdigest()
+    if values["cover_text"]:
+        params["cover_text_length"] = len(values["cover_text"])
+    if values["started_at"]:
+        params["started_at"] = values["started_at"].isoformat()
+
+    return ArchivedJob(
+        job_id=values["job_id"],
+        job_type=values["job_type"],
+        status=values["status"],
+        original_filename=values["original_filename"],
+        batch_id=values["batch__batch_id"],
+        params=params,
+        processing_time=values["processing_time"],
+        created_at=values["created_at"],
+        completed_at=values["completed_at"],
+    )
+
+
+def archive_jobs(pks):
+    """
+    Copy jobs into the archive (before cleanup deletes them)
+
+    Jobs archived by an earlier, interrupted run are skipped.
+
+    Returns:
+        Number of jobs copied
+    """
+    if not archive_days() or not pks:
+        return 0
+
+    rows = PDFProcessingJob.objects.filter(pk__in=pks).values(*ARCHIVE_COLUMNS)
+    archived = [archived_job(values) for values in rows]
+    ArchivedJob.objects.bulk_create(archived, ignore_conflicts=True)
+    return len(archived)
+
+
+def purge_archive(batch_size):
+    """
+    Delete archived jobs older than JOB_ARCHIVE_DAYS, a batch at a time
+
+    Returns:
+        Number of archived jobs deleted
+    """
+    days = archive_days()
+    expired = ArchivedJob.objects.all()
+    if days:
+        expired = expired.filter(created_at__lt=timezone.now() - timedelta(days=days))
+
+    deleted = 0
+    while True:
+        pks = list(expired.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += ArchivedJob.objects.filter(pk__in=pks).delete()[0]
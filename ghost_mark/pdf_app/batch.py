@@ -0,0 +1,214 @@
+# pdf_app/batch.py
+"""
+Batch submission helpers: reading PDFs out of an uploaded ZIP archive and
+streaming finished outputs back as a ZIP built on the fly.
+
+Archive members are streamed into job storage one at a time and the
+download ZIP is written through a small buffer that is drained after every
+chunk, so neither direction holds a whole archive in memory.
+"""
+
+import json
+import os
+import posixpath
+import time
+import zipfile
+
+from django.conf import settings
+
+# Defaults used when the BATCH_* settings are not set
+DEFAULT_BATCH_MAX_FILES = 5000
+DEFAULT_BATCH_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2GB uncompressed
+DEFAULT_BATCH_CHUNK_SIZE = 64 * 1024
+
+# Optional per-file parameters file inside the archive
+MANIFEST_NAME = "manifest.json"
+
+
+class BatchArchiveError(Exception):
+    """The uploaded archive cannot be used for a batch"""
+
+
+def archive_member_name(member):
+    """
+    Safe relative name of a PDF in the archive, or None to skip the member
+
+    Directories, non-PDF files, macOS resource forks and names escaping the
+    archive root are skipped.
+    """
+    if member.is_dir():
+        return None
+
+    name = posixpath.normpath(member.filename.replace("\\", "/")).lstrip("/")
+    if name.startswith("..") or name.startswith("__MACOSX/"):
+        return None
+    if not name.lower().endswith(".pdf"):
+        return None
+    return name[:255]
+
+
+def read_archive_manifest(archive):
+    """
+    Per-file parameters from manifest.json in the archive
+
+    Returns:
+        Dict of archive name -> parameter dict (empty without a manifest)
+    """
+    try:
+        member = archive.getinfo(MANIFEST_NAME)
+    except KeyError:
+        return {}
+
+    with archive.open(member) as f:
+        try:
+            return parse_manifest(json.load(f))
+        except ValueError as e:
+            raise BatchArchiveError(f"Invalid {MANIFEST_NAME}: {e}")
+
+
+def parse_manifest(manifest):
+    """
+    Normalize a manifest to {archive name: params}
+
+    Accepts either a list of objects with a "filename" key or an object
+    mapping file names to parameter objects.
+    """
+    if isinstance(manifest, dict):
+        entries = [{"filename": name, **params} for name, params in manifest.items()]
+    elif isinstance(manifest, list):
+        entries = manifest
+    else:
+        raise ValueError("manifest must be a list or an object")
+
+    files = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("filename"):
+            raise ValueError("every manifest entry needs a filename")
+        params = dict(entry)
+        name = posixpath.normpath(params.pop("filename")).lstrip("/")
+        files[name] = params
+    return files
+
+
+def open_batch_archive(uploaded_file):
+    """
+    Open an uploaded ZIP and list the PDFs it contains
+
+    Returns:
+        (ZipFile, list of (ZipInfo, archive name)) tuple
+
+    Raises:
+        BatchArchiveError: Not a ZIP, no PDFs, or over the file/size limits
+    """
+    max_files = getattr(settings, "BATCH_MAX_FILES", DEFAULT_BATCH_MAX_FILES)
+    max_bytes = getattr(settings, "BATCH_MAX_BYTES", DEFAULT_BATCH_MAX_BYTES)
+
+    try:
+        archive = zipfile.ZipFile(uploaded_file)
+    except zipfile.BadZipFile:
+        raise BatchArchiveError("Archive is not a valid ZIP file")
+
+    members = []
+    total_size = 0
+    for member in archive.infolist():
+        name = archive_member_name(member)
+        if name is None:
+            continue
+        members.append((member, name))
+        total_size += member.file_size
+
+    if not members:
+        raise BatchArchiveError("Archive contains no PDF files")
+    if len(members) > max_files:
+        raise BatchArchiveError(
+            f"Archive has {len(members)} PDFs, the limit is {max_files}"
+        )
+    if total_size > max_bytes:
+        raise BatchArchiveError(
+            f"Archive expands to {total_size} bytes, the limit is {max_bytes}"
+        )
+
+    return archive, members
+
+
+def extract_archive_member(archive, member, storage, key):
+    """
+    Stream one archive member into job storage
+
+    Returns:
+        Hex SHA-256 of the member's bytes
+    """
+    with archive.open(member) as source:
+        return storage.save(key, source)
+
+
+class _ZipStreamBuffer:
+    """Write-only file object the streaming ZipFile writes into"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(files, storage):
+    """
+    Generate a ZIP archive chunk by chunk
+
+    Args:
+        files: Iterable of (archive name, storage key); names repeated
+            within the archive get a numeric suffix
+        storage: Job storage the files are read from
+
+    Yields:
+        Bytes of the archive, roughly one file chunk at a time
+    """
+    chunk_size = getattr(settings, "BATCH_CHUNK_SIZE", DEFAULT_BATCH_CHUNK_SIZE)
+    buffer = _ZipStreamBuffer()
+    used_names = set()
+
+    # PDFs are compressed already, so entries are stored as they are
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for name, key in files:
+            name = unique_archive_name(name, used_names)
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_STORED
+            info.file_size = storage.size(key)  # decides whether ZIP64 is needed
+
+            with storage.open(key) as source, archive.open(info, "w") as target:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    yield buffer.drain()
+            yield buffer.drain()
+
+    # Central directory, written when the archive is closed
+    yield buffer.drain()
+
+
+def unique_archive_name(name, used_names):
+    root, ext = os.path.splitext(name)
+    candidate = name
+    counter = 1
+    while candidate in used_names:
+        candidate = f"{root}_{counter}{ext}"
+        counter += 1
+    used_names.add(candidate)
+    return candidate
@@ -0,0 +1,208 @@
+# pdf_app/chunked_uploads.py
+"""
+Resumable, tus-style chunked uploads.
+
+A client creates an upload announcing its total size, PATCHes the bytes in
+chunks at the offset the server reports, and after an interruption asks
+for the current offset (HEAD) and carries on from there. Chunks are
+appended to a scratch file and each one is checksummed; a client-supplied
+Upload-Checksum (tus checksum extension, e.g. "sha256 <base64>") is
+verified before the chunk is kept. A complete upload is finalized into an
+ordinary async job.
+"""
+
+import base64
+import binascii
+import hashlib
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+
+from .dedup import HASH_CHUNK_SIZE
+from .models import ChunkedUpload
+
+# Defaults used when the CHUNKED_UPLOAD_* settings are not set
+DEFAULT_CHUNKED_UPLOAD_MAX_BYTES = 1024 * 1024 * 1024  # 1GB per file
+DEFAULT_CHUNKED_UPLOAD_MAX_CHUNK = 16 * 1024 * 1024  # 16MB per PATCH
+DEFAULT_CHUNKED_UPLOAD_EXPIRY = 24 * 3600  # seconds an unfinished upload is kept
+
+TUS_VERSION = "1.0.0"
+CHECKSUM_ALGORITHMS = ["sha256", "sha1", "md5"]
+
+
+class ChunkError(Exception):
+    """A chunk was refused; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def chunked_upload_dir():
+    upload_dir = os.path.join(settings.MEDIA_ROOT, "chunked_uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    return upload_dir
+
+
+def parse_upload_metadata(header):
+    """
+    Decode a tus Upload-Metadata header ("key base64value,key2 ...")
+
+    Returns:
+        Dict of key -> decoded string
+    """
+    metadata = {}
+    for pair in (header or "").split(","):
+        parts = pair.strip().split(" ", 1)
+        if not parts[0]:
+            continue
+        try:
+            value = base64.b64decode(parts[1]).decode() if len(parts) == 2 else ""
+        except (binascii.Error, UnicodeDecodeError):
+            value = ""
+        metadata[parts[0]] = value
+    return metadata
+
+
+def create_chunked_upload(filename, upload_length):
+    """Start a new upload with an empty scratch file"""
+    upload_id = str(uuid.uuid4())
+    scratch_path = os.path.join(chunked_upload_dir(), f"{upload_id}.part")
+    open(scratch_path, "wb").close()
+
+    return ChunkedUpload.objects.create(
+        upload_id=upload_id,
+        filename=os.path.basename(filename)[:255],
+        upload_length=upload_length,
+        scratch_path=scratch_path,
+    )
+
+
+def parse_checksum_header(header):
+    """(algorithm, raw digest) from an Upload-Checksum header, or None"""
+    if not header:
+        return None
+
+    parts = header.strip().split(" ", 1)
+    if len(parts) != 2 or parts[0].lower() not in CHECKSUM_ALGORITHMS:
+        raise ChunkError(f"Unsupported Upload-Checksum: {header}", 400)
+    try:
+        return parts[0].lower(), base64.b64decode(parts[1])
+    except binascii.Error:
+        raise ChunkError("Upload-Checksum digest is not valid base64", 400)
+
+
+def append_chunk(upload_id, offset, stream, content_length, checksum_header=None):
+    """
+    Append one chunk to an upload
+
+    The chunk is written after the current end of the scratch file and only
+    becomes part of the upload (offset moved) once its checksum matches.
+
+    Args:
+        upload_id: Upload to append to
+        offset: Upload-Offset sent by the client (must equal ours)
+        stream: Request body stream
+        content_length: Chunk size in bytes
+        checksum_header: Optional Upload-Checksum header value
+
+    Returns:
+        The updated ChunkedUpload
+
+    Raises:
+        ChunkError: Offset conflict (409), chunk too large or past the
+            announced length (413), checksum mismatch (460)
+    """
+    max_chunk = getattr(
+        settings, "CHUNKED_UPLOAD_MAX_CHUNK", DEFAULT_CHUNKED_UPLOAD_MAX_CHUNK
+    )
+    expected = parse_checksum_header(checksum_header)
+
+    with transaction.atomic():
+        upload = ChunkedUpload.objects.select_for_update().get(upload_id=upload_id)
+
+        if upload.job_id:
+            raise ChunkError("Upload is already finalized", 409)
+        if offset != upload.upload_offset:
+            raise ChunkError(
+                f"Upload-Offset {offset} does not match {upload.upload_offset}", 409
+            )
+        if content_length > max_chunk:
+            raise ChunkError(f"Chunks are limited to {max_chunk} bytes", 413)
+        if upload.upload_offset + content_length > upload.upload_length:
+            raise ChunkError("Chunk goes past the announced Upload-Length", 413)
+
+        sha256 = hashlib.sha256()
+        check = hashlib.new(expected[0]) if expected else None
+        received = 0
+
+        with open(upload.scratch_path, "r+b") as f:
+            # Drop any partial chunk left by an interrupted request
+            f.truncate(upload.upload_offset)
+            f.seek(upload.upload_offset)
+
+            while received < content_length:
+                data = stream.read(min(HASH_CHUNK_SIZE, content_length - received))
+                if not data:
+                    break
+                f.write(data)
+                sha256.update(data)
+                if check:
+                    check.update(data)
+                received += len(data)
+
+            if check and check.digest() != expected[1]:
+                f.truncate(upload.upload_offset)
+                raise ChunkError("Chunk checksum mismatch", 460)
+
+        upload.chunk_checksums.append(
+            {
+                "offset": upload.upload_offset,
+                "size": received,
+                "sha256": sha256.hexdigest(),
+            }
+        )
+        upload.upload_offset += received
+        upload.save(update_fields=["upload_offset", "chunk_checksums", "updated_at"])
+
+    return upload
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AssembledUpload(UploadedFile):
+    """
+    A finished chunked upload, passed to the async endpoints as pdf_file
+
+    Like the streamed uploads it carries its SHA-256 and a temporary file
+    path, so save_uploaded_file moves it into place instead of copying it.
+    """
+
+    def __init__(self, upload):
+        super().__init__(
+            open(upload.scratch_path, "rb"),
+            name=upload.filename,
+            content_type="application/pdf",
+            size=upload.upload_length,
+        )
+        self.scratch_path = upload.scratch_path
+        self.sha256 = file_sha256(upload.scratch_path)
+
+    def temporary_file_path(self):
+        return self.scratch_path
+
+
+def delete_chunked_upload(upload):
+    """Remove an upload and its scratch file"""
+    if upload.scratch_path and os.path.exists(upload.scratch_path):
+        os.remove(upload.scratch_path)
+    upload.delete()
@@ -0,0 +1,222 @@
+# pdf_app/cleanup.py
+"""
+Bulk cleanup of expired jobs and scratch files.
+
+Expired rows are handled in bounded batches: each batch reads just the
+columns it needs with values_list, removes the files and then deletes all
+its rows with a single DELETE. Job files are deleted through the job
+storage in one call per batch (one DeleteObjects request per 1000 keys on
+S3), and local files without a separate existence check (a file that is
+already gone is simply skipped).
+
+The orphan sweeper walks the scratch directories with os.scandir and
+deletes files older than CLEANUP_ORPHAN_MAX_AGE that no job, shared output
+or chunked upload refers to: temp files the synchronous views leave in
+MEDIA_ROOT, interrupted uploads, shards of crashed tasks.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .archive import archive_jobs
+from .dedup import release_processed_outputs
+from .job_state import forget_job_states
+from .models import ChunkedUpload, PDFProcessingJob, ProcessedOutput
+from .pipeline.sharding import shard_files
+from .storage import get_job_storage
+
+# Defaults used when the CLEANUP_* settings are not set
+DEFAULT_CLEANUP_BATCH_SIZE = 500
+DEFAULT_ORPHAN_MAX_AGE = 6 * 3600  # seconds before an unreferenced file goes
+
+# Directories under MEDIA_ROOT holding nothing but scratch files
+SCRATCH_DIRS = ["temp_uploads", "temp", "processed", "shards", "chunked_uploads"]
+
+# Files the synchronous views write directly into MEDIA_ROOT
+MEDIA_ROOT_SCRATCH_PREFIXES = ("temp_", "border_")
+
+
+def cleanup_batch_size():
+    return getattr(settings, "CLEANUP_BATCH_SIZE", DEFAULT_CLEANUP_BATCH_SIZE)
+
+
+def iter_batches(queryset, fields, batch_size=None):
+    """
+    Rows of a queryset as values_list tuples, a bounded batch at a time
+
+    Batches are read by primary key (pk is always the first column), so
+    rows deleted while iterating do not shift later batches.
+    """
+    batch_size = batch_size or cleanup_batch_size()
+    last_pk = None
+    while True:
+        batch = queryset.order_by("pk")
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        rows = list(batch.values_list("pk", *fields)[:batch_size])
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        yield rows
+
+
+def remove_files(paths):
+    """
+    Delete files, ignoring the ones already gone
+
+    Returns:
+        Number of files removed
+    """
+    removed = 0
+    for path in paths:
+        if not path:
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing file {path}: {e}")
+    return removed
+
+
+def scan_files(directory):
+    """Regular files in a directory (empty if it does not exist)"""
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    yield entry
+    except FileNotFoundError:
+        return
+
+
+def delete_jobs(queryset, batch_size=None):
+    """
+    Delete jobs and their files in batches
+
+    Outputs shared through deduplication are only removed with their last
+    job. Each job is copied into the audit archive before its row goes.
+
+    Returns:
+        (jobs deleted, files removed)
+    """
+    storage = get_job_storage()
+    jobs_deleted = files_removed = 0
+    fields = ["job_id", "input_file_path", "output_file_path", "dedup_key"]
+
+    for rows in iter_batches(queryset, fields + ["shard_count"], batch_size):
+        kept = release_processed_outputs((row[4], row[3]) for row in rows)
+        keys = [row[2] for row in rows]
+        keys += [row[3] for row in rows if row[3] not in kept]
+        # Shards normally go with the merge; these are left by failed jobs
+        for row in rows:
+            keys += shard_files(row[1], row[5])
+        files_removed += storage.delete_many(keys)
+
+        pks = [row[0] for row in rows]
+        archive_jobs(pks)
+        PDFProcessingJob.objects.filter(pk__in=pks).delete()
+        forget_job_states([row[1] for row in rows])
+        jobs_deleted += len(rows)
+
+    return jobs_deleted, files_removed
+
+
+def delete_chunked_uploads(queryset, batch_size=None):
+    """
+    Delete chunked uploads and their scratch files in batches
+
+    Returns:
+        (uploads deleted, files removed)
+    """
+    uploads_deleted = files_removed = 0
+    for rows in iter_batches(queryset, ["scratch_path"], batch_size):
+        files_removed += remove_files(row[1] for row in rows)
+        ChunkedUpload.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        uploads_deleted += len(rows)
+    return uploads_deleted, files_removed
+
+
+def referenced_paths(paths):
+    """
+    The paths among `paths` that a job, output or upload still uses
+
+    Rows refer to local job files by storage key (the path below
+    MEDIA_ROOT) or, for older rows, by absolute path; both are matched.
+    """
+    names = {}
+    for path in paths:
+        names[path] = path
+        key = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, "/")
+        names[key] = path
+
+    values = list(names)
+    batch_size = cleanup_batch_size()
+    referenced = set()
+
+    for i in range(0, len(values), batch_size):
+        chunk = values[i : i + batch_size]
+        for model, field in [
+            (PDFProcessingJob, "input_file_path"),
+            (PDFProcessingJob, "output_file_path"),
+            (ProcessedOutput, "output_file_path"),
+            (ChunkedUpload, "scratch_path"),
+        ]:
+            referenced.update(
+                names[value]
+                for value in model.objects.filter(
+                    **{f"{field}__in": chunk}
+                ).values_list(field, flat=True)
+            )
+    return referenced
+
+
+def sweep_scratch_files(max_age=None):
+    """
+    Delete unreferenced scratch files older than max_age seconds
+
+    Returns:
+        Dict with the number of files and bytes removed
+    """
+    if max_age is None:
+        max_age = getattr(settings, "CLEANUP_ORPHAN_MAX_AGE", DEFAULT_ORPHAN_MAX_AGE)
+    cutoff = time.time() - max_age
+
+    locations = [(settings.MEDIA_ROOT, MEDIA_ROOT_SCRATCH_PREFIXES)]
+    locations += [(os.path.join(settings.MEDIA_ROOT, d), None) for d in SCRATCH_DIRS]
+
+    candidates = {}
+    for directory, prefixes in locations:
+        for entry in scan_files(directory):
+            if prefixes and not entry.name.startswith(prefixes):
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime < cutoff:
+                candidates[os.path.join(directory, entry.name)] = stat.st_size
+
+    orphans = set(candidates) - referenced_paths(candidates)
+    removed = freed = 0
+    for path in orphans:
+        if remove_files([path]):
+            removed += 1
+            freed += candidates[path]
+
+    return {"files": removed, "bytes": freed}
+
+
+@contextmanager
+def timed(durations, name):
+    """Record the wall-clock seconds of a cleanup phase in durations[name]"""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        durations[name] = round(time.monotonic() - start, 3)
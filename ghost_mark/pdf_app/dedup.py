@@ -0,0 +1,201 @@
+# pdf_app/dedup.py
+"""
+Content-addressed deduplication of processing jobs.
+
+A job's dedup key is a hash of its input bytes (hashed while the upload is
+saved), the methods it runs and the parameters those methods use. The first
+job to finish with a key registers its output as a ProcessedOutput; later
+jobs with the same key are completed straight away with that file. Outputs
+are reference counted: cleanup only deletes the file once the last job
+using it has expired.
+"""
+
+import hashlib
+import json
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import PDFProcessingJob, ProcessedOutput
+from .pipeline.engine import ALL_METHODS, PIPELINE_STAGES
+from .storage import get_job_storage
+
+# Bump when processing output changes, so old outputs stop matching
+DEDUP_KEY_VERSION = 1
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def job_methods(job):
+    if job.job_type == "all_methods":
+        return list(ALL_METHODS)
+    if job.job_type == "selected_methods":
+        return [m.strip() for m in (job.selected_methods or "").split(",")]
+    return [job.job_type]
+
+
+def job_dedup_key(job):
+    """
+    Canonical key of what a job produces, or None without an input hash
+
+    Only parameters read by the job's methods are part of the key, so an
+    unused field does not prevent a match.
+    """
+    if not job.content_hash:
+        return None
+
+    methods = job_methods(job)
+    param_names = set()
+    for method in methods:
+        stage = PIPELINE_STAGES.get(method)
+        if stage:
+            param_names.update(stage["requires"])
+    if "font_stego" in methods:
+        param_names.add("multi_page")
+
+    canonical = json.dumps(
+        {
+            "version": DEDUP_KEY_VERSION,
+            "content": job.content_hash,
+            "job_type": job.job_type,
+            "methods": methods,
+            "params": {name: getattr(job, name) for name in sorted(param_names)},
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def reuse_processed_output(job):
+    """
+    Complete a new job from an identical job's output, if one is kept
+
+    Sets the job's dedup key either way.
+
+    Returns:
+        True if the job was completed from an existing output
+    """
+    job.dedup_key = job_dedup_key(job)
+    if job.dedup_key is None:
+        return False
+
+    with transaction.atomic():
+        output = (
+            ProcessedOutput.objects.select_for_update()
+            .filter(dedup_key=job.dedup_key)
+            .first()
+        )
+        storage = get_job_storage()
+        if output is None or not storage.exists(output.output_file_path):
+            if output is not None:
+                output.delete()
+            job.save(update_fields=["dedup_key"])
+            return False
+
+        ProcessedOutput.objects.filter(pk=output.pk).update(
+            ref_count=F("ref_count") + 1,
+            hits=F("hits") + 1,
+            last_used_at=timezone.now(),
+        )
+
+        # The upload is not needed: the output already exists
+        storage.delete_many([job.input_file_path])
+
+        now = timezone.now()
+        job.status = "COMPLETED"
+        job.dedup_hit = True
+        job.input_file_path = None
+        job.output_file_path = output.output_file_path
+        job.started_at = now
+        job.completed_at = now
+        job.processing_time = 0.0
+        job.save(
+            update_fields=[
+                "status",
+                "dedup_key",
+                "dedup_hit",
+                "input_file_path",
+                "output_file_path",
+                "started_at",
+                "completed_at",
+                "processing_time",
+            ]
+        )
+
+    print(f"♻️  Job {job.job_id} reused output {output.dedup_key[:12]}")
+    return True
+
+
+def register_processed_output(job):
+    """Make a finished job's output reusable by identical later jobs"""
+    if not job.dedup_key or not job.output_file_path:
+        return
+
+    # If an identical job finished first, this output just stays unshared
+    ProcessedOutput.objects.get_or_create(
+        dedup_key=job.dedup_key,
+        defaults={"output_file_path": job.output_file_path, "ref_count": 1},
+    )
+
+
+def release_processed_output(job):
+    """
+    Drop a job's reference to its output
+
+    Returns:
+        True if the output file may be deleted with the job (unshared, or
+        this was the last reference)
+    """
+    kept = release_processed_outputs([(job.dedup_key, job.output_file_path)])
+    return job.output_file_path not in kept
+
+
+def release_processed_outputs(jobs):
+    """
+    Drop the output references of many jobs at once
+
+    Args:
+        jobs: Iterable of (dedup_key, output_file_path) of the jobs
+
+    Returns:
+        Set of output paths still used by other jobs (not to be deleted)
+    """
+    released = Counter((key, path) for key, path in jobs if key and path)
+    if not released:
+        return set()
+
+    kept = set()
+    with transaction.atomic():
+        outputs = ProcessedOutput.objects.select_for_update().filter(
+            dedup_key__in={key for key, _ in released}
+        )
+        unused = []
+        for output in outputs:
+            count = released.get((output.dedup_key, output.output_file_path), 0)
+            if not count:
+                continue
+            if output.ref_count > count:
+                ProcessedOutput.objects.filter(pk=output.pk).update(
+                    ref_count=F("ref_count") - count
+                )
+                kept.add(output.output_file_path)
+            else:
+                unused.append(output.pk)
+        ProcessedOutput.objects.filter(pk__in=unused).delete()
+
+    return kept
+
+
+def dedup_stats():
+    """Hit rate over the jobs currently kept, plus the shared outputs"""
+    jobs = PDFProcessingJob.objects.exclude(dedup_key=None)
+    lookups = jobs.count()
+    hits = jobs.filter(dedup_hit=True).count()
+    return {
+        "lookups": lookups,
+        "hits": hits,
+        "hit_rate": round(hits / lookups, 3) if lookups else None,
+        "outputs": ProcessedOutput.objects.count(),
+    }
@@ -0,0 +1,209 @@
+# pdf_app/downloads.py
+"""
+File download responses.
+
+Files are streamed from disk with FileResponse instead of being read into
+memory, answer conditional requests (ETag / Last-Modified) with 304 and
+single byte ranges with 206, so interrupted downloads can resume.
+
+With DOWNLOAD_OFFLOAD set, Django only authorizes the download and the web
+server sends the file:
+
+    "nginx":    X-Accel-Redirect to DOWNLOAD_ACCEL_PREFIX + the path under
+                MEDIA_ROOT, signed for nginx's secure_link module
+                (?md5=...&expires=...) with DOWNLOAD_ACCEL_SECRET
+    "sendfile": X-Sendfile with the absolute path (Apache mod_xsendfile)
+
+Matching nginx location:
+
+    location /protected-media/ {
+        internal;
+        secure_link $arg_md5,$arg_expires;
+        secure_link_md5 "$secure_link_expires$uri <DOWNLOAD_ACCEL_SECRET>";
+        if ($secure_link = "") { return 403; }
+        if ($secure_link = "0") { return 410; }
+        alias /path/to/media/;
+    }
+"""
+
+import base64
+import hashlib
+import os
+import re
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+# Defaults used when the DOWNLOAD_* settings are not set
+DEFAULT_ACCEL_PREFIX = "/protected-media/"
+DEFAULT_ACCEL_EXPIRY = 300  # seconds a signed internal path stays valid
+DEFAULT_DOWNLOAD_BLOCK_SIZE = 64 * 1024
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _RangeFile:
+    """Read-only view of `length` bytes of a file, starting at `start`"""
+
+    def __init__(self, file_obj, start, length):
+        self.file_obj = file_obj
+        self.remaining = length
+        file_obj.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file_obj.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file_obj.close()
+
+
+def file_etag(stat):
+    return f'"{int(stat.st_mtime_ns):x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    Byte range requested by a Range header
+
+    Returns:
+        (start, end) inclusive, None to send the whole file (no header,
+        multiple ranges or a header we do not understand), or "invalid"
+        when the range cannot be satisfied
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return "invalid"
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return "invalid"
+    return start, end
+
+
+def if_range_matches(request, etag, mtime):
+    """Whether a Range request may be honoured given its If-Range header"""
+    if_range = request.META.get("HTTP_IF_RANGE")
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+def sign_accel_path(uri, expires, secret):
+    """The md5 argument nginx's secure_link_md5 expects for this URI"""
+    digest = hashlib.md5(f"{expires}{uri} {secret}".encode()).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+def accel_redirect_path(path):
+    """Signed, expiring internal URI of a file under MEDIA_ROOT"""
+    prefix = getattr(settings, "DOWNLOAD_ACCEL_PREFIX", DEFAULT_ACCEL_PREFIX)
+    expiry = getattr(settings, "DOWNLOAD_ACCEL_EXPIRY", DEFAULT_ACCEL_EXPIRY)
+    secret = getattr(settings, "DOWNLOAD_ACCEL_SECRET", settings.SECRET_KEY)
+
+    rel_path = os.path.relpath(path, settings.MEDIA_ROOT).replace(os.sep, "/")
+    if rel_path.startswith(".."):
+        raise ValueError("File is outside MEDIA_ROOT")
+
+    # nginx checks the decoded $uri, so the unquoted path is what gets signed
+    uri = f"{prefix.rstrip('/')}/{rel_path}"
+    expires = int(time.time()) + expiry
+    signature = sign_accel_path(uri, expires, secret)
+    return f"{quote(uri)}?md5={signature}&expires={expires}"
+
+
+def file_download_response(request, path, filename, content_type="application/pdf"):
+    """
+    Response sending a file on disk as an attachment
+
+    Args:
+        request: The download request (for Range / conditional headers)
+        path: File to send
+        filename: Name the client saves the file under
+        content_type: MIME type of the file
+
+    Returns:
+        304/412 for satisfied conditional requests, 206/416 for ranges,
+        an offload response when DOWNLOAD_OFFLOAD is set, else a streaming
+        FileResponse
+    """
+    stat = os.stat(path)
+    etag = file_etag(stat)
+
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if conditional is not None:
+        return conditional
+
+    offload = getattr(settings, "DOWNLOAD_OFFLOAD", None)
+    if offload in ("nginx", "sendfile"):
+        # The web server handles Range itself
+        response = HttpResponse(content_type=content_type)
+        if offload == "nginx":
+            response["X-Accel-Redirect"] = accel_redirect_path(path)
+        else:
+            response["X-Sendfile"] = os.path.abspath(path)
+    else:
+        response = _streaming_file_response(request, path, stat, etag, content_type)
+        if response.status_code == 416:
+            return response
+
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def _streaming_file_response(request, path, stat, etag, content_type):
+    size = stat.st_size
+    byte_range = None
+    if if_range_matches(request, etag, stat.st_mtime):
+        byte_range = parse_range(request.META.get("HTTP_RANGE"), size)
+
+    if byte_range == "invalid":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    block_size = getattr(settings, "DOWNLOAD_BLOCK_SIZE", DEFAULT_DOWNLOAD_BLOCK_SIZE)
+    file_obj = open(path, "rb")
+
+    if byte_range is None:
+        response = FileResponse(file_obj, content_type=content_type)
+        response.block_size = block_size
+        return response
+
+    start, end = byte_range
+    length = end - start + 1
+    response = FileResponse(
+        _RangeFile(file_obj, start, length), status=206, content_type=content_type
+    )
+    response.block_size = block_size
+    response["Content-Length"] = str(length)
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
@@ -0,0 +1,198 @@
+# pdf_app/font_stego/layout.py
+"""
+Footer layout engine for font steganography.
+
+Glyph advance widths come from the real PyMuPDF font metrics and are cached
+per (font, size), so a whole cover text can be positioned with a handful of
+array operations instead of estimating every character's width by hand.
+"""
+
+import functools
+
+import fitz  # PyMuPDF
+import numpy as np
+
+# Font used for the cover story and the encoded cover text
+STEGO_FONT_NAME = "helv"
+
+# Size used for spaces, the cover story and cover text beyond the payload
+COVER_FONT_SIZE = 8.0
+
+# Footer geometry (points): cover story baseline sits FOOTER_TOP above the
+# page bottom, encoded lines start COVER_STORY_GAP below it
+FOOTER_START_X = 50
+FOOTER_RIGHT_MARGIN = 50
+FOOTER_TOP = 60
+COVER_STORY_GAP = 18
+LINE_HEIGHT = 12
+FOOTER_BOTTOM_MARGIN = 4
+
+# Page size assumed by the fit check when the real page is not known yet:
+# the narrowest (A4) width and shortest (Letter) height in common use
+REFERENCE_PAGE_SIZE = (595.0, 792.0)
+
+# Code points served from the precomputed tables (others are looked up lazily)
+TABLE_SIZE = 256
+
+
+def codepoints_of(text):
+    """Code point of every character of `text` as a numpy array"""
+    return np.frombuffer(text.encode("utf-32-le"), dtype="<u4").astype(np.int64)
+
+
+@functools.lru_cache(maxsize=None)
+def _font(font_name):
+    return fitz.Font(font_name)
+
+
+@functools.lru_cache(maxsize=None)
+def advance_table(font_name, font_size):
+    """
+    Advance widths (points) of code points 0-255 at the given font size
+
+    Args:
+        font_name: PyMuPDF font name (e.g. "helv")
+        font_size: Font size in points
+
+    Returns:
+        Read-only numpy float array indexed by code point
+    """
+    font = _font(font_name)
+    table = np.array(
+        [font.glyph_advance(codepoint) for codepoint in range(TABLE_SIZE)]
+    ) * float(font_size)
+    table.setflags(write=False)
+    return table
+
+
+@functools.lru_cache(maxsize=4096)
+def _unit_advance(font_name, codepoint):
+    """Advance width at size 1 for a code point outside the table"""
+    return _font(font_name).glyph_advance(codepoint)
+
+
+def glyph_advances(text, sizes, font_name=STEGO_FONT_NAME):
+    """
+    Advance width of every character of `text`
+
+    Args:
+        text: String to measure
+        sizes: Font size per character (array-like, same length as text)
+        font_name: PyMuPDF font name
+
+    Returns:
+        numpy float array of advance widths in points
+    """
+    codepoints = codepoints_of(text)
+    sizes = np.asarray(sizes, dtype=float)
+    advances = np.empty(len(text))
+
+    in_table = codepoints < TABLE_SIZE
+    for size in np.unique(sizes):
+        mask = in_table & (sizes == size)
+        advances[mask] = advance_table(font_name, float(size))[codepoints[mask]]
+
+    for i in np.flatnonzero(~in_table):
+        advances[i] = _unit_advance(font_name, int(codepoints[i])) * sizes[i]
+
+    return advances
+
+
+def layout_cover_text(cover_text, sizes, line_width, font_name=STEGO_FONT_NAME):
+    """
+    Lay out a cover text in one pass, wrapping at word boundaries
+
+    Args:
+        cover_text: Text to place (spaces separate words)
+        sizes: Font size per character of cover_text
+        line_width: Available width of a footer line in points
+        font_name: PyMuPDF font name
+
+    Returns:
+        Dict with numpy arrays "x" (offset from the line start) and "line"
+        (line index) per character, plus "line_count"
+    """
+    if not cover_text:
+        return {"x": np.empty(0), "line": np.empty(0, dtype=int), "line_count": 0}
+
+    advances = glyph_advances(cover_text, sizes, font_name)
+    offsets = np.cumsum(advances) - advances  # Start of each char, unwrapped
+
+    # Words are runs of non-space characters: find their first/last indices
+    is_word = codepoints_of(cover_text) != ord(" ")
+    edges = np.diff(np.concatenate(([False], is_word, [False])).astype(np.int8))
+    word_starts = np.flatnonzero(edges == 1)
+    word_ends = np.flatnonzero(edges == -1) - 1
+
+    # Greedy wrap: a word moves to a new line if it would cross line_width
+    line_starts = [0]
+    line_origin = 0.0
+    word_lefts = offsets[word_starts]
+    word_rights = offsets[word_ends] + advances[word_ends]
+    for start, left, right in zip(word_starts, word_lefts, word_rights):
+        if right - line_origin > line_width and start > line_starts[-1]:
+            line_starts.append(int(start))
+            line_origin = left
+
+    line_starts = np.array(line_starts)
+    line = np.searchsorted(line_starts, np.arange(len(cover_text)), side="right") - 1
+
+    return {
+        "x": offsets - offsets[line_starts][line],
+        "line": line,
+        "line_count": len(line_starts),
+    }
+
+
+def footer_line_width(page_width):
+    """Usable width of a footer line on a page of the given width"""
+    return page_width - FOOTER_START_X - FOOTER_RIGHT_MARGIN
+
+
+def footer_line_capacity(page_height):
+    """Number of encoded-text lines that fit below the cover story"""
+    first_baseline = page_height - FOOTER_TOP + COVER_STORY_GAP
+    usable = page_height - FOOTER_BOTTOM_MARGIN - first_baseline
+    return max(0, int(usable // LINE_HEIGHT) + 1)
+
+
+def footer_glyph_capacity(
+    glyph_size, page_size=REFERENCE_PAGE_SIZE, font_name=STEGO_FONT_NAME
+):
+    """
+    Upper bound on the non-space glyphs one page footer can hold: every
+    line filled with the narrowest printable ASCII glyph at `glyph_size`
+    """
+    page_width, page_height = page_size
+    narrowest = advance_table(font_name, float(glyph_size))[33:127].min()
+    per_line = int(footer_line_width(page_width) // narrowest)
+    return per_line * footer_line_capacity(page_height)
+
+
+def cover_text_line_count(cover_text, page_width, glyph_size):
+    """
+    Lines a cover text needs when every non-space glyph uses `glyph_size`
+    (pass the largest encoding size for a worst-case answer)
+    """
+    sizes = np.where(codepoints_of(cover_text) != ord(" "), glyph_size, COVER_FONT_SIZE)
+    return layout_cover_text(cover_text, sizes, footer_line_width(page_width))[
+        "line_count"
+    ]
+
+
+def cover_text_fits(cover_text, glyph_size, page_size=REFERENCE_PAGE_SIZE):
+    """
+    Fast fit check: does the cover text fit in one page footer?
+
+    Args:
+        cover_text: Cover text to check
+        glyph_size: Largest font size an encoded glyph can take
+        page_size: (width, height) of the target page in points
+
+    Returns:
+        Tuple of (fits, lines needed, lines available)
+    """
+    page_width, page_height = page_size
+    needed = cover_text_line_count(cover_text, page_width, glyph_size)
+    available = footer_line_capacity(page_height)
+    return needed <= available, needed, available
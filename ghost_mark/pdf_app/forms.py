@@ -1,5 +1,13 @@
 from django import forms
 from .models import WatermarkedDocument
+from .utils import (
+    cover_text_fits_footer,
+    payload_bit_length,
+    single_page_message_capacity,
+)
+
+# Longest secret message one page footer can carry (UTF-8 bytes)
+FONT_STEGO_MAX_MESSAGE_BYTES = single_page_message_capacity()
 
 
 class PDFEmailForm(forms.Form):
@@ -116,11 +124,11 @@ class FontStegoEncodeForm(forms.Form):
             attrs={
                 "class": "form-control",
                 "placeholder": "Enter your secret message",
-                "maxlength": "200",
+                "maxlength": str(FONT_STEGO_MAX_MESSAGE_BYTES),
             }
         ),
-        max_length=200,
-        help_text="Message to hide in the PDF (max 200 characters)",
+        max_length=FONT_STEGO_MAX_MESSAGE_BYTES,
+        help_text=f"Message to hide in the PDF (max {FONT_STEGO_MAX_MESSAGE_BYTES} bytes)",
     )
 
     cover_text = forms.CharField(
@@ -141,8 +149,24 @@ class FontStegoEncodeForm(forms.Form):
         cover_text = cleaned_data.get("cover_text")
 
         if secret_message and cover_text:
-            # Calculate required characters
-            message_bits = len(secret_message) * 8
+            # The cover text must fit in the page footer
+            fits, lines_needed, lines_available = cover_text_fits_footer(cover_text)
+            if not fits:
+                raise forms.ValidationError(
+                    f"Cover text is too long! It needs {lines_needed} footer lines "
+                    f"but only {lines_available} fit on a page. "
+                    f"Please shorten the cover text."
+                )
+
+            message_bytes = len(secret_message.encode("utf-8"))
+            if message_bytes > FONT_STEGO_MAX_MESSAGE_BYTES:
+                raise forms.ValidationError(
+                    f"Secret message is too long! A page footer holds at most "
+                    f"{FONT_STEGO_MAX_MESSAGE_BYTES} bytes, your message has {message_bytes}."
+                )
+
+            # Calculate required characters (message bits plus length/CRC header)
+            message_bits = payload_bit_length(secret_message)
             non_space_chars = len([char for char in cover_text if char != " "])
 
             if message_bits > non_space_chars:
@@ -163,3 +187,9 @@ class FontStegoDecodeForm(forms.Form):
         widget=forms.FileInput(attrs={"class": "form-control", "accept": ".pdf"}),
         help_text="Select the PDF file that contains a hidden message",
     )
+
+    multi_page = forms.BooleanField(
+        label="Multi-page message",
+        required=False,
+        help_text="Reassemble a message spread across the footers of several pages",
+    )
@@ -0,0 +1,184 @@
+# pdf_app/job_listing.py
+"""
+Filtered, keyset-paginated listing of processing jobs.
+
+Jobs are listed newest first on (created_at, id). A page ends with an
+opaque cursor holding the last row's (created_at, id); the next page
+starts strictly after it, so every page is an index range scan however
+deep the client pages (no OFFSET that has to skip the earlier rows).
+
+The composite indexes (created_at, id), (status, created_at, id) and
+(job_type, created_at, id) serve the unfiltered listing, the status and
+job type filters and the time window. Counts are taken one status / job
+type at a time for the same reason: each COUNT is a range over one of
+those indexes instead of a scan of every row in the window.
+
+Listings read the table, which can trail the live job state in Redis by a
+flush interval (see job_state.py).
+"""
+
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import PDFProcessingJob
+
+DEFAULT_JOB_LIST_LIMIT = 50
+MAX_JOB_LIST_LIMIT = 500
+
+# Fields a listing can return -> column read for them
+JOB_LIST_FIELDS = {
+    "job_id": "job_id",
+    "status": "status",
+    "job_type": "job_type",
+    "original_filename": "original_filename",
+    "created_at": "created_at",
+    "started_at": "started_at",
+    "completed_at": "completed_at",
+    "processing_time": "processing_time",
+    "error_message": "error_message",
+    "dedup_hit": "dedup_hit",
+    "shard_count": "shard_count",
+    "callback_status": "callback_status",
+    "batch_id": "batch__batch_id",
+    "download_url": None,  # built from job_id and status
+}
+
+DEFAULT_JOB_LIST_FIELDS = [
+    "job_id",
+    "status",
+    "job_type",
+    "original_filename",
+    "created_at",
+    "processing_time",
+]
+
+
+def encode_cursor(created_at, pk):
+    raw = f"{created_at.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    (created_at, id) of the row a cursor points at
+
+    Raises:
+        ValueError: The cursor was not made by encode_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit("|", 1)
+        created_at = parse_datetime(created_at)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if created_at is None:
+        raise ValueError("Invalid cursor")
+    return created_at, pk
+
+
+def filter_jobs(statuses=None, job_types=None, created_after=None, created_before=None):
+    """Jobs matching the listing filters (None / empty = no filter)"""
+    jobs = PDFProcessingJob.objects.all()
+    if statuses:
+        jobs = jobs.filter(status__in=statuses)
+    if job_types:
+        jobs = jobs.filter(job_type__in=job_types)
+    if created_after:
+        jobs = jobs.filter(created_at__gte=created_after)
+    if created_before:
+        jobs = jobs.filter(created_at__lt=created_before)
+    return jobs
+
+
+def after_cursor(jobs, cursor):
+    """Jobs listed after the row a cursor points at"""
+    created_at, pk = decode_cursor(cursor)
+    # created_at <= c is the index range; the exclude only drops the rows
+    # of the same instant that were already returned
+    return jobs.filter(created_at__lte=created_at).exclude(
+        Q(created_at=created_at) & Q(id__gte=pk)
+    )
+
+
+def page_jobs(jobs, fields=None, limit=DEFAULT_JOB_LIST_LIMIT, cursor=None):
+    """
+    One page of jobs, newest first
+
+    Args:
+        jobs: Filtered queryset (see filter_jobs)
+        fields: Names from JOB_LIST_FIELDS to return (default set if None)
+        limit: Page size
+        cursor: next_cursor of the previous page
+
+    Returns:
+        Dict with the jobs (one dict per job) and next_cursor (None on the
+        last page)
+
+    Raises:
+        ValueError: Invalid cursor
+    """
+    fields = fields or DEFAULT_JOB_LIST_FIELDS
+    if cursor:
+        jobs = after_cursor(jobs, cursor)
+
+    columns = {"id", "created_at"}
+    for name in fields:
+        if name == "download_url":
+            columns.update(["job_id", "status"])
+        else:
+            columns.add(JOB_LIST_FIELDS[name])
+
+    rows = list(jobs.order_by("-created_at", "-id").values(*columns)[: limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+    return {
+        "jobs": [job_row(row, fields) for row in rows],
+        "next_cursor": next_cursor,
+    }
+
+
+def job_row(row, fields):
+    data = {}
+    for name in fields:
+        if name == "download_url":
+            value = (
+                f"/api/download/{row['job_id']}/"
+                if row["status"] == "COMPLETED"
+                else None
+            )
+        else:
+            value = row[JOB_LIST_FIELDS[name]]
+            if isinstance(value, datetime):
+                value = value.isoformat()
+        data[name] = value
+    return data
+
+
+def job_counts(jobs):
+    """
+    Number of jobs per status and per job type
+
+    Returns:
+        Dict with total, by_status and by_job_type
+    """
+    by_status = {
+        value: jobs.filter(status=value).count()
+        for value, _ in PDFProcessingJob.JOB_STATUS_CHOICES
+    }
+    by_job_type = {
+        value: jobs.filter(job_type=value).count()
+        for value, _ in PDFProcessingJob.JOB_TYPE_CHOICES
+    }
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_job_type": by_job_type,
+    }
@@ -0,0 +1,397 @@
+# pdf_app/job_state.py
+"""
+Redis-first store for the hot state of processing jobs.
+
+A job's status, timings, output key and shard counts change several times
+while it runs and are polled far more often than that. They live in a
+Redis hash per job ("job_state:<job_id>"), next to a copy of the few
+fields the status endpoint shows, so job_status is answered without
+touching the database.
+
+Changes are written to the hash and the job id is added to a "dirty" set.
+The flush_job_states task (scheduled at most once per
+JOB_STATE_FLUSH_INTERVAL seconds, plus a beat safety net) writes the dirty
+jobs back to PDFProcessingJob in batches: one SELECT for the primary keys
+and one bulk_update per set of changed fields, touching only the state
+columns. The table therefore lags behind Redis by about the flush interval;
+single-job readers that act on the state (downloads, webhooks) overlay it
+with apply_job_state(s), while aggregates over many jobs (batch progress,
+cleanup, the job list) read the table as it is.
+
+If Redis is unavailable, changes are written straight to the table with
+update_fields and the job's hash is dropped once Redis is back, so a stale
+hash never hides a newer row.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+
+import redis
+from django.conf import settings
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
+
+from .models import PDFProcessingJob
+from .progress import _get_redis, _redis_failed
+
+# Defaults used when the JOB_STATE_* settings are not set
+DEFAULT_JOB_STATE_TTL = 3600  # seconds
+DEFAULT_JOB_STATE_FLUSH_INTERVAL = 2  # seconds between write-backs
+DEFAULT_JOB_STATE_FLUSH_BATCH_SIZE = 500
+
+# Fields owned by the state store and written back by the flush (-> type)
+STATE_FIELDS = {
+    "status": str,
+    "started_at": datetime,
+    "completed_at": datetime,
+    "processing_time": float,
+    "error_message": str,
+    "output_file_path": str,
+    "shard_count": int,
+    "shards_completed": int,
+}
+
+# Fields copied into the hash only so job_status can be served from it
+CACHED_FIELDS = {
+    "job_type": str,
+    "original_filename": str,
+    "created_at": datetime,
+    "callback_url": str,
+    "callback_status": str,
+    "callback_attempts": int,
+    "callback_latency": float,
+    "callback_error": str,
+}
+
+FINAL_STATUSES = ["COMPLETED", "FAILED"]
+
+DIRTY_SET = "job_state:dirty"
+FLUSH_SCHEDULED_KEY = "job_state:flush_scheduled"
+
+# Jobs written straight to the table while Redis was unreachable; their
+# hashes are deleted on the next successful connection
+_invalidated = set()
+
+
+def job_state_key(job_id):
+    return f"job_state:{job_id}"
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _client():
+    """Redis client (see progress._get_redis), after dropping stale hashes"""
+    client = _get_redis()
+    if client is not None and _invalidated:
+        try:
+            client.delete(*[job_state_key(job_id) for job_id in _invalidated])
+            client.srem(DIRTY_SET, *_invalidated)
+            _invalidated.clear()
+        except redis.RedisError as e:
+            _redis_failed(e)
+            return None
+    return client
+
+
+def _encode(fields):
+    encoded = {}
+    for name, value in fields.items():
+        if value is None:
+            encoded[name] = ""
+        elif isinstance(value, datetime):
+            encoded[name] = value.isoformat()
+        else:
+            encoded[name] = value
+    return encoded
+
+
+def _decode(fields, types):
+    """Typed values of the known fields of a hash ("" stands for None)"""
+    decoded = {}
+    for name, value in fields.items():
+        field_type = types.get(name)
+        if field_type is None:
+            continue
+        if value == "":
+            decoded[name] = None
+        elif field_type is datetime:
+            decoded[name] = parse_datetime(value)
+        else:
+            decoded[name] = field_type(value)
+    return decoded
+
+
+def init_job_states(jobs):
+    """
+    Seed the hashes of newly created jobs (call before queuing them)
+
+    Nothing is marked dirty: the rows were just written.
+    """
+    client = _client()
+    if client is None:
+        return
+
+    fields = list(STATE_FIELDS) + list(CACHED_FIELDS)
+    ttl = _setting("JOB_STATE_TTL", DEFAULT_JOB_STATE_TTL)
+    try:
+        pipe = client.pipeline(transaction=False)
+        for job in jobs:
+            key = job_state_key(job.job_id)
+            pipe.hset(
+                key, mapping=_encode({name: getattr(job, name) for name in fields})
+            )
+            pipe.expire(key, ttl)
+        pipe.execute()
+    except redis.RedisError as e:
+        _redis_failed(e)
+
+
+def _schedule_flush(pipe_results):
+    """Queue a write-back unless one is already due (last SET NX result)"""
+    if not pipe_results[-1]:
+        return
+
+    from .tasks import flush_job_states
+
+    try:
+        flush_job_states.apply_async(
+            countdown=_setting(
+                "JOB_STATE_FLUSH_INTERVAL", DEFAULT_JOB_STATE_FLUSH_INTERVAL
+            )
+        )
+    except Exception as e:
+        # The beat schedule flushes the dirty set anyway
+        print(f"⚠️  Could not queue job state flush: {e}")
+
+
+def _mark_dirty(pipe, job_id):
+    pipe.expire(job_state_key(job_id), _setting("JOB_STATE_TTL", DEFAULT_JOB_STATE_TTL))
+    pipe.sadd(DIRTY_SET, job_id)
+    pipe.set(
+        FLUSH_SCHEDULED_KEY,
+        1,
+        nx=True,
+        ex=_setting("JOB_STATE_FLUSH_INTERVAL", DEFAULT_JOB_STATE_FLUSH_INTERVAL),
+    )
+
+
+def update_job_state(job, **fields):
+    """
+    Change state fields of a job
+
+    The values are set on `job`, written to Redis right away and to the
+    table by the next flush (or straight to the table, with update_fields,
+    when Redis is unavailable).
+
+    Args:
+        job: PDFProcessingJob
+        **fields: STATE_FIELDS names and their new values
+    """
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+    client = _client()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hset(job_state_key(job.job_id), mapping=_encode(fields))
+            _mark_dirty(pipe, job.job_id)
+            _schedule_flush(pipe.execute())
+            return
+        except redis.RedisError as e:
+            _redis_failed(e)
+
+    job.save(update_fields=list(fields))
+    _invalidated.add(job.job_id)
+
+
+def increment_job_state(job_id, field, amount=1):
+    """Atomically add to a counter of the state (e.g. shards_completed)"""
+    client = _client()
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hincrby(job_state_key(job_id), field, amount)
+            _mark_dirty(pipe, job_id)
+            _schedule_flush(pipe.execute())
+            return
+        except redis.RedisError as e:
+            _redis_failed(e)
+
+    PDFProcessingJob.objects.filter(job_id=job_id).update(**{field: F(field) + amount})
+    _invalidated.add(job_id)
+
+
+def cache_job_fields(jobs, names):
+    """
+    Copy fields already saved to the table into the jobs' hashes
+
+    Used for the callback fields, which the webhook tasks update in bulk.
+    A hash that had expired comes back without job_type, so job_status
+    keeps reading such a job from the table.
+    """
+    client = _client()
+    if client is None or not jobs:
+        return
+
+    ttl = _setting("JOB_STATE_TTL", DEFAULT_JOB_STATE_TTL)
+    try:
+        pipe = client.pipeline(transaction=False)
+        for job in jobs:
+            key = job_state_key(job.job_id)
+            pipe.hset(
+                key, mapping=_encode({name: getattr(job, name) for name in names})
+            )
+            pipe.expire(key, ttl)
+        pipe.execute()
+    except redis.RedisError as e:
+        _redis_failed(e)
+
+
+def _read_states(client, job_ids):
+    """Raw hashes of jobs by job id (raises redis.RedisError)"""
+    pipe = client.pipeline(transaction=False)
+    for job_id in job_ids:
+        pipe.hgetall(job_state_key(job_id))
+    return dict(zip(job_ids, pipe.execute()))
+
+
+def _safe_read_states(job_ids):
+    client = _client()
+    if client is None or not job_ids:
+        return {}
+
+    try:
+        return _read_states(client, job_ids)
+    except redis.RedisError as e:
+        _redis_failed(e)
+        return {}
+
+
+def get_cached_job(job_id):
+    """
+    The job as last written to Redis, for read-only use
+
+    Returns:
+        Unsaved PDFProcessingJob with the state and cached fields, or None
+        if the job has no complete hash (then read the table)
+    """
+    fields = _safe_read_states([job_id]).get(job_id)
+    if not fields or "job_type" not in fields:
+        return None
+
+    state = _decode(fields, {**STATE_FIELDS, **CACHED_FIELDS})
+    return PDFProcessingJob(job_id=job_id, **state)
+
+
+def apply_job_states(jobs):
+    """Overlay the Redis state on jobs read from the table (in place)"""
+    states = _safe_read_states([job.job_id for job in jobs])
+    for job in jobs:
+        _apply_fields(job, states.get(job.job_id))
+    return jobs
+
+
+def apply_job_state(job):
+    return apply_job_states([job])[0]
+
+
+async def aapply_job_state(client, job):
+    """apply_job_state for async views, using the caller's asyncio client"""
+    _apply_fields(job, await client.hgetall(job_state_key(job.job_id)))
+    return job
+
+
+def _apply_fields(job, fields):
+    for name, value in _decode(fields or {}, STATE_FIELDS).items():
+        setattr(job, name, value)
+
+
+def write_back_job_states(batch_size=None):
+    """
+    Write the state of dirty jobs back to the table
+
+    Returns:
+        Number of rows updated
+    """
+    client = _client()
+    if client is None:
+        return 0
+
+    batch_size = batch_size or _setting(
+        "JOB_STATE_FLUSH_BATCH_SIZE", DEFAULT_JOB_STATE_FLUSH_BATCH_SIZE
+    )
+    written = 0
+    while True:
+        try:
+            job_ids = client.spop(DIRTY_SET, batch_size)
+            if not job_ids:
+                break
+        except redis.RedisError as e:
+            _redis_failed(e)
+            break
+
+        try:
+            states = _read_states(client, job_ids)
+        except redis.RedisError as e:
+            _redis_failed(e)
+            _requeue(client, job_ids)
+            break
+
+        try:
+            written += _write_states(states)
+        except Exception:
+            _requeue(client, job_ids)
+            raise
+
+        if len(job_ids) < batch_size:
+            break
+
+    return written
+
+
+def _requeue(client, job_ids):
+    """Put popped jobs back for the next flush (best effort)"""
+    try:
+        client.sadd(DIRTY_SET, *job_ids)
+    except redis.RedisError as e:
+        print(f"⚠️  Could not requeue job state of {len(job_ids)} job(s): {e}")
+
+
+def _write_states(states):
+    """One SELECT and one bulk_update per set of fields for a batch"""
+    groups = defaultdict(list)
+    rows = PDFProcessingJob.objects.filter(job_id__in=list(states)).values_list(
+        "pk", "job_id", "status"
+    )
+    for pk, job_id, db_status in rows:
+        fields = _decode(states.get(job_id) or {}, STATE_FIELDS)
+        if not fields:
+            continue  # Hash expired
+        # Never move a finished row back (written directly while Redis was
+        # unavailable)
+        if db_status in FINAL_STATUSES and fields.get("status") not in FINAL_STATUSES:
+            continue
+        groups[tuple(sorted(fields))].append(PDFProcessingJob(pk=pk, **fields))
+
+    written = 0
+    for names, jobs in groups.items():
+        written += PDFProcessingJob.objects.bulk_update(jobs, names)
+    return written
+
+
+def forget_job_states(job_ids):
+    """Drop the hashes of deleted jobs"""
+    client = _client()
+    if client is None or not job_ids:
+        return
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.delete(*[job_state_key(job_id) for job_id in job_ids])
+        pipe.srem(DIRTY_SET, *job_ids)
+        pipe.execute()
+    except redis.RedisError as e:
+        _redis_failed(e)
@@ -0,0 +1,99 @@
+# Generated by Django 5.2 on 2026-10-19 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pdf_app", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PDFProcessingJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "job_id",
+                    models.CharField(db_index=True, max_length=100, unique=True),
+                ),
+                (
+                    "job_type",
+                    models.CharField(
+                        choices=[
+                            ("watermark", "Watermark Only"),
+                            ("qr_code", "QR Code Only"),
+                            ("font_stego", "Font Steganography Only"),
+                            ("all_methods", "All Methods"),
+                            ("selected_methods", "Selected Methods"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("PROCESSING", "Processing"),
+                            ("COMPLETED", "Completed"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=20,
+                    ),
+                ),
+                ("original_filename", models.CharField(max_length=255)),
+                (
+                    "watermark_text",
+                    models.CharField(blank=True, max_length=255, null=True),
+                ),
+                ("email", models.EmailField(blank=True, max_length=254, null=True)),
+                (
+                    "secret_message",
+                    models.CharField(blank=True, max_length=500, null=True),
+                ),
+                ("cover_text", models.TextField(blank=True, null=True)),
+                (
+                    "selected_methods",
+                    models.CharField(blank=True, max_length=100, null=True),
+                ),
+                (
+                    "input_file_path",
+                    models.CharField(blank=True, max_length=500, null=True),
+                ),
+                (
+                    "output_file_path",
+                    models.CharField(blank=True, max_length=500, null=True),
+                ),
+                ("error_message", models.TextField(blank=True, null=True)),
+                ("processing_time", models.FloatField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["job_id"], name="pdf_app_pdf_job_id_df0521_idx"
+                    ),
+                    models.Index(
+                        fields=["status"], name="pdf_app_pdf_status_69e71f_idx"
+                    ),
+                    models.Index(
+                        fields=["created_at"], name="pdf_app_pdf_created_4deeae_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pdf_app", "0002_pdfprocessingjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="multi_page",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name="pdfprocessingjob",
+            name="secret_message",
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
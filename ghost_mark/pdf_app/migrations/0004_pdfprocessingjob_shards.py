@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-19 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pdf_app", "0003_pdfprocessingjob_multi_page"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="shard_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="shards_completed",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2 on 2026-10-19 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pdf_app", "0004_pdfprocessingjob_shards"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="callback_attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="callback_error",
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="callback_latency",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="callback_status",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("SENDING", "Sending"),
+                    ("DELIVERED", "Delivered"),
+                    ("FAILED", "Failed"),
+                ],
+                max_length=20,
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="callback_url",
+            field=models.URLField(blank=True, max_length=500, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="pdfprocessingjob",
+            index=models.Index(
+                fields=["callback_status", "callback_url"],
+                name="pdf_app_pdf_callbac_ab2440_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-19 12:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pdf_app", "0005_pdfprocessingjob_callbacks"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PDFBatchJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "batch_id",
+                    models.CharField(db_index=True, max_length=100, unique=True),
+                ),
+                ("job_type", models.CharField(max_length=20)),
+                ("original_filename", models.CharField(max_length=255)),
+                ("total_jobs", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["-created_at"],
+            },
+        ),
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="batch",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="jobs",
+                to="pdf_app.pdfbatchjob",
+            ),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2 on 2026-10-19 12:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pdf_app", "0006_pdfbatchjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProcessedOutput",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("dedup_key", models.CharField(max_length=64, unique=True)),
+                ("output_file_path", models.CharField(max_length=500)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("hits", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "last_used_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="dedup_hit",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name="pdfprocessingjob",
+            name="dedup_key",
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
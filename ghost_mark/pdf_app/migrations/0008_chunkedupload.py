@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-19 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pdf_app", "0007_dedup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChunkedUpload",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "upload_id",
+                    models.CharField(db_index=True, max_length=100, unique=True),
+                ),
+                ("filename", models.CharField(max_length=255)),
+                ("upload_length", models.PositiveBigIntegerField()),
+                ("upload_offset", models.PositiveBigIntegerField(default=0)),
+                ("scratch_path", models.CharField(max_length=500)),
+                ("chunk_checksums", models.JSONField(default=list)),
+                ("job_id", models.CharField(blank=True, max_length=100, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
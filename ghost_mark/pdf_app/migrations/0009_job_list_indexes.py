@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-19 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pdf_app", "0008_chunkedupload"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="pdfprocessingjob",
+            name="pdf_app_pdf_status_69e71f_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="pdfprocessingjob",
+            name="pdf_app_pdf_created_4deeae_idx",
+        ),
+        migrations.AddIndex(
+            model_name="pdfprocessingjob",
+            index=models.Index(
+                fields=["created_at", "id"], name="pdf_app_pdf_created_d3b91a_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pdfprocessingjob",
+            index=models.Index(
+                fields=["status", "created_at", "id"],
+                name="pdf_app_pdf_status_7b8eb1_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pdfprocessingjob",
+            index=models.Index(
+                fields=["job_type", "created_at", "id"],
+                name="pdf_app_pdf_job_typ_eb7793_idx",
+            ),
+        ),
+    ]
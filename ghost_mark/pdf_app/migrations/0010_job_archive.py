@@ -0,0 +1,48 @@
+# Generated by Django 5.2 on 2026-10-19 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("pdf_app", "0009_job_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="pdfprocessingjob",
+            options={},
+        ),
+        migrations.CreateModel(
+            name="ArchivedJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("job_id", models.CharField(max_length=100, unique=True)),
+                ("job_type", models.CharField(max_length=20)),
+                ("status", models.CharField(max_length=20)),
+                ("original_filename", models.CharField(max_length=255)),
+                ("batch_id", models.CharField(blank=True, max_length=100, null=True)),
+                ("params", models.JSONField(default=dict)),
+                ("processing_time", models.FloatField(blank=True, null=True)),
+                ("created_at", models.DateTimeField()),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["created_at"], name="pdf_app_arc_created_7f9731_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -7,6 +7,22 @@ from datetime import timedelta
 # Create your models here.
 
 
+class PDFBatchJob(models.Model):
+    """Parent record of a batch submission; each file is a PDFProcessingJob"""
+
+    batch_id = models.CharField(max_length=100, unique=True, db_index=True)
+    job_type = models.CharField(max_length=20)
+    original_filename = models.CharField(max_length=255)  # the uploaded archive
+    total_jobs = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Batch {self.batch_id} - {self.job_type} - {self.total_jobs} files"
+
+
 class PDFProcessingJob(models.Model):
     JOB_STATUS_CHOICES = [
         ("PENDING", "Pending"),
@@ -23,6 +39,13 @@ class PDFProcessingJob(models.Model):
         ("selected_methods", "Selected Methods"),
     ]
 
+    CALLBACK_STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("SENDING", "Sending"),
+        ("DELIVERED", "Delivered"),
+        ("FAILED", "Failed"),
+    ]
+
     # Job identification
     job_id = models.CharField(max_length=100, unique=True, db_index=True)
     job_type = models.CharField(max_length=20, choices=JOB_TYPE_CHOICES)
@@ -36,18 +59,48 @@ class PDFProcessingJob(models.Model):
     # Method-specific parameters
     watermark_text = models.CharField(max_length=255, blank=True, null=True)
     email = models.EmailField(blank=True, null=True)
-    secret_message = models.CharField(max_length=500, blank=True, null=True)
+    secret_message = models.TextField(blank=True, null=True)
     cover_text = models.TextField(blank=True, null=True)
+    multi_page = models.BooleanField(default=False)  # Spread font stego over pages
 
     # For selected methods
     selected_methods = models.CharField(
         max_length=100, blank=True, null=True
     )  # comma-separated
 
-    # File paths
+    # Storage keys of the job's files (see pdf_app/storage.py)
     input_file_path = models.CharField(max_length=500, blank=True, null=True)
     output_file_path = models.CharField(max_length=500, blank=True, null=True)
 
+    # Page-range sharding of large jobs (0 shards = processed in one task)
+    shard_count = models.PositiveIntegerField(default=0)
+    shards_completed = models.PositiveIntegerField(default=0)
+
+    # Content-addressed deduplication: SHA-256 of the input, key of input +
+    # methods + parameters, and whether an earlier job's output was reused
+    content_hash = models.CharField(max_length=64, blank=True, null=True)
+    dedup_key = models.CharField(max_length=64, blank=True, null=True, db_index=True)
+    dedup_hit = models.BooleanField(default=False)
+
+    # Parent batch when submitted as part of an archive
+    batch = models.ForeignKey(
+        PDFBatchJob,
+        on_delete=models.CASCADE,
+        related_name="jobs",
+        null=True,
+        blank=True,
+    )
+
+    # Completion webhook (optional): delivery state, attempts made, seconds
+    # from completion to delivery and the last delivery error
+    callback_url = models.URLField(max_length=500, blank=True, null=True)
+    callback_status = models.CharField(
+        max_length=20, choices=CALLBACK_STATUS_CHOICES, blank=True, null=True
+    )
+    callback_attempts = models.PositiveIntegerField(default=0)
+    callback_latency = models.FloatField(null=True, blank=True)  # seconds
+    callback_error = models.TextField(blank=True, null=True)
+
     # Processing info
     error_message = models.TextField(blank=True, null=True)
     processing_time = models.FloatField(null=True, blank=True)  # seconds
@@ -58,11 +111,15 @@ class PDFProcessingJob(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
-        ordering = ["-created_at"]
+        # No default ordering: queries on the hot table order explicitly
         indexes = [
             models.Index(fields=["job_id"]),
-            models.Index(fields=["status"]),
-            models.Index(fields=["created_at"]),
+            # Keyset pages of the job listing, filtered by nothing, by
+            # status or by job type (also the per-value counts)
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["status", "created_at", "id"]),
+            models.Index(fields=["job_type", "created_at", "id"]),
+            models.Index(fields=["callback_status", "callback_url"]),
         ]
 
     def __str__(self):
@@ -75,20 +132,99 @@ class PDFProcessingJob(models.Model):
 
     def get_output_file_url(self):
         """Get URL for downloading the processed file"""
-        if self.output_file_path and os.path.exists(self.output_file_path):
-            # Return relative path from MEDIA_ROOT
-            rel_path = os.path.relpath(self.output_file_path, settings.MEDIA_ROOT)
+        from .storage import get_job_storage
+
+        storage = get_job_storage()
+        if self.output_file_path and storage.exists(self.output_file_path):
+            filename = os.path.basename(self.original_filename)
+            url = storage.url(self.output_file_path, filename)
+            if url:
+                return url
+            # Local storage: relative path from MEDIA_ROOT
+            rel_path = os.path.relpath(
+                storage.local_path(self.output_file_path), settings.MEDIA_ROOT
+            )
             return f"{settings.MEDIA_URL}{rel_path}"
         return None
 
     def cleanup_files(self):
-        """Clean up input and output files"""
-        for file_path in [self.input_file_path, self.output_file_path]:
-            if file_path and os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    print(f"Error removing file {file_path}: {e}")
+        """
+        Clean up input and output files (and any leftover shard files)
+
+        An output shared with other jobs through deduplication is only
+        removed together with its last job.
+        """
+        from .dedup import release_processed_output
+        from .pipeline.sharding import shard_files
+        from .storage import get_job_storage
+
+        keys = [self.input_file_path]
+        if release_processed_output(self):
+            keys.append(self.output_file_path)
+        keys += shard_files(self.job_id, self.shard_count)
+        get_job_storage().delete_many(keys)
+
+
+class ArchivedJob(models.Model):
+    """
+    Audit record of an expired job, kept after its PDFProcessingJob row and
+    files are deleted (see pdf_app/archive.py)
+
+    Method parameters and delivery details are folded into one JSON blob
+    holding only the values that were set.
+    """
+
+    job_id = models.CharField(max_length=100, unique=True)
+    job_type = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    original_filename = models.CharField(max_length=255)
+    batch_id = models.CharField(max_length=100, blank=True, null=True)
+    params = models.JSONField(default=dict)
+    processing_time = models.FloatField(null=True, blank=True)  # seconds
+    created_at = models.DateTimeField()  # of the job
+    completed_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["created_at"])]
+
+    def __str__(self):
+        return f"Archived job {self.job_id} - {self.job_type} - {self.status}"
+
+
+class ChunkedUpload(models.Model):
+    """A resumable upload, assembled chunk by chunk before it becomes a job"""
+
+    upload_id = models.CharField(max_length=100, unique=True, db_index=True)
+    filename = models.CharField(max_length=255)
+    upload_length = models.PositiveBigIntegerField()  # total bytes announced
+    upload_offset = models.PositiveBigIntegerField(default=0)  # bytes received
+    scratch_path = models.CharField(max_length=500)
+    # One {"offset", "size", "sha256"} entry per chunk received
+    chunk_checksums = models.JSONField(default=list)
+    job_id = models.CharField(max_length=100, blank=True, null=True)  # once finalized
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload {self.upload_id} - {self.upload_offset}/{self.upload_length}"
+
+    def is_complete(self):
+        return self.upload_offset == self.upload_length
+
+
+class ProcessedOutput(models.Model):
+    """A processed file shared by every job with the same dedup key"""
+
+    dedup_key = models.CharField(max_length=64, unique=True)
+    output_file_path = models.CharField(max_length=500)
+    ref_count = models.PositiveIntegerField(default=0)  # jobs using the file
+    hits = models.PositiveIntegerField(default=0)  # jobs served without processing
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Output {self.dedup_key[:12]} - {self.ref_count} refs"
 
 
 class WatermarkedDocument(models.Model):
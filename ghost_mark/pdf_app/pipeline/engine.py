@@ -0,0 +1,132 @@
+# pdf_app/pipeline/engine.py
+"""
+Fused processing pipeline for multi-method jobs.
+
+The PDF is parsed once into a PyMuPDF document, every stage draws into that
+same document, and the result is serialized once at the end. Stages are
+looked up by method name in PIPELINE_STAGES, so adding a method only means
+registering one more stage function.
+"""
+
+import fitz  # PyMuPDF
+
+from ..utils import (
+    PDF_SAVE_OPTIONS,
+    add_qr_code_to_document,
+    encode_message_in_document_font_stego,
+)
+from ..watermark.service import PDFWatermarkService
+
+# Order used by "all methods" jobs
+ALL_METHODS = ["watermark", "qr_code", "font_stego"]
+
+# Stage name -> {"apply": func(doc, params, progress) -> result dict,
+#                "requires": params}
+PIPELINE_STAGES = {}
+
+
+def register_stage(name, requires=()):
+    """
+    Register a pipeline stage under a method name
+
+    Args:
+        name: Method name the stage is selected by
+        requires: Parameter names that must be set for the stage to run
+    """
+
+    def decorator(func):
+        PIPELINE_STAGES[name] = {"apply": func, "requires": tuple(requires)}
+        return func
+
+    return decorator
+
+
+@register_stage("watermark", requires=("watermark_text",))
+def watermark_stage(doc, params, progress=None):
+    PDFWatermarkService.add_invisible_watermark_to_document(
+        doc, params["watermark_text"], progress=progress
+    )
+    return {"success": True}
+
+
+@register_stage("qr_code", requires=("email",))
+def qr_code_stage(doc, params, progress=None):
+    add_qr_code_to_document(doc, params["email"], progress=progress)
+    return {"success": True}
+
+
+@register_stage("font_stego", requires=("secret_message", "cover_text"))
+def font_stego_stage(doc, params, progress=None):
+    return encode_message_in_document_font_stego(
+        doc,
+        params["secret_message"],
+        params["cover_text"],
+        multi_page=params.get("multi_page", False),
+        progress=progress,
+    )
+
+
+def plan_pipeline(methods, params):
+    """
+    Stages to run for the requested methods, in request order
+
+    Methods that are unknown or whose required parameters are missing are
+    skipped, matching how the per-method code paths behaved.
+    """
+    stages = []
+    for method in methods:
+        method = method.strip()
+        stage = PIPELINE_STAGES.get(method)
+        if stage is None:
+            print(f"⚠️  Unknown method skipped: {method}")
+            continue
+        if all(params.get(name) for name in stage["requires"]):
+            stages.append(method)
+    return stages
+
+
+def run_pipeline(pdf_content, methods, params, progress=None):
+    """
+    Apply several methods to a PDF with a single parse and a single save
+
+    Args:
+        pdf_content: Input PDF as bytes
+        methods: Method names to apply, in order
+        params: Dict of method parameters (watermark_text, email,
+            secret_message, cover_text, multi_page)
+        progress: Optional ProgressReporter, handed to every stage
+
+    Returns:
+        Dict with success status, pdf_content (bytes) and methods_applied,
+        or error and the failing stage
+    """
+    stages = plan_pipeline(methods, params)
+    if not stages:
+        return {"success": True, "pdf_content": pdf_content, "methods_applied": []}
+
+    try:
+        doc = fitz.open(stream=pdf_content, filetype="pdf")
+    except Exception as e:
+        return {"success": False, "error": f"Error opening PDF: {e}"}
+
+    try:
+        methods_applied = []
+        for name in stages:
+            print(f"  Adding {name}...")
+            result = PIPELINE_STAGES[name]["apply"](doc, params, progress)
+            if not result["success"]:
+                return {
+                    "success": False,
+                    "error": result["error"],
+                    "stage": name,
+                    "methods_applied": methods_applied,
+                }
+            methods_applied.append(name)
+
+        return {
+            "success": True,
+            "pdf_content": doc.tobytes(**PDF_SAVE_OPTIONS),
+            "methods_applied": methods_applied,
+        }
+    finally:
+        doc.close()
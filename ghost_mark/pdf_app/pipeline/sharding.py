@@ -0,0 +1,77 @@
+# pdf_app/pipeline/sharding.py
+"""
+Page-range sharding for large per-page jobs.
+
+A job is split into contiguous page ranges small enough, both in pages and
+in (estimated) bytes, for one worker to stamp well within the Celery time
+limits. The dispatching task splits the input once and stores each page
+range as its own file, so a shard only downloads its own pages. Each shard
+is stamped and saved separately and the merge step only concatenates the
+stamped pages.
+"""
+
+import math
+
+from django.conf import settings
+
+# Defaults used when PDF_SHARD_MAX_PAGES / PDF_SHARD_MAX_BYTES are not set
+DEFAULT_SHARD_MAX_PAGES = 250
+DEFAULT_SHARD_MAX_BYTES = 25 * 1024 * 1024
+
+# Job types whose stamping is independent per page and can be sharded
+SHARDABLE_JOB_TYPES = ["watermark"]
+
+
+def plan_page_shards(page_count, file_size, max_pages=None, max_bytes=None):
+    """
+    Split a document into contiguous page ranges
+
+    Args:
+        page_count: Number of pages in the document
+        file_size: Size of the document in bytes
+        max_pages: Largest number of pages per shard
+        max_bytes: Largest (average-based) number of bytes per shard
+
+    Returns:
+        List of (first_page, end_page) tuples, end exclusive; a single range
+        means the job is small enough to run unsharded
+    """
+    if max_pages is None:
+        max_pages = getattr(settings, "PDF_SHARD_MAX_PAGES", DEFAULT_SHARD_MAX_PAGES)
+    if max_bytes is None:
+        max_bytes = getattr(settings, "PDF_SHARD_MAX_BYTES", DEFAULT_SHARD_MAX_BYTES)
+
+    if page_count <= 0:
+        return []
+
+    shard_count = max(
+        math.ceil(page_count / max_pages), math.ceil(file_size / max_bytes), 1
+    )
+    shard_count = min(shard_count, page_count)
+
+    # Spread pages evenly so the last shard is not a small leftover
+    bounds = [round(i * page_count / shard_count) for i in range(shard_count + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(shard_count)]
+
+
+def shard_key(job_id, shard_index):
+    """Storage key under which one shard's stamped pages wait for the merge"""
+    return f"shards/{job_id}_{shard_index:04d}.pdf"
+
+
+def shard_input_key(job_id, shard_index):
+    """Storage key of the (unstamped) pages handed to one shard"""
+    return f"shards/{job_id}_{shard_index:04d}_in.pdf"
+
+
+def shard_files(job_id, shard_count):
+    """Storage keys of every file the shards of a job may leave behind"""
+    keys = []
+    for shard_index in range(shard_count):
+        keys += [shard_key(job_id, shard_index), shard_input_key(job_id, shard_index)]
+    return keys
+
+
+def shard_task_id(job_id, shard_index):
+    """Celery task id of one shard, so a failing shard can revoke the others"""
+    return f"{job_id}-shard-{shard_index:04d}"
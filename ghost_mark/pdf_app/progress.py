@@ -0,0 +1,244 @@
+# pdf_app/progress.py
+"""
+Live progress reporting for processing jobs.
+
+Progress lives in a Redis hash per job (stage, pages done/total, stage start
+and per-stage timings) instead of the database, and page updates are
+batched so a worker writes at most once per JOB_PROGRESS_MIN_INTERVAL
+seconds. Every write is also announced on a per-job pub/sub channel so
+the events endpoint can push changes instead of polling. Progress is best
+effort: if Redis is unavailable, processing carries on without it.
+"""
+
+import json
+import time
+
+import redis
+import redis.asyncio
+from django.conf import settings
+
+# Defaults used when the JOB_PROGRESS_* settings are not set
+DEFAULT_PROGRESS_REDIS_URL = "redis://localhost:6379/0"
+DEFAULT_PROGRESS_MIN_INTERVAL = 0.5  # seconds between writes
+DEFAULT_PROGRESS_TTL = 3600  # seconds
+
+# How long to stop trying after Redis could not be reached
+REDIS_RETRY_DELAY = 30
+
+_redis_client = None
+_redis_disabled_until = 0.0
+
+
+def progress_key(job_id):
+    return f"job_progress:{job_id}"
+
+
+def job_events_channel(job_id):
+    return f"job_events:{job_id}"
+
+
+def _get_redis():
+    """Shared Redis client, or None while Redis is known to be unreachable"""
+    global _redis_client
+
+    if time.time() < _redis_disabled_until:
+        return None
+
+    if _redis_client is None:
+        url = getattr(settings, "JOB_PROGRESS_REDIS_URL", DEFAULT_PROGRESS_REDIS_URL)
+        _redis_client = redis.Redis.from_url(
+            url, socket_connect_timeout=0.5, socket_timeout=0.5, decode_responses=True
+        )
+    return _redis_client
+
+
+def async_redis_client():
+    """New asyncio Redis client (one per event loop / request)"""
+    url = getattr(settings, "JOB_PROGRESS_REDIS_URL", DEFAULT_PROGRESS_REDIS_URL)
+    return redis.asyncio.Redis.from_url(
+        url, socket_connect_timeout=0.5, decode_responses=True
+    )
+
+
+def _redis_failed(error):
+    global _redis_disabled_until
+
+    print(f"⚠️  Progress reporting unavailable: {error}")
+    _redis_disabled_until = time.time() + REDIS_RETRY_DELAY
+
+
+class ProgressReporter:
+    """
+    Collects progress for one job and writes it to Redis at a limited rate
+
+    Embedders call start_stage() once they know how many pages a stage
+    covers and advance() per page; the task calls finish() at the end.
+    A shared reporter (used by page-range shards) only adds pages to the
+    stage set up by the task that dispatched them.
+    """
+
+    def __init__(self, job_id, shared=False, min_interval=None):
+        self.job_id = job_id
+        self.key = progress_key(job_id)
+        self.shared = shared
+        self.min_interval = (
+            min_interval
+            if min_interval is not None
+            else getattr(
+                settings, "JOB_PROGRESS_MIN_INTERVAL", DEFAULT_PROGRESS_MIN_INTERVAL
+            )
+        )
+        self.ttl = getattr(settings, "JOB_PROGRESS_TTL", DEFAULT_PROGRESS_TTL)
+
+        self.stage = None
+        self.stage_started = None
+        self.pending_fields = {}
+        self.pending_pages = 0
+        self.last_flush = 0.0
+
+    def start_stage(self, stage, total_pages=0):
+        """Begin a new stage (closes the timing of the previous one)"""
+        if self.shared:
+            return
+
+        self._end_stage()
+        self.stage = stage
+        self.stage_started = time.time()
+        self.pending_pages = 0
+        self.pending_fields.update(
+            {
+                "stage": stage,
+                "pages_total": total_pages,
+                "pages_done": 0,
+                "stage_started": self.stage_started,
+            }
+        )
+        self.flush()
+
+    def set_status(self, status):
+        """Record the job status (written with the next flush)"""
+        self.pending_fields["status"] = status
+
+    def resume_stage(self):
+        """Pick up the stage another process started (e.g. before sharding)"""
+        client = _get_redis()
+        if client is None:
+            return
+
+        try:
+            stage, started = client.hmget(self.key, "stage", "stage_started")
+        except redis.RedisError as e:
+            _redis_failed(e)
+            return
+
+        if stage and started:
+            self.stage = stage
+            self.stage_started = float(started)
+
+    def advance(self, pages=1):
+        """Count finished pages, writing them out if the interval has passed"""
+        self.pending_pages += pages
+        if time.time() - self.last_flush >= self.min_interval:
+            self.flush()
+
+    def finish(self, stage="completed"):
+        """Close the current stage and write everything that is pending"""
+        if not self.shared:
+            self._end_stage()
+            self.stage = None
+            self.pending_fields["stage"] = stage
+        self.flush()
+
+    def _end_stage(self):
+        if self.stage is not None:
+            elapsed = time.time() - self.stage_started
+            self.pending_fields[f"timing:{self.stage}"] = round(elapsed, 3)
+
+    def flush(self):
+        """Write pending fields and page counts in one round trip"""
+        client = _get_redis()
+        if client is not None and (self.pending_fields or self.pending_pages):
+            try:
+                pipe = client.pipeline(transaction=False)
+                if self.pending_fields:
+                    pipe.hset(self.key, mapping=self.pending_fields)
+                if self.pending_pages:
+                    pipe.hincrby(self.key, "pages_done", self.pending_pages)
+                pipe.expire(self.key, self.ttl)
+                pipe.publish(
+                    job_events_channel(self.job_id),
+                    json.dumps(
+                        {
+                            "stage": self.pending_fields.get("stage", self.stage),
+                            "status": self.pending_fields.get("status"),
+                        }
+                    ),
+                )
+                pipe.execute()
+            except redis.RedisError as e:
+                _redis_failed(e)
+
+        self.pending_fields = {}
+        self.pending_pages = 0
+        self.last_flush = time.time()
+
+
+def get_progress(job_id):
+    """
+    Current progress of a job
+
+    Returns:
+        Dict with status, stage, pages_done, pages_total, percent,
+        eta_seconds and stage_timings, or None if nothing was reported (or
+        Redis is down)
+    """
+    client = _get_redis()
+    if client is None:
+        return None
+
+    try:
+        fields = client.hgetall(progress_key(job_id))
+    except redis.RedisError as e:
+        _redis_failed(e)
+        return None
+
+    return _progress_from_fields(fields)
+
+
+async def aget_progress(client, job_id):
+    """get_progress for async views, using the caller's asyncio client"""
+    fields = await client.hgetall(progress_key(job_id))
+    return _progress_from_fields(fields)
+
+
+def _progress_from_fields(fields):
+    if not fields:
+        return None
+
+    pages_done = int(fields.get("pages_done", 0))
+    pages_total = int(fields.get("pages_total", 0))
+
+    # ETA for the current stage from its average time per page so far
+    eta_seconds = None
+    stage_started = fields.get("stage_started")
+    if stage_started and 0 < pages_done < pages_total:
+        elapsed = time.time() - float(stage_started)
+        eta_seconds = round(elapsed / pages_done * (pages_total - pages_done), 1)
+
+    return {
+        "status": fields.get("status"),
+        "stage": fields.get("stage"),
+        "pages_done": pages_done,
+        "pages_total": pages_total,
+        "percent": (
+            round(100 * min(pages_done, pages_total) / pages_total, 1)
+            if pages_total
+            else None
+        ),
+        "eta_seconds": eta_seconds,
+        "stage_timings": {
+            name[len("timing:") :]: float(value)
+            for name, value in fields.items()
+            if name.startswith("timing:")
+        },
+    }
@@ -0,0 +1,111 @@
+# pdf_app/routing.py
+"""
+Size-aware routing of processing tasks.
+
+All jobs used to share the pdf_processing queue, so even with a prefetch
+of one a single-page watermark could wait behind a run of 1,000-page
+documents. A job is now classified when it is created, from its page
+count (when the upload handler counted it) and input bytes:
+
+- fast: small documents (up to JOB_ROUTING_FAST_MAX_PAGES pages and
+  JOB_ROUTING_FAST_MAX_BYTES bytes), whatever the method
+- bulk: everything else, and the page-range shards and merges of sharded
+  jobs (routed statically in CELERY_TASK_ROUTES)
+
+Each class has its own queue (JOB_QUEUES), and smaller jobs get a better
+Celery priority, which the broker serves first across all queues. Every
+worker pool takes both queues (see start_workers.sh): keeping workers for
+small jobs only, or a separate pool for font steganography (which only
+writes the last page's footer), left large jobs waiting for capacity and
+made the overall p99 worse (python -m benchmarks.queue_routing).
+"""
+
+from django.conf import settings
+
+# Defaults used when the JOB_QUEUES / JOB_ROUTING_* settings are not set
+DEFAULT_JOB_QUEUES = {"fast": "pdf_fast", "bulk": "pdf_bulk"}
+DEFAULT_JOB_ROUTING_FAST_MAX_PAGES = 20
+DEFAULT_JOB_ROUTING_FAST_MAX_BYTES = 5 * 1024 * 1024  # 5MB
+
+# Page count assumed per this many bytes when the pages were not counted
+ESTIMATED_PAGE_BYTES = 100 * 1024
+
+# Priorities handed out (0 is served first by the Redis broker); the
+# broker stores them in the levels of its priority_steps
+PRIORITY_LEVELS = 10
+
+# kombu's defaults, used unless CELERY_BROKER_TRANSPORT_OPTIONS sets them
+DEFAULT_PRIORITY_SEP = "\x06\x16"
+DEFAULT_PRIORITY_STEPS = [0, 3, 6, 9]
+
+
+def job_queues():
+    return getattr(settings, "JOB_QUEUES", DEFAULT_JOB_QUEUES)
+
+
+def classify_job(job, input_size, page_count=None):
+    """
+    Routing class of a new job
+
+    Args:
+        job: PDFProcessingJob
+        input_size: Size of the input PDF in bytes
+        page_count: Pages of the input, or None if not counted
+
+    Returns:
+        "fast" or "bulk"
+    """
+    max_pages = getattr(
+        settings, "JOB_ROUTING_FAST_MAX_PAGES", DEFAULT_JOB_ROUTING_FAST_MAX_PAGES
+    )
+    max_bytes = getattr(
+        settings, "JOB_ROUTING_FAST_MAX_BYTES", DEFAULT_JOB_ROUTING_FAST_MAX_BYTES
+    )
+
+    pages = page_count or estimated_pages(input_size)
+    if pages <= max_pages and input_size <= max_bytes:
+        return "fast"
+    return "bulk"
+
+
+def estimated_pages(input_size):
+    return max(1, -(-input_size // ESTIMATED_PAGE_BYTES))
+
+
+def job_priority(input_size, page_count=None):
+    """Celery priority of a job: 0 for one page, one level worse per doubling"""
+    pages = page_count or estimated_pages(input_size)
+    return min(PRIORITY_LEVELS - 1, pages.bit_length() - 1)
+
+
+def job_route(job, input_size, page_count=None):
+    """
+    Queue and priority a job's processing task is sent with
+
+    Returns:
+        Dict of apply_async / signature options
+    """
+    job_class = classify_job(job, input_size, page_count)
+    return {
+        "queue": job_queues()[job_class],
+        "priority": job_priority(input_size, page_count),
+    }
+
+
+def priority_steps():
+    options = getattr(settings, "CELERY_BROKER_TRANSPORT_OPTIONS", {})
+    return options.get("priority_steps", DEFAULT_PRIORITY_STEPS)
+
+
+def priority_level(priority):
+    """Priority step the broker files a task of this priority under"""
+    return max(step for step in priority_steps() if step <= priority)
+
+
+def broker_queue_keys(queue):
+    """Redis lists holding a queue's waiting tasks, one per priority level"""
+    options = getattr(settings, "CELERY_BROKER_TRANSPORT_OPTIONS", {})
+    sep = options.get("sep", DEFAULT_PRIORITY_SEP)
+    steps = priority_steps()
+    # Level 0 is the plain queue name
+    return [f"{queue}{sep}{level}" if level else queue for level in steps]
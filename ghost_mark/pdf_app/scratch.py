@@ -0,0 +1,266 @@
+# pdf_app/scratch.py
+"""
+Scratch space for short-lived files.
+
+Code that needs temporary files opens a scratch space and creates them
+through it:
+
+    with ScratchSpace("recover_email") as scratch:
+        path = scratch.save_upload(uploaded_file)
+        ...
+
+Every file lives in a directory private to the space, and that directory
+is removed when the block exits, however it exits.
+
+Files go to one of two tiers:
+
+    "memory": SCRATCH_TMPFS_DIR, a RAM-backed directory (/dev/shm or a
+              tmpfs mount), for files up to SCRATCH_TMPFS_MAX_FILE bytes
+              while the tier is under SCRATCH_TMPFS_QUOTA and the mount
+              has room. Disabled unless SCRATCH_TMPFS_DIR is set.
+    "disk":   SCRATCH_DISK_DIR (MEDIA_ROOT/temp) for everything else
+
+Bytes are reserved before a file is written. One space may hold at most
+SCRATCH_JOB_QUOTA bytes and all open spaces of the process together
+SCRATCH_GLOBAL_QUOTA; a file that would go over either raises
+ScratchQuotaExceeded. scratch_stats() reports the bytes in use per tier.
+"""
+
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+# Defaults used when the SCRATCH_* settings are not set
+DEFAULT_SCRATCH_TMPFS_MAX_FILE = 8 * 1024 * 1024  # 8MB
+DEFAULT_SCRATCH_TMPFS_QUOTA = 256 * 1024 * 1024  # 256MB
+DEFAULT_SCRATCH_JOB_QUOTA = 512 * 1024 * 1024  # 512MB per space
+DEFAULT_SCRATCH_GLOBAL_QUOTA = 4 * 1024 * 1024 * 1024  # 4GB per process
+
+TIERS = ["memory", "disk"]
+
+# Bytes reserved per tier by the open spaces of this process
+_lock = threading.Lock()
+_bytes_in_use = dict.fromkeys(TIERS, 0)
+_peak_bytes = dict.fromkeys(TIERS, 0)
+_files_in_use = dict.fromkeys(TIERS, 0)
+_open_spaces = 0
+_quota_rejections = 0
+
+
+class ScratchQuotaExceeded(Exception):
+    """A scratch file would go over the per-space or global byte quota"""
+
+
+def tier_directory(tier):
+    """Root directory of a tier (None when the tier is not configured)"""
+    if tier == "memory":
+        return getattr(settings, "SCRATCH_TMPFS_DIR", None)
+    return getattr(settings, "SCRATCH_DISK_DIR", None) or os.path.join(
+        settings.MEDIA_ROOT, "temp"
+    )
+
+
+def _fits_in_memory_tier(size):
+    directory = tier_directory("memory")
+    if not directory:
+        return False
+
+    max_file = getattr(
+        settings, "SCRATCH_TMPFS_MAX_FILE", DEFAULT_SCRATCH_TMPFS_MAX_FILE
+    )
+    quota = getattr(settings, "SCRATCH_TMPFS_QUOTA", DEFAULT_SCRATCH_TMPFS_QUOTA)
+    if size > max_file or _bytes_in_use["memory"] + size > quota:
+        return False
+
+    # Other processes share the mount, so check what is really free
+    try:
+        os.makedirs(directory, exist_ok=True)
+        return shutil.disk_usage(directory).free > size
+    except OSError:
+        return False
+
+
+class ScratchSpace:
+    """
+    A set of temporary files removed together when the space is closed
+
+    Args:
+        label: Job id or caller name, used in the directory name and logs
+    """
+
+    def __init__(self, label):
+        global _open_spaces
+
+        self.label = label
+        self.name = f"{label}_{uuid.uuid4().hex[:12]}"
+        self.job_quota = getattr(
+            settings, "SCRATCH_JOB_QUOTA", DEFAULT_SCRATCH_JOB_QUOTA
+        )
+        self.directories = {}  # tier -> this space's directory in it
+        self.reserved = dict.fromkeys(TIERS, 0)
+        self.files = dict.fromkeys(TIERS, 0)
+        self.closed = False
+
+        with _lock:
+            _open_spaces += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def bytes_in_use(self):
+        return sum(self.reserved.values())
+
+    def _reserve(self, size):
+        """Account for `size` more bytes and pick the tier they go to"""
+        global _quota_rejections
+
+        global_quota = getattr(
+            settings, "SCRATCH_GLOBAL_QUOTA", DEFAULT_SCRATCH_GLOBAL_QUOTA
+        )
+        with _lock:
+            if self.bytes_in_use + size > self.job_quota:
+                _quota_rejections += 1
+                raise ScratchQuotaExceeded(
+                    f"Scratch space {self.label} would exceed "
+                    f"{self.job_quota} bytes"
+                )
+            if sum(_bytes_in_use.values()) + size > global_quota:
+                _quota_rejections += 1
+                raise ScratchQuotaExceeded(
+                    f"Scratch space is full ({global_quota} bytes in use)"
+                )
+
+            tier = "memory" if _fits_in_memory_tier(size) else "disk"
+            _bytes_in_use[tier] += size
+            _peak_bytes[tier] = max(_peak_bytes[tier], _bytes_in_use[tier])
+            _files_in_use[tier] += 1
+            self.reserved[tier] += size
+            self.files[tier] += 1
+        return tier
+
+    def path(self, suffix="", size=0):
+        """
+        Reserve a new file path (the caller writes the file)
+
+        Args:
+            suffix: File name suffix, e.g. ".pdf"
+            size: Expected size in bytes, used for the tier and the quotas
+
+        Returns:
+            Absolute path of a file that does not exist yet
+
+        Raises:
+            ScratchQuotaExceeded: The file would go over a quota
+        """
+        if self.closed:
+            raise RuntimeError(f"Scratch space {self.label} is closed")
+
+        tier = self._reserve(size)
+        directory = self.directories.get(tier)
+        if directory is None:
+            directory = os.path.join(tier_directory(tier), self.name)
+            os.makedirs(directory, exist_ok=True)
+            self.directories[tier] = directory
+        return os.path.join(directory, f"{uuid.uuid4().hex}{suffix}")
+
+    def write(self, content, suffix=""):
+        """Write bytes to a new scratch file and return its path"""
+        path = self.path(suffix, len(content))
+        with open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def save_upload(self, uploaded_file, suffix=None):
+        """
+        Copy an uploaded file into a new scratch file, chunk by chunk
+
+        The suffix defaults to the upload's extension.
+        """
+        if suffix is None:
+            suffix = os.path.splitext(uploaded_file.name or "")[1].lower()
+        path = self.path(suffix, uploaded_file.size or 0)
+        with open(path, "wb") as f:
+            for chunk in uploaded_file.chunks():
+                f.write(chunk)
+        return path
+
+    def close(self):
+        """Delete every file of the space and release its reservations"""
+        global _open_spaces
+
+        if self.closed:
+            return
+        self.closed = True
+
+        for directory in self.directories.values():
+            shutil.rmtree(directory, ignore_errors=True)
+
+        with _lock:
+            _open_spaces -= 1
+            for tier in TIERS:
+                _bytes_in_use[tier] -= self.reserved[tier]
+                _files_in_use[tier] -= self.files[tier]
+
+
+def scratch_stats():
+    """Bytes and files in use per tier, plus the configured limits"""
+    with _lock:
+        tiers = {
+            tier: {
+                "directory": tier_directory(tier),
+                "bytes_in_use": _bytes_in_use[tier],
+                "peak_bytes": _peak_bytes[tier],
+                "files": _files_in_use[tier],
+            }
+            for tier in TIERS
+        }
+        open_spaces = _open_spaces
+        quota_rejections = _quota_rejections
+
+    tiers["memory"]["quota"] = getattr(
+        settings, "SCRATCH_TMPFS_QUOTA", DEFAULT_SCRATCH_TMPFS_QUOTA
+    )
+    return {
+        "tiers": tiers,
+        "bytes_in_use": sum(tier["bytes_in_use"] for tier in tiers.values()),
+        "open_spaces": open_spaces,
+        "quota_rejections": quota_rejections,
+        "job_quota": getattr(settings, "SCRATCH_JOB_QUOTA", DEFAULT_SCRATCH_JOB_QUOTA),
+        "global_quota": getattr(
+            settings, "SCRATCH_GLOBAL_QUOTA", DEFAULT_SCRATCH_GLOBAL_QUOTA
+        ),
+    }
+
+
+def sweep_stale_spaces(max_age):
+    """
+    Remove space directories left behind by processes that died
+
+    Returns:
+        Number of directories removed
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    for tier in TIERS:
+        root = tier_directory(tier)
+        if not root or not os.path.isdir(root):
+            continue
+        with os.scandir(root) as entries:
+            stale = [
+                entry.path
+                for entry in entries
+                if entry.is_dir(follow_symlinks=False)
+                and entry.stat(follow_symlinks=False).st_mtime < cutoff
+            ]
+        for path in stale:
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+    return removed
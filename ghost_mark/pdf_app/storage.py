@@ -0,0 +1,303 @@
+# pdf_app/storage.py
+"""
+Storage of job inputs, outputs and shards.
+
+Job files are addressed by keys such as "temp_uploads/<job_id>_<name>",
+"processed/processed_<job_id>_<name>" and "shards/<job_id>_0000.pdf";
+the job's input_file_path / output_file_path hold these keys. The backend
+is chosen with JOB_STORAGE_BACKEND:
+
+    "local": files under MEDIA_ROOT (the key is the path below it). Web and
+             worker nodes have to share that directory.
+    "s3":    an S3-compatible bucket (AWS S3, MinIO, a moto server), so
+             workers need no shared filesystem. Transfers are streamed with
+             boto3's managed transfers (multipart above
+             JOB_STORAGE_MULTIPART_THRESHOLD) and downloads are handed out
+             as presigned URLs.
+
+Keys that are absolute paths (rows written before keys were used) are read
+as local files by the local backend.
+"""
+
+import hashlib
+import os
+import shutil
+from contextlib import closing
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Defaults used when the JOB_STORAGE_* settings are not set
+DEFAULT_PRESIGN_EXPIRY = 300  # seconds a presigned download URL stays valid
+DEFAULT_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+DEFAULT_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+DEFAULT_TRANSFER_CONCURRENCY = 4
+
+COPY_CHUNK_SIZE = 64 * 1024
+S3_DELETE_BATCH = 1000  # most keys one DeleteObjects call accepts
+
+_storage = None
+
+
+def get_job_storage():
+    """The configured job storage backend (created once per process)"""
+    global _storage
+
+    if _storage is None:
+        backend = getattr(settings, "JOB_STORAGE_BACKEND", "local")
+        if backend == "local":
+            _storage = LocalJobStorage()
+        elif backend == "s3":
+            _storage = S3JobStorage()
+        else:
+            raise ImproperlyConfigured(f"Unknown JOB_STORAGE_BACKEND: {backend}")
+    return _storage
+
+
+def fetch_to_scratch(storage, key, scratch, suffix=".pdf"):
+    """
+    Local path of a stored file, downloaded into `scratch` if needed
+
+    Args:
+        storage: Job storage backend
+        key: Key of the file
+        scratch: ScratchSpace that owns the downloaded copy
+        suffix: File name suffix of the copy
+
+    Returns:
+        Path of a local file with the content
+    """
+    path = storage.local_path(key)
+    if path:
+        return path
+
+    path = scratch.path(suffix, storage.size(key))
+    storage.download(key, path)
+    return path
+
+
+class _HashingReader:
+    """Read-only, non-seekable wrapper hashing everything read through it"""
+
+    def __init__(self, file_obj):
+        self.file_obj = file_obj
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self.file_obj.read(size)
+        self.digest.update(data)
+        return data
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+
+class LocalJobStorage:
+    """Job files on the local filesystem under MEDIA_ROOT"""
+
+    name = "local"
+
+    def __init__(self):
+        self.root = str(
+            getattr(settings, "JOB_STORAGE_LOCAL_ROOT", None) or settings.MEDIA_ROOT
+        )
+
+    def local_path(self, key):
+        if os.path.isabs(key):
+            return key
+        return os.path.join(self.root, *key.split("/"))
+
+    def _target(self, key):
+        path = self.local_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def save(self, key, file_obj):
+        """Stream a file object into storage; returns its hex SHA-256"""
+        reader = _HashingReader(file_obj)
+        with open(self._target(key), "wb") as target:
+            shutil.copyfileobj(reader, target, COPY_CHUNK_SIZE)
+        return reader.hexdigest()
+
+    def save_file(self, key, path, move=False):
+        """Store a local file (moved instead of copied when `move`)"""
+        target = self._target(key)
+        if move:
+            try:
+                os.replace(path, target)
+                return
+            except OSError:
+                pass  # Different filesystem: copy, then remove
+        shutil.copyfile(path, target)
+        if move:
+            os.remove(path)
+
+    def save_bytes(self, key, content):
+        with open(self._target(key), "wb") as f:
+            f.write(content)
+
+    def open(self, key):
+        return open(self.local_path(key), "rb")
+
+    def read(self, key):
+        with self.open(key) as f:
+            return f.read()
+
+    def download(self, key, path):
+        shutil.copyfile(self.local_path(key), path)
+
+    def exists(self, key):
+        return bool(key) and os.path.exists(self.local_path(key))
+
+    def size(self, key):
+        return os.path.getsize(self.local_path(key))
+
+    def delete_many(self, keys):
+        """Delete files, ignoring missing ones; returns how many were removed"""
+        removed = 0
+        for key in keys:
+            if not key:
+                continue
+            try:
+                os.remove(self.local_path(key))
+                removed += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error removing file {key}: {e}")
+        return removed
+
+    def url(self, key, filename):
+        """Local files are sent by the download views, not linked directly"""
+        return None
+
+
+class S3JobStorage:
+    """Job files in an S3-compatible bucket"""
+
+    name = "s3"
+
+    def __init__(self):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError:
+            raise ImproperlyConfigured(
+                'JOB_STORAGE_BACKEND = "s3" requires boto3 (pip install boto3)'
+            )
+
+        self.bucket = getattr(settings, "JOB_STORAGE_S3_BUCKET", None)
+        if not self.bucket:
+            raise ImproperlyConfigured("JOB_STORAGE_S3_BUCKET is not set")
+        self.prefix = getattr(settings, "JOB_STORAGE_S3_PREFIX", "")
+
+        # Credentials come from the usual boto3 chain (environment, profile,
+        # instance role)
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=getattr(settings, "JOB_STORAGE_S3_ENDPOINT_URL", None),
+            region_name=getattr(settings, "JOB_STORAGE_S3_REGION", None),
+            config=Config(signature_version="s3v4"),
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=getattr(
+                settings, "JOB_STORAGE_MULTIPART_THRESHOLD", DEFAULT_MULTIPART_THRESHOLD
+            ),
+            multipart_chunksize=getattr(
+                settings, "JOB_STORAGE_MULTIPART_CHUNKSIZE", DEFAULT_MULTIPART_CHUNKSIZE
+            ),
+            max_concurrency=getattr(
+                settings,
+                "JOB_STORAGE_TRANSFER_CONCURRENCY",
+                DEFAULT_TRANSFER_CONCURRENCY,
+            ),
+        )
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    def local_path(self, key):
+        return None
+
+    def save(self, key, file_obj):
+        """Stream a file object into storage; returns its hex SHA-256"""
+        # Not seekable, so the parts are read (and hashed) in order
+        reader = _HashingReader(file_obj)
+        self.client.upload_fileobj(
+            reader, self.bucket, self._key(key), Config=self.transfer_config
+        )
+        return reader.hexdigest()
+
+    def save_file(self, key, path, move=False):
+        """Store a local file (parts are uploaded in parallel)"""
+        self.client.upload_file(
+            path, self.bucket, self._key(key), Config=self.transfer_config
+        )
+        if move:
+            os.remove(path)
+
+    def save_bytes(self, key, content):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=content)
+
+    def open(self, key):
+        """Streaming body of the object (read it in chunks)"""
+        response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        return closing(response["Body"])
+
+    def read(self, key):
+        with self.open(key) as body:
+            return body.read()
+
+    def download(self, key, path):
+        self.client.download_file(
+            self.bucket, self._key(key), path, Config=self.transfer_config
+        )
+
+    def _head(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                return None
+            raise
+
+    def exists(self, key):
+        return bool(key) and self._head(key) is not None
+
+    def size(self, key):
+        head = self._head(key)
+        if head is None:
+            raise FileNotFoundError(f"No such object: {self._key(key)}")
+        return head["ContentLength"]
+
+    def delete_many(self, keys):
+        """Delete objects in batches; returns how many deletions were sent"""
+        keys = [self._key(key) for key in keys if key]
+        for i in range(0, len(keys), S3_DELETE_BATCH):
+            response = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={
+                    "Objects": [{"Key": key} for key in keys[i : i + S3_DELETE_BATCH]],
+                    "Quiet": True,
+                },
+            )
+            for error in response.get("Errors", []):
+                print(f"Error removing object {error['Key']}: {error['Message']}")
+        return len(keys)
+
+    def url(self, key, filename):
+        """Presigned, expiring GET URL that downloads as `filename`"""
+        expiry = getattr(settings, "JOB_STORAGE_PRESIGN_EXPIRY", DEFAULT_PRESIGN_EXPIRY)
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._key(key),
+                "ResponseContentType": "application/pdf",
+                "ResponseContentDisposition": f'attachment; filename="{filename}"',
+            },
+            ExpiresIn=expiry,
+        )
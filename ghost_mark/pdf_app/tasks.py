@@ -1,39 +1,56 @@
 # pdf_app/tasks.py
 import os
-import uuid
 import time
 from io import BytesIO
-from celery import shared_task
+import fitz  # PyMuPDF
+from celery import chord, shared_task
 from django.conf import settings
 from django.utils import timezone
-from django.core.files.storage import default_storage
-
-from .models import PDFProcessingJob
+from django.db.models import Q
+
+from .models import ChunkedUpload, PDFBatchJob, PDFProcessingJob
+from .chunked_uploads import DEFAULT_CHUNKED_UPLOAD_EXPIRY
+from .admission import reconcile_jobs_in_flight, release_job_bytes
+from .archive import purge_archive
+from .cleanup import (
+    DEFAULT_ORPHAN_MAX_AGE,
+    cleanup_batch_size,
+    delete_chunked_uploads,
+    delete_jobs,
+    sweep_scratch_files,
+    timed,
+)
+from .dedup import register_processed_output
+from .job_state import (
+    apply_job_states,
+    cache_job_fields,
+    increment_job_state,
+    update_job_state,
+    write_back_job_states,
+)
 from .watermark.service import PDFWatermarkService
-from .utils import add_qr_code_to_pdf, encode_message_in_pdf_font_stego
-
-
-def create_temp_file_from_content(file_content, prefix="temp_"):
-    """Helper function to create temporary files from file content"""
-    temp_dir = getattr(settings, "MEDIA_ROOT", "/tmp")
-    os.makedirs(temp_dir, exist_ok=True)
-
-    temp_filename = f"{prefix}{uuid.uuid4().hex}.pdf"
-    temp_path = os.path.join(temp_dir, temp_filename)
-
-    with open(temp_path, "wb") as destination:
-        destination.write(file_content)
-
-    return temp_path
-
-
-def cleanup_temp_file(file_path):
-    """Helper function to clean up temporary files"""
-    try:
-        if file_path and os.path.exists(file_path):
-            os.remove(file_path)
-    except Exception as e:
-        print(f"Error cleaning up temp file {file_path}: {e}")
+from .pipeline.engine import ALL_METHODS, run_pipeline
+from .progress import ProgressReporter
+from .scratch import ScratchSpace, sweep_stale_spaces
+from .storage import fetch_to_scratch, get_job_storage
+from .pipeline.sharding import (
+    SHARDABLE_JOB_TYPES,
+    plan_page_shards,
+    shard_files,
+    shard_input_key,
+    shard_key,
+    shard_task_id,
+)
+from .utils import add_qr_code_to_pdf_bytes, encode_message_in_pdf_font_stego_bytes
+from .webhooks import (
+    DEFAULT_WEBHOOK_BATCH_WINDOW,
+    DEFAULT_WEBHOOK_MAX_RETRIES,
+    claim_callback_batch,
+    expire_stale_callbacks,
+    job_event,
+    post_events,
+    retry_delay,
+)
 
 
 @shared_task(bind=True)
@@ -46,183 +63,422 @@ def process_pdf_task(self, job_id):
         job = PDFProcessingJob.objects.get(job_id=job_id)
 
         # Update status and start time
-        job.status = "PROCESSING"
-        job.started_at = timezone.now()
-        job.save()
+        update_job_state(job, status="PROCESSING", started_at=timezone.now())
 
         start_time = time.time()
+        progress = ProgressReporter(job_id)
+        progress.set_status("PROCESSING")
+        progress.start_stage("load")
 
         print(f"🚀 Starting job {job_id} - Type: {job.job_type}")
 
         # Read the input file
-        if not job.input_file_path or not os.path.exists(job.input_file_path):
+        storage = get_job_storage()
+        if not job.input_file_path or not storage.exists(job.input_file_path):
             raise Exception("Input file not found")
-
-        with open(job.input_file_path, "rb") as f:
-            current_pdf_content = f.read()
-
-        temp_files = []  # Track temp files for cleanup
+        current_pdf_content = storage.read(job.input_file_path)
+
+        # Large per-page jobs are split across workers instead
+        if job.job_type in SHARDABLE_JOB_TYPES:
+            with fitz.open(stream=current_pdf_content, filetype="pdf") as doc:
+                page_count = len(doc)
+            shards = plan_page_shards(page_count, len(current_pdf_content))
+            if len(shards) > 1:
+                return dispatch_sharded_job(
+                    job, current_pdf_content, shards, start_time, progress
+                )
 
         # Process based on job type
         if job.job_type == "watermark":
-            current_pdf_content = process_watermark(current_pdf_content, job)
+            current_pdf_content = process_watermark(current_pdf_content, job, progress)
 
         elif job.job_type == "qr_code":
-            current_pdf_content = process_qr_code(current_pdf_content, job, temp_files)
+            current_pdf_content = process_qr_code(current_pdf_content, job, progress)
 
         elif job.job_type == "font_stego":
-            current_pdf_content = process_font_stego(
-                current_pdf_content, job, temp_files
-            )
+            current_pdf_content = process_font_stego(current_pdf_content, job, progress)
 
         elif job.job_type == "all_methods":
             current_pdf_content = process_all_methods(
-                current_pdf_content, job, temp_files
+                current_pdf_content, job, progress
             )
 
         elif job.job_type == "selected_methods":
             current_pdf_content = process_selected_methods(
-                current_pdf_content, job, temp_files
+                current_pdf_content, job, progress
             )
 
         else:
             raise Exception(f"Unknown job type: {job.job_type}")
 
         # Save the output file
-        output_filename = f"processed_{job_id}_{job.original_filename}"
-        output_path = os.path.join(settings.MEDIA_ROOT, "processed", output_filename)
+        progress.start_stage("save")
+        output_key = job_output_key(job)
+        storage.save_bytes(output_key, current_pdf_content)
+
+        return complete_job(job, output_key, start_time, progress)
+
+    except Exception as e:
+        fail_job(job_id, e)
+
+        # Re-raise the exception so Celery knows the task failed
+        raise
+
+
+def job_output_key(job):
+    """Storage key of the processed file for a job"""
+    filename = os.path.basename(job.original_filename)
+    return f"processed/processed_{job.job_id}_{filename}"
+
+
+def complete_job(job, output_key, start_time, progress=None):
+    """Mark a job completed and build the task result"""
+    processing_time = time.time() - start_time
+    update_job_state(
+        job,
+        status="COMPLETED",
+        completed_at=timezone.now(),
+        output_file_path=output_key,
+        processing_time=processing_time,
+    )
+    release_job_bytes(job.job_id)
+
+    if progress:
+        progress.set_status("COMPLETED")
+        progress.finish("completed")
+
+    print(f"✅ Job {job.job_id} completed in {processing_time:.2f} seconds")
+    register_processed_output(job)
+    queue_job_callback(job)
+
+    return {
+        "job_id": job.job_id,
+        "status": "COMPLETED",
+        "processing_time": processing_time,
+        "output_key": output_key,
+    }
+
 
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+def fail_job(job_id, error):
+    """Record a failure on the job (never raises)"""
+    print(f"❌ Job {job_id} failed: {str(error)}")
 
-        with open(output_path, "wb") as f:
-            f.write(current_pdf_content)
+    # Update job with error info
+    try:
+        job = PDFProcessingJob.objects.get(job_id=job_id)
+        update_job_state(
+            job,
+            status="FAILED",
+            error_message=str(error),
+            completed_at=timezone.now(),
+        )
+    except:
+        job = None
+    release_job_bytes(job_id)
 
-        # Update job with completion info
-        processing_time = time.time() - start_time
-        job.status = "COMPLETED"
-        job.completed_at = timezone.now()
-        job.output_file_path = output_path
-        job.processing_time = processing_time
-        job.save()
+    progress = ProgressReporter(job_id)
+    progress.set_status("FAILED")
+    progress.finish("failed")
 
-        # Cleanup temp files
-        for temp_file in temp_files:
-            cleanup_temp_file(temp_file)
+    if job is not None:
+        queue_job_callback(job)
 
-        print(f"✅ Job {job_id} completed in {processing_time:.2f} seconds")
 
-        return {
-            "job_id": job_id,
-            "status": "COMPLETED",
-            "processing_time": processing_time,
-            "output_path": output_path,
-        }
+def queue_job_callback(job):
+    """Schedule the completion webhook of a finished job (never raises)"""
+    if not job.callback_url:
+        return
 
+    try:
+        job.callback_status = "PENDING"
+        job.save(update_fields=["callback_status"])
+        cache_job_fields([job], ["callback_status"])
+
+        # Wait a little so jobs finishing together share one request
+        deliver_job_callbacks.apply_async(
+            args=[job.callback_url],
+            countdown=getattr(
+                settings, "WEBHOOK_BATCH_WINDOW", DEFAULT_WEBHOOK_BATCH_WINDOW
+            ),
+        )
     except Exception as e:
-        print(f"❌ Job {job_id} failed: {str(e)}")
-
-        # Update job with error info
-        try:
-            job = PDFProcessingJob.objects.get(job_id=job_id)
-            job.status = "FAILED"
-            job.error_message = str(e)
-            job.completed_at = timezone.now()
-            job.save()
-        except:
-            pass
+        print(f"⚠️  Could not queue callback for job {job.job_id}: {e}")
 
-        # Re-raise the exception so Celery knows the task failed
+
+# Delivery state written after every webhook attempt
+CALLBACK_FIELDS = [
+    "callback_status",
+    "callback_attempts",
+    "callback_error",
+    "callback_latency",
+]
+
+
+@shared_task(bind=True, max_retries=None)
+def deliver_job_callbacks(self, callback_url, job_ids=None):
+    """
+    Deliver the pending completion webhooks of one endpoint as a batch
+
+    Failed deliveries are retried with exponential backoff, keeping the
+    same batch, until WEBHOOK_MAX_RETRIES is reached.
+    """
+    if job_ids is None:
+        job_ids = claim_callback_batch(callback_url)
+        if not job_ids:
+            return {"callback_url": callback_url, "delivered": 0}
+
+    jobs = list(PDFProcessingJob.objects.filter(id__in=job_ids))
+    if not jobs:
+        return {"callback_url": callback_url, "delivered": 0}
+    # The final state may not be written back to the table yet
+    apply_job_states(jobs)
+
+    attempt = self.request.retries + 1
+    result = post_events(callback_url, [job_event(job) for job in jobs])
+
+    if result["success"]:
+        delivered_at = timezone.now()
+        for job in jobs:
+            job.callback_status = "DELIVERED"
+            job.callback_attempts = attempt
+            job.callback_error = None
+            if job.completed_at:
+                job.callback_latency = (delivered_at - job.completed_at).total_seconds()
+        PDFProcessingJob.objects.bulk_update(jobs, CALLBACK_FIELDS)
+        cache_job_fields(jobs, CALLBACK_FIELDS)
+        print(
+            f"📬 Delivered {len(jobs)} callback(s) to {callback_url} (attempt {attempt})"
+        )
+
+        # Jobs that finished while this batch was being sent
+        if PDFProcessingJob.objects.filter(
+            callback_url=callback_url, callback_status="PENDING"
+        ).exists():
+            deliver_job_callbacks.delay(callback_url)
+
+        return {"callback_url": callback_url, "delivered": len(jobs)}
+
+    max_retries = getattr(settings, "WEBHOOK_MAX_RETRIES", DEFAULT_WEBHOOK_MAX_RETRIES)
+    gave_up = self.request.retries >= max_retries
+    failure = {
+        "callback_status": "FAILED" if gave_up else "SENDING",
+        "callback_attempts": attempt,
+        "callback_error": result["error"],
+    }
+    PDFProcessingJob.objects.filter(id__in=job_ids).update(**failure)
+    for job in jobs:
+        for name, value in failure.items():
+            setattr(job, name, value)
+    cache_job_fields(jobs, list(failure))
+
+    if gave_up:
+        print(
+            f"❌ Giving up on {len(jobs)} callback(s) to {callback_url}: {result['error']}"
+        )
+        return {"callback_url": callback_url, "delivered": 0, "error": result["error"]}
+
+    countdown = retry_delay(self.request.retries)
+    print(
+        f"⚠️  Callback to {callback_url} failed ({result['error']}), retrying in {countdown}s"
+    )
+    raise self.retry(args=[callback_url, job_ids], countdown=countdown)
+
+
+def dispatch_sharded_job(job, pdf_content, shards, start_time, progress):
+    """
+    Fan a job out as one task per page range, merged by a chord callback
+
+    The input is split here, once: every shard gets a file with just its
+    own pages instead of downloading the whole document.
+    """
+    # Shards add their pages to this stage; the merge task closes it
+    progress.start_stage(job.job_type, shards[-1][1])
+
+    update_job_state(job, shard_count=len(shards), shards_completed=0)
+
+    print(f"🧩 Job {job.job_id}: splitting into {len(shards)} shards")
+
+    storage = get_job_storage()
+    with fitz.open(stream=pdf_content, filetype="pdf") as source:
+        for shard_index, (first_page, end_page) in enumerate(shards):
+            with fitz.open() as pages:
+                pages.insert_pdf(source, from_page=first_page, to_page=end_page - 1)
+                storage.save_bytes(
+                    shard_input_key(job.job_id, shard_index), pages.tobytes()
+                )
+
+    header = [
+        process_pdf_shard.s(
+            job.job_id, shard_index, first_page, end_page, len(shards)
+        ).set(task_id=shard_task_id(job.job_id, shard_index))
+        for shard_index, (first_page, end_page) in enumerate(shards)
+    ]
+    chord(header)(merge_pdf_shards.s(job.job_id, start_time))
+
+    return {"job_id": job.job_id, "status": "PROCESSING", "shards": len(shards)}
+
+
+def revoke_other_shards(task, job_id, shard_index, shard_count):
+    """Revoke the shards of a failed job that have not started yet (never raises)"""
+    task_ids = [
+        shard_task_id(job_id, other)
+        for other in range(shard_count)
+        if other != shard_index
+    ]
+    try:
+        task.app.control.revoke(task_ids)
+    except Exception as e:
+        print(f"⚠️  Could not revoke the other shards of job {job_id}: {e}")
+
+
+@shared_task(bind=True)
+def process_pdf_shard(self, job_id, shard_index, first_page, end_page, shard_count):
+    """
+    Stamp one page range of a sharded job and save it for the merge
+
+    The first shard to fail fails the job and revokes the others.
+    """
+    try:
+        job = PDFProcessingJob.objects.get(job_id=job_id)
+        print(
+            f"🧩 Job {job_id}: shard {shard_index} (pages {first_page + 1}-{end_page})"
+        )
+
+        storage = get_job_storage()
+        input_key = shard_input_key(job_id, shard_index)
+        with ScratchSpace(f"{job_id}_{shard_index:04d}") as scratch:
+            shard = fitz.open(fetch_to_scratch(storage, input_key, scratch))
+
+            # Only the document's real first page is left unstamped
+            progress = ProgressReporter(job_id, shared=True)
+            PDFWatermarkService.add_invisible_watermark_to_document(
+                shard,
+                job.watermark_text,
+                skip_first_page=first_page == 0,
+                progress=progress,
+            )
+            progress.finish()
+
+            shard_path = scratch.path(".pdf", storage.size(input_key))
+            shard.save(shard_path)
+            shard.close()
+
+            key = shard_key(job_id, shard_index)
+            storage.save_file(key, shard_path, move=True)
+        storage.delete_many([input_key])
+
+        increment_job_state(job_id, "shards_completed")
+
+        return key
+
+    except Exception as e:
+        fail_job(job_id, e)
+        revoke_other_shards(self, job_id, shard_index, shard_count)
+        raise
+
+
+@shared_task(bind=True)
+def merge_pdf_shards(self, shard_keys, job_id, start_time):
+    """
+    Chord callback: concatenate the stamped shards into the job output
+    """
+    storage = get_job_storage()
+    try:
+        job = PDFProcessingJob.objects.get(job_id=job_id)
+        print(f"🧩 Job {job_id}: merging {len(shard_keys)} shards")
+
+        progress = ProgressReporter(job_id)
+        progress.resume_stage()
+        progress.start_stage("merge", len(shard_keys))
+
+        with ScratchSpace(f"{job_id}_merge") as scratch:
+            output = fitz.open()
+            for key in shard_keys:
+                with fitz.open(fetch_to_scratch(storage, key, scratch)) as shard:
+                    output.insert_pdf(shard)
+                progress.advance()
+
+            progress.start_stage("save")
+            output_path = scratch.path(".pdf", storage.size(job.input_file_path))
+            output.save(output_path)
+            output.close()
+
+            output_key = job_output_key(job)
+            storage.save_file(output_key, output_path, move=True)
+
+        return complete_job(job, output_key, start_time, progress)
+
+    except Exception as e:
+        fail_job(job_id, e)
         raise
 
+    finally:
+        storage.delete_many(shard_files(job_id, len(shard_keys)))
+
 
-def process_watermark(pdf_content, job):
+def process_watermark(pdf_content, job, progress=None):
     """Process watermark only"""
     pdf_buffer = BytesIO(pdf_content)
     watermarked_pdf = PDFWatermarkService.add_invisible_watermark(
-        pdf_buffer, job.watermark_text, PDFWatermarkService.WATERMARK_COLOR
+        pdf_buffer,
+        job.watermark_text,
+        PDFWatermarkService.WATERMARK_COLOR,
+        progress=progress,
     )
     return watermarked_pdf.getvalue()
 
 
-def process_qr_code(pdf_content, job, temp_files):
+def process_qr_code(pdf_content, job, progress=None):
     """Process QR code only"""
-    temp_input_path = create_temp_file_from_content(pdf_content, "qr_input_")
-    temp_output_path = os.path.join(
-        os.path.dirname(temp_input_path), f"qr_output_{uuid.uuid4().hex}.pdf"
-    )
-
-    temp_files.extend([temp_input_path, temp_output_path])
-
-    add_qr_code_to_pdf(temp_input_path, temp_output_path, job.email)
-
-    with open(temp_output_path, "rb") as f:
-        return f.read()
+    return add_qr_code_to_pdf_bytes(pdf_content, job.email, progress=progress)
 
 
-def process_font_stego(pdf_content, job, temp_files):
+def process_font_stego(pdf_content, job, progress=None):
     """Process font steganography only"""
-    temp_input_path = create_temp_file_from_content(pdf_content, "font_input_")
-    temp_output_path = os.path.join(
-        os.path.dirname(temp_input_path), f"font_output_{uuid.uuid4().hex}.pdf"
-    )
-
-    temp_files.extend([temp_input_path, temp_output_path])
-
-    result = encode_message_in_pdf_font_stego(
-        temp_input_path, temp_output_path, job.secret_message, job.cover_text
+    result = encode_message_in_pdf_font_stego_bytes(
+        pdf_content,
+        job.secret_message,
+        job.cover_text,
+        multi_page=job.multi_page,
+        progress=progress,
     )
 
     if not result["success"]:
         raise Exception(result["error"])
 
-    with open(temp_output_path, "rb") as f:
-        return f.read()
+    return result["pdf_content"]
 
 
-def process_all_methods(pdf_content, job, temp_files):
-    """Process all methods in sequence"""
-    current_content = pdf_content
-
-    # Step 1: Watermark (if enabled and has text)
-    if job.watermark_text:
-        print(f"  Adding watermark...")
-        current_content = process_watermark(current_content, job)
-
-    # Step 2: QR Code (if enabled and has email)
-    if job.email:
-        print(f"  Adding QR code...")
-        current_content = process_qr_code(current_content, job, temp_files)
-
-    # Step 3: Font Steganography (if enabled and has required params)
-    if job.secret_message and job.cover_text:
-        print(f"  Adding font steganography...")
-        current_content = process_font_stego(current_content, job, temp_files)
+def pipeline_params(job):
+    """Method parameters of a job, as the pipeline engine expects them"""
+    return {
+        "watermark_text": job.watermark_text,
+        "email": job.email,
+        "secret_message": job.secret_message,
+        "cover_text": job.cover_text,
+        "multi_page": job.multi_page,
+    }
 
-    return current_content
 
+def process_methods(pdf_content, job, methods, progress=None):
+    """Run several methods through the fused pipeline (one parse, one save)"""
+    result = run_pipeline(pdf_content, methods, pipeline_params(job), progress)
 
-def process_selected_methods(pdf_content, job, temp_files):
-    """Process selected methods in order"""
-    current_content = pdf_content
-    methods = job.selected_methods.split(",") if job.selected_methods else []
+    if not result["success"]:
+        raise Exception(result["error"])
 
-    for method in methods:
-        method = method.strip()
+    return result["pdf_content"]
 
-        if method == "watermark" and job.watermark_text:
-            print(f"  Adding watermark...")
-            current_content = process_watermark(current_content, job)
 
-        elif method == "qr_code" and job.email:
-            print(f"  Adding QR code...")
-            current_content = process_qr_code(current_content, job, temp_files)
+def process_all_methods(pdf_content, job, progress=None):
+    """Process all methods in sequence"""
+    return process_methods(pdf_content, job, ALL_METHODS, progress)
 
-        elif method == "font_stego" and job.secret_message and job.cover_text:
-            print(f"  Adding font steganography...")
-            current_content = process_font_stego(current_content, job, temp_files)
 
-    return current_content
+def process_selected_methods(pdf_content, job, progress=None):
+    """Process selected methods in order"""
+    methods = job.selected_methods.split(",") if job.selected_methods else []
+    return process_methods(pdf_content, job, methods, progress)
 
 
 @shared_task
@@ -234,20 +490,102 @@ def cleanup_expired_jobs():
     from django.utils import timezone
     from datetime import timedelta
 
-    # Find jobs older than 15 minutes
+    # Find jobs older than 15 minutes (keeping those whose webhook is still
+    # being delivered, until the retry horizon expires it).
+    # Files of a batch are kept until 15 minutes after the whole batch has
+    # finished, so its ZIP can still be downloaded.
     cutoff_time = timezone.now() - timedelta(minutes=15)
-    expired_jobs = PDFProcessingJob.objects.filter(created_at__lt=cutoff_time)
-
-    cleaned_count = 0
-    for job in expired_jobs:
-        try:
-            # Clean up files
-            job.cleanup_files()
-            # Delete the job record
-            job.delete()
-            cleaned_count += 1
-        except Exception as e:
-            print(f"Error cleaning up job {job.job_id}: {e}")
-
-    print(f"🧹 Cleaned up {cleaned_count} expired jobs")
-    return f"Cleaned up {cleaned_count} expired jobs"
+    active_batches = PDFProcessingJob.objects.filter(
+        batch__isnull=False, status__in=["PENDING", "PROCESSING"]
+    ).values("batch_id")
+    expired_jobs = (
+        PDFProcessingJob.objects.filter(
+            Q(batch__isnull=True, created_at__lt=cutoff_time)
+            | Q(batch__isnull=False, completed_at__lt=cutoff_time)
+        )
+        .exclude(callback_status__in=["PENDING", "SENDING"])
+        .exclude(batch__in=active_batches)
+    )
+
+    durations = {}
+    # Bring the table up to date with the job state held in Redis
+    with timed(durations, "job_state"):
+        write_back_job_states()
+        # Inputs of jobs that ended without releasing their admission bytes
+        reconcile_jobs_in_flight()
+        # Webhooks whose delivery task was lost
+        callbacks_expired = expire_stale_callbacks()
+
+    with timed(durations, "jobs"):
+        jobs_deleted, job_files = delete_jobs(expired_jobs)
+
+    # Batches whose jobs are all gone
+    with timed(durations, "batches"):
+        batches_deleted, _ = PDFBatchJob.objects.filter(
+            created_at__lt=cutoff_time, jobs__isnull=True
+        ).delete()
+
+    # Chunked uploads abandoned (or finalized) more than CHUNKED_UPLOAD_EXPIRY ago
+    upload_expiry = getattr(
+        settings, "CHUNKED_UPLOAD_EXPIRY", DEFAULT_CHUNKED_UPLOAD_EXPIRY
+    )
+    with timed(durations, "chunked_uploads"):
+        uploads_deleted, upload_files = delete_chunked_uploads(
+            ChunkedUpload.objects.filter(
+                updated_at__lt=timezone.now() - timedelta(seconds=upload_expiry)
+            )
+        )
+
+    # Audit records past JOB_ARCHIVE_DAYS
+    with timed(durations, "archive"):
+        archive_purged = purge_archive(cleanup_batch_size())
+
+    report = {
+        "jobs": jobs_deleted,
+        "callbacks_expired": callbacks_expired,
+        "batches": batches_deleted,
+        "chunked_uploads": uploads_deleted,
+        "archive_purged": archive_purged,
+        "files": job_files + upload_files,
+        "seconds": durations,
+    }
+    print(
+        f"🧹 Cleaned up {jobs_deleted} expired jobs, {batches_deleted} batches, "
+        f"{uploads_deleted} chunked uploads ({report['files']} files), "
+        f"expired {callbacks_expired} callbacks, purged {archive_purged} archived jobs "
+        f"in {sum(durations.values()):.2f}s"
+    )
+    return report
+
+
+@shared_task
+def sweep_orphan_files():
+    """
+    Delete scratch files nothing refers to any more
+    Run this periodically (e.g., every hour)
+    """
+    durations = {}
+    with timed(durations, "sweep"):
+        result = sweep_scratch_files()
+        result["spaces"] = sweep_stale_spaces(
+            getattr(settings, "CLEANUP_ORPHAN_MAX_AGE", DEFAULT_ORPHAN_MAX_AGE)
+        )
+
+    print(
+        f"🧹 Swept {result['files']} orphaned files "
+        f"({result['bytes'] / (1024 * 1024):.1f} MB) and {result['spaces']} "
+        f"stale scratch spaces in {durations['sweep']:.2f}s"
+    )
+    return {**result, "seconds": durations}
+
+
+@shared_task
+def flush_job_states():
+    """
+    Write job state changed in Redis back to the database in batches
+    Queued by the state changes themselves; beat also runs it every minute
+    """
+    written = write_back_job_states()
+    if written:
+        print(f"💾 Wrote back the state of {written} jobs")
+    return {"jobs": written}
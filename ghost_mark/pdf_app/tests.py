@@ -1,3 +1,1169 @@
-from django.test import TestCase
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+import fitz  # PyMuPDF
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.response import Response
+
+from api.serializers import AsyncWatermarkSerializer, WatermarkSerializer
+from api import views_async
+from api.views_async import admission_controlled
+
+from . import admission, progress, storage, tasks, utils, webhooks
+from .chunked_uploads import append_chunk
+from .cleanup import delete_jobs, sweep_scratch_files
+from .dedup import register_processed_output, reuse_processed_output
+from .job_state import (
+    DIRTY_SET,
+    apply_job_state,
+    init_job_states,
+    update_job_state,
+    write_back_job_states,
+)
+from .pipeline.sharding import shard_files, shard_input_key, shard_task_id
+from .models import ArchivedJob, ChunkedUpload, PDFProcessingJob, ProcessedOutput
+from .storage import S3_DELETE_BATCH, LocalJobStorage, S3JobStorage
+from .tasks import cleanup_expired_jobs
+from .utils import (
+    add_border_to_pdf,
+    bits_to_text,
+    binary_to_string,
+    decode_border_from_pdf,
+    decode_message_from_pdf_font_stego,
+    email_to_number,
+    encode_message_in_pdf_font_stego_bytes,
+    pack_payload,
+    string_to_binary,
+    unpack_payload,
+)
+
+# Redis-backed tests need fakeredis (requirements-test.txt)
+try:
+    import fakeredis
+    import fakeredis.aioredis
+except ImportError:
+    fakeredis = None
+
+# The S3 tests need boto3 and moto[server] (requirements-test.txt)
+try:
+    import boto3
+    from moto.server import ThreadedMotoServer
+except ImportError:
+    boto3 = None
+
+
+class FakeRedisMixin:
+    """Point the shared progress / admission Redis client at fakeredis"""
+
+    def setUp(self):
+        super().setUp()
+        self.redis_server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeRedis(
+            server=self.redis_server, decode_responses=True
+        )
+        for name, value in [
+            ("_redis_client", self.redis),
+            ("_redis_disabled_until", 0),
+        ]:
+            patcher = mock.patch.object(progress, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class MediaRootMixin:
+    """Local job storage in a temporary MEDIA_ROOT"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            JOB_STORAGE_BACKEND="local",
+            JOB_STORAGE_LOCAL_ROOT=None,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = mock.patch.object(storage, "_storage", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def media_file(self, key, content=b"%PDF-1.4", age=0):
+        """Write a file below MEDIA_ROOT, `age` seconds old; returns its path"""
+        path = os.path.join(self.media_root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(content)
+        if age:
+            mtime = time.time() - age
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def create_job(self, age=None, **fields):
+        """PDFProcessingJob created `age` ago (default: just now)"""
+        fields.setdefault("job_id", f"job-{PDFProcessingJob.objects.count()}")
+        fields.setdefault("job_type", "watermark")
+        fields.setdefault("original_filename", "document.pdf")
+        job = PDFProcessingJob.objects.create(**fields)
+        if age is not None:
+            PDFProcessingJob.objects.filter(pk=job.pk).update(
+                created_at=timezone.now() - age
+            )
+        return job
+
+
+def sample_pdf(pages):
+    """PDF bytes with one line of text on each page"""
+    with fitz.open() as doc:
+        for number in range(pages):
+            doc.new_page().insert_text((72, 72), f"Page {number + 1}")
+        return doc.tobytes()
+
+
+class PayloadFramingTests(SimpleTestCase):
+    """pack_payload / unpack_payload framing of font steganography messages"""
+
+    def test_round_trip(self):
+        for message in ["Hello, world!", "Grüße, 世界 🙂", ""]:
+            with self.subTest(message=message):
+                self.assertEqual(unpack_payload(pack_payload(message)), message)
+
+    def test_trailing_bits_are_ignored(self):
+        bits = np.concatenate([pack_payload("secret"), np.ones(13, dtype=np.uint8)])
+        self.assertEqual(unpack_payload(bits), "secret")
+
+    def test_flipped_bit_fails_crc(self):
+        bits = pack_payload("secret message")
+        for index in [40, len(bits) - 1]:  # First and last payload bit
+            with self.subTest(index=index):
+                corrupted = bits.copy()
+                corrupted[index] ^= 1
+                with self.assertRaisesRegex(ValueError, "CRC"):
+                    unpack_payload(corrupted)
+
+    def test_truncated_frame_is_rejected(self):
+        bits = pack_payload("secret message")
+        with self.assertRaisesRegex(ValueError, "Truncated"):
+            unpack_payload(bits[:-8])
+        with self.assertRaisesRegex(ValueError, "header"):
+            unpack_payload(bits[:16])
+
+    def test_too_long_message_is_rejected(self):
+        with self.assertRaises(ValueError):
+            pack_payload("x" * 0x10000)
+
+    def test_legacy_payload_falls_back_to_ascii(self):
+        # Footers written before framing carry the bare 8-bit ASCII codes
+        bits = np.array([int(bit) for bit in string_to_binary("Hi there")])
+        with self.assertRaises(ValueError):
+            unpack_payload(bits)
+        self.assertEqual(binary_to_string(bits_to_text(bits)), "Hi there")
+
+
+class LocalJobStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+
+    def test_save_file_move(self):
+        source = os.path.join(self.root, "scratch.pdf")
+        with open(source, "wb") as f:
+            f.write(b"%PDF-1.4 moved")
+
+        with override_settings(JOB_STORAGE_LOCAL_ROOT=self.root):
+            storage = LocalJobStorage()
+            storage.save_file("processed/out.pdf", source, move=True)
+
+            self.assertFalse(os.path.exists(source))
+            self.assertEqual(storage.read("processed/out.pdf"), b"%PDF-1.4 moved")
+
+
+@unittest.skipIf(boto3 is None, "boto3 and moto[server] are required")
+class S3JobStorageTests(SimpleTestCase):
+    """S3JobStorage against a local moto S3 server"""
+
+    bucket = "ghost-mark-test"
+    part_size = 5 * 1024 * 1024  # Smallest part S3 accepts
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)  # Request log
+        cls.server = ThreadedMotoServer(ip_address="127.0.0.1", port=0)
+        cls.server.start()
+        host, port = cls.server.get_host_and_port()
+        cls.endpoint_url = f"http://{host}:{port}"
+
+        cls.environ = {
+            "AWS_ACCESS_KEY_ID": "testing",
+            "AWS_SECRET_ACCESS_KEY": "testing",
+        }
+        cls.saved_environ = {name: os.environ.get(name) for name in cls.environ}
+        os.environ.update(cls.environ)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+        for name, value in cls.saved_environ.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        super().tearDownClass()
+
+    def setUp(self):
+        settings = override_settings(
+            JOB_STORAGE_S3_BUCKET=self.bucket,
+            JOB_STORAGE_S3_PREFIX="jobs/",
+            JOB_STORAGE_S3_ENDPOINT_URL=self.endpoint_url,
+            JOB_STORAGE_S3_REGION="us-east-1",
+            JOB_STORAGE_MULTIPART_THRESHOLD=self.part_size,
+            JOB_STORAGE_MULTIPART_CHUNKSIZE=self.part_size,
+            JOB_STORAGE_PRESIGN_EXPIRY=300,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.storage = S3JobStorage()
+        self.storage.client.create_bucket(Bucket=self.bucket)
+        self.addCleanup(self.empty_bucket)
+
+    def empty_bucket(self):
+        client = self.storage.client
+        for page in client.get_paginator("list_objects_v2").paginate(
+            Bucket=self.bucket
+        ):
+            for obj in page.get("Contents", []):
+                client.delete_object(Bucket=self.bucket, Key=obj["Key"])
+        client.delete_bucket(Bucket=self.bucket)
+
+    def head(self, key):
+        return self.storage.client.head_object(Bucket=self.bucket, Key=f"jobs/{key}")
+
+    def test_save_multipart_returns_sha256(self):
+        content = os.urandom(2 * self.part_size + 123)
+        digest = self.storage.save("temp_uploads/big.pdf", io.BytesIO(content))
+
+        self.assertEqual(digest, hashlib.sha256(content).hexdigest())
+        # Multipart uploads get an ETag of "<hash>-<part count>"
+        self.assertTrue(self.head("temp_uploads/big.pdf")["ETag"].endswith('-3"'))
+        self.assertEqual(self.storage.size("temp_uploads/big.pdf"), len(content))
+
+    def test_save_small_file_in_one_request(self):
+        self.storage.save("temp_uploads/small.pdf", io.BytesIO(b"%PDF-1.4 small"))
+        self.assertNotIn("-", self.head("temp_uploads/small.pdf")["ETag"])
+
+    def test_open_read_and_download(self):
+        content = b"%PDF-1.4 " + os.urandom(4096)
+        self.storage.save_bytes("processed/out.pdf", content)
+
+        with self.storage.open("processed/out.pdf") as body:
+            self.assertEqual(body.read(), content)
+        self.assertEqual(self.storage.read("processed/out.pdf"), content)
+
+        with tempfile.TemporaryDirectory() as scratch:
+            path = os.path.join(scratch, "out.pdf")
+            self.storage.download("processed/out.pdf", path)
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), content)
+
+    def test_save_file_move(self):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b"%PDF-1.4 moved")
+        self.storage.save_file("processed/moved.pdf", f.name, move=True)
+
+        self.assertFalse(os.path.exists(f.name))
+        self.assertEqual(self.storage.read("processed/moved.pdf"), b"%PDF-1.4 moved")
+
+    def test_missing_key(self):
+        self.assertFalse(self.storage.exists("processed/missing.pdf"))
+        self.assertFalse(self.storage.exists(""))
+        with self.assertRaises(FileNotFoundError):
+            self.storage.size("processed/missing.pdf")
+
+    def test_delete_many_across_batches(self):
+        keys = [f"shards/job_{i:04d}.pdf" for i in range(S3_DELETE_BATCH + 5)]
+        for key in keys:
+            self.storage.save_bytes(key, b"x")
+        keep = "shards/other.pdf"
+        self.storage.save_bytes(keep, b"x")
+
+        self.assertEqual(self.storage.delete_many(keys + [None, ""]), len(keys))
+
+        remaining = self.storage.client.list_objects_v2(Bucket=self.bucket)
+        self.assertEqual(
+            [obj["Key"] for obj in remaining["Contents"]], [f"jobs/{keep}"]
+        )
+
+    def test_url_is_presigned_attachment(self):
+        import requests
+
+        self.storage.save_bytes("processed/out.pdf", b"%PDF-1.4 url")
+        url = self.storage.url("processed/out.pdf", "report.pdf")
+
+        parts = urlsplit(url)
+        query = parse_qs(parts.query)
+        self.assertEqual(parts.path, f"/{self.bucket}/jobs/processed/out.pdf")
+        self.assertIn("X-Amz-Signature", query)
+        self.assertEqual(query["X-Amz-Expires"], ["300"])
+        self.assertEqual(
+            query["response-content-disposition"],
+            ['attachment; filename="report.pdf"'],
+        )
+
+        response = requests.get(url, timeout=10)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"%PDF-1.4 url")
+        self.assertEqual(
+            response.headers["Content-Disposition"],
+            'attachment; filename="report.pdf"',
+        )
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is required")
+@override_settings(
+    ADMISSION_ENABLED=True,
+    ADMISSION_QUEUES=["pdf_fast"],
+    ADMISSION_MAX_QUEUE_LENGTH=3,
+    ADMISSION_MAX_BYTES_IN_FLIGHT=100,
+    ADMISSION_CLIENT_RATE=None,
+    ADMISSION_DRAIN_WINDOW=60,
+    ADMISSION_RETRY_AFTER=30,
+)
+class AdmissionTests(FakeRedisMixin, SimpleTestCase):
+    # 30 seconds into an epoch minute, so a 60s drain window spans 30s
+    now = 1_000_050.0
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(admission.time, "time", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def held(self):
+        return self.redis.zcard(admission.HELD_KEY)
+
+    def controlled_view(self):
+        @admission_controlled
+        def view(request):
+            self.assertEqual(self.held(), 1)  # Bytes held while the view runs
+            return Response(status=202)
+
+        return view
+
+    def test_full_queue_gets_429_with_retry_after(self):
+        self.redis.rpush("pdf_fast", *range(4))
+        request = RequestFactory().post("/", CONTENT_LENGTH="10")
+
+        response = self.controlled_view()(request)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.data["reason"], "queue")
+        # No jobs drained yet: the ADMISSION_RETRY_AFTER fallback
+        self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(self.held(), 0)
+
+    def test_retry_after_follows_drain_rate(self):
+        self.redis.rpush("pdf_fast", *range(5))
+        # 30 jobs finished over the 30s of the window: 1 job per second
+        self.redis.hset(admission.drained_key(int(self.now // 60)), "jobs", 30)
+
+        result = admission.admit("client", 10)
+
+        self.assertEqual(result.reason, "queue")
+        self.assertEqual(result.retry_after, 3)  # 5 - 3 + 1 jobs to drain
+
+    def test_admitted_request_releases_its_bytes(self):
+        response = self.controlled_view()(
+            RequestFactory().post("/", CONTENT_LENGTH="60")
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.held(), 0)
+
+    def test_bytes_in_flight(self):
+        first = admission.admit("a", 80)
+        self.assertTrue(first.admitted)
+
+        second = admission.admit("b", 50)
+        self.assertEqual(second.reason, "bytes")
+        self.assertEqual(self.held(), 1)  # The rejected request holds nothing
+
+        first.release()
+        self.assertTrue(admission.admit("b", 50).admitted)
+
+    def test_job_bytes_released_once(self):
+        admission.track_job_bytes({"job-1": 70})
+        self.assertEqual(admission.admit("a", 40).reason, "bytes")
+
+        admission.release_job_bytes("job-1")
+        admission.release_job_bytes("job-1")  # Second release is a no-op
+
+        self.assertEqual(int(self.redis.get(admission.JOB_BYTES_KEY)), 0)
+        drained = self.redis.hgetall(admission.drained_key(int(self.now // 60)))
+        self.assertEqual(drained, {"jobs": "1", "bytes": "70"})
+        self.assertTrue(admission.admit("a", 40).admitted)
+
+    @override_settings(ADMISSION_CLIENT_RATE=0.5, ADMISSION_CLIENT_BURST=2)
+    def test_client_bucket_refills(self):
+        self.assertTrue(admission.admit("a", 0).admitted)
+        self.assertTrue(admission.admit("a", 0).admitted)
+
+        rejected = admission.admit("a", 0)
+        self.assertEqual(rejected.reason, "client")
+        self.assertEqual(rejected.retry_after, 2)  # One token at 0.5/s
+        self.assertTrue(admission.admit("b", 0).admitted)  # Own bucket
+
+        self.now += 2
+        self.assertTrue(admission.admit("a", 0).admitted)
+        self.assertEqual(admission.admit("a", 0).reason, "client")
+
+    def test_client_id(self):
+        request = RequestFactory().post(
+            "/",
+            REMOTE_ADDR="127.0.0.1",
+            HTTP_X_FORWARDED_FOR="6.6.6.6, 203.0.113.9",
+        )
+        self.assertEqual(admission.request_client_id(request), "127.0.0.1")
+
+        with override_settings(ADMISSION_CLIENT_HEADER="HTTP_X_FORWARDED_FOR"):
+            # The first entry is whatever the client sent
+            self.assertEqual(admission.request_client_id(request), "203.0.113.9")
+            with override_settings(ADMISSION_TRUSTED_PROXIES=3):
+                self.assertEqual(admission.request_client_id(request), "127.0.0.1")
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is required")
+class CleanupTests(FakeRedisMixin, MediaRootMixin, TestCase):
+    def test_expired_job_is_archived_before_delete(self):
+        self.media_file("processed/old.pdf")
+        old = self.create_job(
+            age=timedelta(hours=1),
+            job_type="font_stego",
+            status="COMPLETED",
+            secret_message="meet at noon",
+            cover_text="nothing to see here",
+            output_file_path="processed/old.pdf",
+        )
+        recent = self.create_job(status="COMPLETED")
+
+        report = cleanup_expired_jobs()
+
+        self.assertEqual(report["jobs"], 1)
+        self.assertFalse(
+            os.path.exists(os.path.join(self.media_root, "processed/old.pdf"))
+        )
+        self.assertEqual(
+            list(PDFProcessingJob.objects.values_list("job_id", flat=True)),
+            [recent.job_id],
+        )
+        archived = ArchivedJob.objects.get(job_id=old.job_id)
+        self.assertEqual(archived.status, "COMPLETED")
+        # The secret and cover text themselves are not kept
+        self.assertEqual(
+            archived.params,
+            {
+                "secret_message_length": 12,
+                "secret_message_sha256": hashlib.sha256(b"meet at noon").hexdigest(),
+                "cover_text_length": 19,
+            },
+        )
+
+    def test_shared_output_is_kept_until_its_last_job(self):
+        path = self.media_file("processed/shared.pdf")
+        ProcessedOutput.objects.create(
+            dedup_key="k" * 64, output_file_path="processed/shared.pdf", ref_count=2
+        )
+        jobs = [
+            self.create_job(
+                status="COMPLETED",
+                dedup_key="k" * 64,
+                output_file_path="processed/shared.pdf",
+            )
+            for _ in range(2)
+        ]
+
+        delete_jobs(PDFProcessingJob.objects.filter(pk=jobs[0].pk))
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(ProcessedOutput.objects.get().ref_count, 1)
+
+        _, files_removed = delete_jobs(PDFProcessingJob.objects.all())
+        self.assertEqual(files_removed, 1)
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(ProcessedOutput.objects.exists())
+
+    def test_sweep_removes_only_old_unreferenced_files(self):
+        hour = 3600
+        orphan = self.media_file("temp/orphan.pdf", age=2 * hour)
+        root_orphan = self.media_file("temp_view.pdf", age=2 * hour)
+        referenced = self.media_file("temp/input.pdf", age=2 * hour)
+        fresh = self.media_file("temp/fresh.pdf")
+        not_scratch = self.media_file("logo.png", age=2 * hour)
+        self.create_job(status="PROCESSING", input_file_path="temp/input.pdf")
+
+        result = sweep_scratch_files(max_age=hour)
+
+        self.assertEqual(result, {"files": 2, "bytes": 16})
+        for path in [orphan, root_orphan]:
+            self.assertFalse(os.path.exists(path))
+        for path in [referenced, fresh, not_scratch]:
+            self.assertTrue(os.path.exists(path))
+
+
+def resolves_to(address):
+    """socket.getaddrinfo stand-in resolving every host to `address`"""
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        return [(None, None, None, "", (address, port))]
+
+    return getaddrinfo
+
+
+class CallbackUrlTests(SimpleTestCase):
+    def test_internal_hosts_are_rejected(self):
+        for url in [
+            "http://127.0.0.1:8000/hook",
+            "http://localhost/hook",
+            "http://169.254.169.254/latest/meta-data/",
+            "http://10.0.0.5/hook",
+            "http://[::1]/hook",
+            "http://[::ffff:192.168.1.1]/hook",
+            "ftp://hooks.example.com/hook",
+        ]:
+            with self.subTest(url=url):
+                self.assertIsNotNone(webhooks.callback_url_error(url))
+
+    def test_host_is_checked_by_its_addresses(self):
+        url = "https://hooks.example.com/hook"
+        with mock.patch.object(webhooks.socket, "getaddrinfo", resolves_to("10.1.2.3")):
+            self.assertIn("non-public", webhooks.callback_url_error(url))
+        with mock.patch.object(
+            webhooks.socket, "getaddrinfo", resolves_to("93.184.216.34")
+        ):
+            self.assertIsNone(webhooks.callback_url_error(url))
+            with override_settings(WEBHOOK_ALLOWED_HOSTS=["example.org"]):
+                self.assertIn("not allowed", webhooks.callback_url_error(url))
+
+    def test_only_async_endpoints_take_a_callback_url(self):
+        def data():
+            return {
+                "pdf_file": SimpleUploadedFile("in.pdf", b"%PDF-1.4"),
+                "watermark_text": "CONFIDENTIAL",
+                "callback_url": "http://169.254.169.254/latest/meta-data/",
+            }
+
+        serializer = AsyncWatermarkSerializer(data=data())
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("callback_url", serializer.errors)
+
+        # The synchronous views answer directly and never send webhooks
+        serializer = WatermarkSerializer(data=data())
+        self.assertTrue(serializer.is_valid())
+        self.assertNotIn("callback_url", serializer.validated_data)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is required")
+@override_settings(WEBHOOK_SIGNING_SECRET="test-secret", WEBHOOK_MAX_RETRIES=2)
+class WebhookDeliveryTests(FakeRedisMixin, MediaRootMixin, TestCase):
+    """deliver_job_callbacks against a stand-in receiver"""
+
+    url = "https://hooks.example.com/ghost-mark"
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(
+            webhooks.socket, "getaddrinfo", resolves_to("93.184.216.34")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Eager retries only run again when the Retry is not propagated
+        conf = tasks.deliver_job_callbacks.app.conf
+        self.addCleanup(
+            setattr, conf, "task_eager_propagates", conf.task_eager_propagates
+        )
+        conf.task_eager_propagates = False
+
+    def receiver(self, *status_codes):
+        """Patch requests.post to answer with status_codes in turn"""
+        patcher = mock.patch.object(
+            webhooks.requests,
+            "post",
+            side_effect=[mock.Mock(status_code=code) for code in status_codes],
+        )
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def pending_jobs(self, count):
+        return [
+            self.create_job(
+                status="COMPLETED",
+                completed_at=timezone.now(),
+                callback_url=self.url,
+                callback_status="PENDING",
+            )
+            for _ in range(count)
+        ]
+
+    def test_batch_is_signed_and_delivered(self):
+        jobs = self.pending_jobs(2)
+        post = self.receiver(204)
+
+        tasks.deliver_job_callbacks.apply(args=[self.url])
+
+        post.assert_called_once()
+        body = post.call_args.kwargs["data"]
+        headers = post.call_args.kwargs["headers"]
+        self.assertTrue(
+            webhooks.verify_signature(
+                body,
+                headers[webhooks.TIMESTAMP_HEADER],
+                headers[webhooks.SIGNATURE_HEADER],
+                secret="test-secret",
+            )
+        )
+        self.assertFalse(
+            webhooks.verify_signature(
+                body + b" ",
+                headers[webhooks.TIMESTAMP_HEADER],
+                headers[webhooks.SIGNATURE_HEADER],
+                secret="test-secret",
+            )
+        )
+        events = json.loads(body)["events"]
+        self.assertEqual(
+            [event["job_id"] for event in events], [job.job_id for job in jobs]
+        )
+        self.assertEqual(events[0]["event"], "job.completed")
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.callback_status, "DELIVERED")
+            self.assertEqual(job.callback_attempts, 1)
+
+    def test_failed_delivery_is_retried_with_backoff(self):
+        [job] = self.pending_jobs(1)
+        post = self.receiver(503, 500, 200)
+
+        with mock.patch.object(
+            tasks, "retry_delay", wraps=webhooks.retry_delay
+        ) as retry_delay:
+            tasks.deliver_job_callbacks.apply(args=[self.url])
+
+        self.assertEqual(post.call_count, 3)
+        self.assertEqual([c.args for c in retry_delay.call_args_list], [(0,), (1,)])
+        job.refresh_from_db()
+        self.assertEqual(job.callback_status, "DELIVERED")
+        self.assertEqual(job.callback_attempts, 3)
+
+    def test_delivery_gives_up_after_max_retries(self):
+        [job] = self.pending_jobs(1)
+        post = self.receiver(500, 500, 500)
+
+        tasks.deliver_job_callbacks.apply(args=[self.url])
+
+        self.assertEqual(post.call_count, 3)
+        job.refresh_from_db()
+        self.assertEqual(job.callback_status, "FAILED")
+        self.assertEqual(job.callback_attempts, 3)
+        self.assertEqual(job.callback_error, "Endpoint answered HTTP 500")
+
+    @override_settings(WEBHOOK_RETRY_BACKOFF=10, WEBHOOK_RETRY_BACKOFF_MAX=60)
+    def test_backoff_doubles_up_to_the_maximum(self):
+        self.assertEqual(
+            [webhooks.retry_delay(retries) for retries in range(5)],
+            [10, 20, 40, 60, 60],
+        )
+
+    def test_lost_deliveries_expire(self):
+        horizon = webhooks.callback_retry_horizon()
+        lost = self.create_job(
+            status="COMPLETED",
+            completed_at=timezone.now() - horizon - timedelta(minutes=1),
+            callback_url=self.url,
+            callback_status="SENDING",
+        )
+        [sending] = self.pending_jobs(1)
+
+        self.assertEqual(webhooks.expire_stale_callbacks(), 1)
+
+        lost.refresh_from_db()
+        sending.refresh_from_db()
+        self.assertEqual(lost.callback_status, "FAILED")
+        self.assertEqual(sending.callback_status, "PENDING")
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is required")
+@override_settings(PDF_SHARD_MAX_PAGES=2)
+class ShardedJobTests(FakeRedisMixin, MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.storage = storage.get_job_storage()
+        self.storage.save_bytes("temp_uploads/job_in.pdf", sample_pdf(5))
+        self.job = self.create_job(
+            job_id="job",
+            watermark_text="CONFIDENTIAL",
+            input_file_path="temp_uploads/job_in.pdf",
+        )
+        conf = tasks.process_pdf_shard.app.conf
+        self.addCleanup(
+            setattr, conf, "task_eager_propagates", conf.task_eager_propagates
+        )
+        conf.task_eager_propagates = False
+
+    def test_shards_fetch_only_their_pages_and_are_merged(self):
+        with mock.patch.object(
+            tasks, "fetch_to_scratch", wraps=tasks.fetch_to_scratch
+        ) as fetch:
+            result = tasks.process_pdf_task.apply(args=["job"]).get()
+
+        self.assertEqual(result["shards"], 3)
+        fetched = [c.args[1] for c in fetch.call_args_list]
+        self.assertEqual(fetched[:3], [shard_input_key("job", i) for i in range(3)])
+        self.assertNotIn("temp_uploads/job_in.pdf", fetched)
+
+        apply_job_state(self.job)
+        self.assertEqual(self.job.status, "COMPLETED")
+        with fitz.open(stream=self.storage.read(self.job.output_file_path)) as doc:
+            texts = [page.get_text() for page in doc]
+        self.assertEqual(len(texts), 5)
+        for number, text in enumerate(texts):
+            self.assertIn(f"Page {number + 1}", text)
+            # Every page but the first carries the watermark
+            self.assertEqual("CONFIDENTIAL" in text, number > 0)
+        for key in shard_files("job", 3):
+            self.assertFalse(self.storage.exists(key))
+
+    def test_failed_shard_revokes_the_others(self):
+        control = tasks.process_pdf_shard.app.control
+        with mock.patch.object(control, "revoke") as revoke:
+            # The shard's pages were never stored
+            result = tasks.process_pdf_shard.apply(args=["job", 1, 2, 4, 3])
+
+        self.assertEqual(result.state, "FAILURE")
+        revoke.assert_called_once_with(
+            [shard_task_id("job", 0), shard_task_id("job", 2)]
+        )
+        apply_job_state(self.job)
+        self.assertEqual(self.job.status, "FAILED")
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is required")
+@override_settings(ADMISSION_ENABLED=False)
+class ChunkedUploadTests(FakeRedisMixin, MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = sample_pdf(3)
+        response = self.client.post(
+            "/api/uploads/",
+            HTTP_UPLOAD_LENGTH=str(len(self.content)),
+            HTTP_UPLOAD_METADATA="filename " + base64.b64encode(b"report.pdf").decode(),
+        )
+        self.assertEqual(response.status_code, 201)
+        self.url = response["Location"]
+        self.upload = ChunkedUpload.objects.get(upload_id=response.data["upload_id"])
+
+    def patch(self, offset, chunk, checksum=None):
+        headers = {"HTTP_UPLOAD_OFFSET": str(offset)}
+        if checksum:
+            headers["HTTP_UPLOAD_CHECKSUM"] = checksum
+        return self.client.generic(
+            "PATCH",
+            self.url,
+            chunk,
+            content_type="application/offset+octet-stream",
+            **headers,
+        )
+
+    def scratch_size(self):
+        return os.path.getsize(self.upload.scratch_path)
+
+    def test_offset_conflict(self):
+        self.assertEqual(self.patch(0, self.content[:100]).status_code, 204)
+
+        # A retried chunk the server already has
+        response = self.patch(0, self.content[:100])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Upload-Offset"], "100")
+        self.assertEqual(self.scratch_size(), 100)
+
+    def test_chunk_past_upload_length(self):
+        response = self.patch(0, self.content + b"extra")
+
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response["Upload-Offset"], "0")
+        self.assertEqual(self.scratch_size(), 0)
+
+    def test_checksum_mismatch_is_dropped(self):
+        self.assertEqual(self.patch(0, self.content[:100]).status_code, 204)
+        chunk = self.content[100:200]
+        wrong = "sha256 " + base64.b64encode(hashlib.sha256(b"x").digest()).decode()
+
+        response = self.patch(100, chunk, checksum=wrong)
+
+        self.assertEqual(response.status_code, 460)
+        self.assertEqual(response["Upload-Offset"], "100")
+        self.assertEqual(self.scratch_size(), 100)  # Truncated back
+
+        right = "sha256 " + base64.b64encode(hashlib.sha256(chunk).digest()).decode()
+        self.assertEqual(self.patch(100, chunk, checksum=right).status_code, 204)
+        self.assertEqual(self.scratch_size(), 200)
+
+    def test_resume_after_interrupted_patch(self):
+        # The connection drops after 150 of 300 bytes: what arrived is kept
+        append_chunk(self.upload.upload_id, 0, io.BytesIO(self.content[:150]), 300)
+        # A request killed mid-write leaves bytes past the committed offset
+        with open(self.upload.scratch_path, "ab") as f:
+            f.write(b"garbage")
+
+        response = self.client.head(self.url)
+        self.assertEqual(response["Upload-Offset"], "150")
+        self.assertEqual(self.patch(150, self.content[150:]).status_code, 204)
+
+        with open(self.upload.scratch_path, "rb") as f:
+            self.assertEqual(f.read(), self.content)
+
+    def test_finalize_twice_returns_the_same_job(self):
+        self.assertEqual(self.patch(0, self.content).status_code, 204)
+        data = {"job_type": "watermark", "watermark_text": "CONFIDENTIAL"}
+
+        first = self.client.post(f"{self.url}finalize/", data)
+        second = self.client.post(f"{self.url}finalize/", data)
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 202)
+        self.assertEqual(first.data["job_id"], second.data["job_id"])
+        job = PDFProcessingJob.objects.get()
+        self.assertEqual(
+            storage.get_job_storage().read(job.input_file_path), self.content
+        )
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is required")
+class DedupTests(FakeRedisMixin, MediaRootMixin, TestCase):
+    def create_job(self, **fields):
+        fields.setdefault("watermark_text", "CONFIDENTIAL")
+        fields.setdefault("content_hash", "c" * 64)
+        return super().create_job(**fields)
+
+    def finished_job(self, output_key):
+        """A job that missed the lookup, ran and registered its output"""
+        job = self.create_job()
+        self.assertFalse(reuse_processed_output(job))
+        self.finish(job, output_key)
+        return job
+
+    def finish(self, job, output_key):
+        self.media_file(output_key)
+        job.status = "COMPLETED"
+        job.output_file_path = output_key
+        job.save()
+        register_processed_output(job)
+
+    def test_hit_completes_from_the_shared_output(self):
+        first = self.finished_job("processed/first.pdf")
+        input_path = self.media_file("temp_uploads/second.pdf")
+        second = self.create_job(input_file_path="temp_uploads/second.pdf")
+
+        self.assertTrue(reuse_processed_output(second))
+
+        second.refresh_from_db()
+        self.assertEqual(second.status, "COMPLETED")
+        self.assertTrue(second.dedup_hit)
+        self.assertEqual(second.dedup_key, first.dedup_key)
+        self.assertEqual(second.output_file_path, "processed/first.pdf")
+        self.assertFalse(os.path.exists(input_path))  # Upload not needed
+        output = ProcessedOutput.objects.get()
+        self.assertEqual((output.ref_count, output.hits), (2, 1))
+
+    def test_other_parameters_do_not_match(self):
+        self.finished_job("processed/first.pdf")
+        other = self.create_job(watermark_text="DRAFT")
+
+        self.assertFalse(reuse_processed_output(other))
+        self.assertEqual(ProcessedOutput.objects.get().ref_count, 1)
+
+    def test_output_is_kept_until_the_last_job_expires(self):
+        first = self.finished_job("processed/first.pdf")
+        second = self.create_job()
+        reuse_processed_output(second)
+        output_path = os.path.join(self.media_root, "processed/first.pdf")
+
+        delete_jobs(PDFProcessingJob.objects.filter(pk=first.pk))
+        self.assertTrue(os.path.exists(output_path))
+        self.assertEqual(ProcessedOutput.objects.get().ref_count, 1)
+
+        delete_jobs(PDFProcessingJob.objects.filter(pk=second.pk))
+        self.assertFalse(os.path.exists(output_path))
+        self.assertFalse(ProcessedOutput.objects.exists())
+
+    def test_losing_registration_leaves_the_output_unshared(self):
+        # Two identical jobs processed at the same time: the first to
+        # finish registers its output, the other one's stays its own
+        winner, loser = self.create_job(), self.create_job()
+        self.assertFalse(reuse_processed_output(winner))
+        self.assertFalse(reuse_processed_output(loser))
+        self.finish(winner, "processed/winner.pdf")
+        self.finish(loser, "processed/loser.pdf")
+
+        output = ProcessedOutput.objects.get()
+        self.assertEqual(output.output_file_path, "processed/winner.pdf")
+        self.assertEqual(output.ref_count, 1)
+
+        _, files_removed = delete_jobs(PDFProcessingJob.objects.filter(pk=loser.pk))
+        self.assertEqual(files_removed, 1)
+        self.assertFalse(
+            os.path.exists(os.path.join(self.media_root, "processed/loser.pdf"))
+        )
+        self.assertTrue(
+            os.path.exists(os.path.join(self.media_root, "processed/winner.pdf"))
+        )
+        self.assertEqual(ProcessedOutput.objects.get().ref_count, 1)
+
+
+class MultiPageFontStegoTests(SimpleTestCase):
+    message = "Meet at the north gate at noon. " * 3
+    cover_text = "the quick brown fox jumps over the lazy dog " * 8
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        result = encode_message_in_pdf_font_stego_bytes(
+            sample_pdf(60), cls.message, cls.cover_text, multi_page=True
+        )
+        assert result["success"], result.get("error")
+        handle, cls.pdf_path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(handle, "wb") as f:
+            f.write(result["pdf_content"])
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.pdf_path)
+        super().tearDownClass()
+
+    def test_single_page_decode_points_to_multi_page_mode(self):
+        result = decode_message_from_pdf_font_stego(self.pdf_path)
+
+        self.assertFalse(result["success"])
+        self.assertIn("multi-page mode", result["error"])
+
+    def test_decodes_reuse_one_worker_pool(self):
+        self.addCleanup(utils._discard_decode_pool)
+        pools = []
+        for _ in range(2):
+            result = utils.decode_message_from_pdf_font_stego_multi_page(
+                self.pdf_path, max_workers=2
+            )
+            self.assertTrue(result["success"], result.get("error"))
+            self.assertEqual(result["message"], self.message)
+            pools.append(utils._decode_pool)
+
+        self.assertIsNotNone(pools[0])
+        self.assertIs(pools[0], pools[1])
+        pools[0].shutdown()
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis is required")
+@override_settings(JOB_EVENTS_KEEPALIVE=1)
+class JobStateTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = PDFProcessingJob.objects.create(
+            job_id="job", job_type="watermark", original_filename="report.pdf"
+        )
+        init_job_states([self.job])
+        # Flushes run when the test calls write_back_job_states
+        patcher = mock.patch.object(tasks.flush_job_states, "apply_async")
+        self.schedule_flush = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_state_is_written_behind(self):
+        update_job_state(self.job, status="PROCESSING", started_at=timezone.now())
+        update_job_state(self.job, shard_count=3)
+
+        # The status endpoint answers from Redis before the table catches up
+        self.assertEqual(
+            self.client.get("/api/status/job/").data["status"], "PROCESSING"
+        )
+        self.assertEqual(PDFProcessingJob.objects.get().status, "PENDING")
+        self.schedule_flush.assert_called_once()  # One flush for both changes
+
+        self.assertEqual(write_back_job_states(), 1)
+
+        row = PDFProcessingJob.objects.get()
+        self.assertEqual((row.status, row.shard_count), ("PROCESSING", 3))
+        self.assertIsNotNone(row.started_at)
+        self.assertEqual(self.redis.scard(DIRTY_SET), 0)
+
+    def test_state_goes_to_the_table_while_redis_is_down(self):
+        with mock.patch.object(progress, "_redis_disabled_until", time.time() + 60):
+            update_job_state(self.job, status="FAILED", error_message="boom")
+
+        self.assertEqual(PDFProcessingJob.objects.get().status, "FAILED")
+
+    def test_event_stream_follows_progress_until_completion(self):
+        def async_redis_client():
+            return fakeredis.aioredis.FakeRedis(
+                server=self.redis_server, decode_responses=True
+            )
+
+        async def next_event(stream):
+            """Next SSE message, skipping keepalive comments"""
+            async for message in stream:
+                if not message.startswith(":"):
+                    return message
+
+        async def consume():
+            stream = views_async._job_event_stream(self.job)
+            events = [await next_event(stream)]
+
+            reporter = progress.ProgressReporter("job", min_interval=0)
+            reporter.set_status("PROCESSING")
+            reporter.start_stage("watermark", 4)
+            events.append(await next_event(stream))
+
+            update_job_state(self.job, status="COMPLETED", output_file_path="out.pdf")
+            reporter.advance(4)
+            reporter.set_status("COMPLETED")
+            reporter.finish()
+            events.append(await next_event(stream))
+            self.assertIsNone(await next_event(stream))  # Stream ends
+            return events
+
+        with mock.patch.object(views_async, "async_redis_client", async_redis_client):
+            events = async_to_sync(consume)()
+
+        parsed = []
+        for event in events:
+            name, data = event.strip().split("\n")
+            parsed.append((name[len("event: ") :], json.loads(data[len("data: ") :])))
+
+        self.assertEqual(
+            [name for name, _ in parsed], ["status", "progress", "progress"]
+        )
+        self.assertEqual(parsed[0][1]["status"], "PENDING")
+        self.assertEqual(parsed[1][1]["progress"]["stage"], "watermark")
+        self.assertEqual(parsed[1][1]["progress"]["pages_total"], 4)
+        final = parsed[2][1]
+        self.assertEqual(final["status"], "COMPLETED")
+        self.assertEqual(final["progress"]["percent"], 100.0)
+        self.assertEqual(final["download_url"], "/api/download/job/")
+
+
+class JobListingTests(TestCase):
+    def setUp(self):
+        # Seven jobs over four instants, so pages break inside a tie
+        base = timezone.now() - timedelta(hours=1)
+        self.jobs = []
+        for number, minutes in enumerate([0, 0, 1, 1, 1, 2, 3]):
+            job = PDFProcessingJob.objects.create(
+                job_id=f"job-{number}",
+                job_type="watermark" if number % 2 else "qr_code",
+                status="COMPLETED" if number < 4 else "PENDING",
+                original_filename="report.pdf",
+            )
+            PDFProcessingJob.objects.filter(pk=job.pk).update(
+                created_at=base + timedelta(minutes=minutes)
+            )
+            self.jobs.append(job.job_id)
+
+    def list_all(self, url):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([job["job_id"] for job in response.data["jobs"]])
+            url = response.data["next_url"]
+        return pages
+
+    def test_pages_follow_the_cursor_newest_first(self):
+        pages = self.list_all("/api/jobs/?limit=3&fields=job_id")
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        # Newest first, ties broken by id, nothing repeated or skipped
+        newest_first = ["job-6", "job-5", "job-4", "job-3", "job-2", "job-1", "job-0"]
+        self.assertEqual(sum(pages, []), newest_first)
+
+    def test_new_jobs_do_not_shift_later_pages(self):
+        first = self.client.get("/api/jobs/?limit=3")
+        PDFProcessingJob.objects.create(
+            job_id="job-new", job_type="watermark", original_filename="new.pdf"
+        )
+
+        rest = self.list_all(first.data["next_url"])
+
+        self.assertEqual(sum(rest, []), ["job-3", "job-2", "job-1", "job-0"])
+
+    def test_filters_and_counts(self):
+        response = self.client.get(
+            "/api/jobs/?status=COMPLETED&job_type=watermark&counts=true"
+        )
+
+        self.assertEqual(
+            [job["job_id"] for job in response.data["jobs"]], ["job-3", "job-1"]
+        )
+        self.assertIsNone(response.data["next_cursor"])
+        counts = response.data["counts"]
+        self.assertEqual(counts["total"], 2)
+        self.assertEqual(counts["by_status"]["COMPLETED"], 2)
+        self.assertEqual(counts["by_job_type"]["qr_code"], 0)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get("/api/jobs/?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cursor", response.data)
+
+
+class BorderDecodeTests(SimpleTestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self.input_pdf = os.path.join(self.work_dir, "input.pdf")
+        with open(self.input_pdf, "wb") as f:
+            f.write(sample_pdf(1))
+        self.number, _ = email_to_number("john.doe@example.com")
+        self.bordered_pdf = os.path.join(self.work_dir, "bordered.pdf")
+        add_border_to_pdf(self.input_pdf, self.bordered_pdf, self.number)
+
+    def test_vector_border(self):
+        result = decode_border_from_pdf(self.bordered_pdf)
+
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual(result["method"], "vector")
+        self.assertEqual(result["number"], self.number)
+        self.assertEqual(result["email"], "john.doe@e")  # First 10 characters
+
+    def test_scan_falls_back_to_raster(self):
+        # Image-only copy of the page, as a scanner would produce
+        scan_pdf = os.path.join(self.work_dir, "scan.pdf")
+        with fitz.open(self.bordered_pdf) as doc, fitz.open() as scan:
+            page = doc[0]
+            scan_page = scan.new_page(width=page.rect.width, height=page.rect.height)
+            scan_page.insert_image(scan_page.rect, pixmap=page.get_pixmap(dpi=150))
+            scan.save(scan_pdf)
+
+        result = decode_border_from_pdf(scan_pdf)
+
+        self.assertTrue(result["success"], result.get("error"))
+        self.assertEqual(result["method"], "raster")
+        self.assertEqual(result["number"], self.number)
+
+    def test_page_without_border(self):
+        result = decode_border_from_pdf(self.input_pdf)
+
+        self.assertFalse(result["success"])
+        self.assertIn("No stepped border", result["error"])
@@ -0,0 +1,192 @@
+# pdf_app/uploads.py
+"""
+Streaming upload handler for PDF files.
+
+PDF uploads are written straight to a temporary file next to the job
+scratch files (FILE_UPLOAD_TEMP_DIR) instead of being buffered in memory,
+and are checked while they arrive:
+
+- the %PDF- header must appear in the first 1024 bytes
+- the file may not grow beyond PDF_UPLOAD_MAX_BYTES
+- page objects are counted as they stream past, so a file that is visibly
+  over PDF_UPLOAD_MAX_PAGES is dropped before its upload finishes
+- the %%EOF trailer must be in the last 1024 bytes
+
+A rejected upload stops reading the request body; the reason is kept on
+the request (see rejected_upload_errors). Accepted files carry their
+SHA-256 (`sha256`) and page count (`page_count`), so save_uploaded_file can
+move them into place instead of copying and hashing them again.
+"""
+
+import hashlib
+import os
+import re
+
+import fitz  # PyMuPDF
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import (
+    FileUploadHandler,
+    StopFutureHandlers,
+    StopUpload,
+)
+
+# Defaults used when PDF_UPLOAD_MAX_BYTES / PDF_UPLOAD_MAX_PAGES are not set
+DEFAULT_PDF_UPLOAD_MAX_BYTES = 200 * 1024 * 1024  # 200MB
+DEFAULT_PDF_UPLOAD_MAX_PAGES = 5000
+
+PDF_HEADER = b"%PDF-"
+PDF_TRAILER = b"%%EOF"
+SNIFF_WINDOW = 1024  # header / trailer must be within this many bytes
+
+# A page object (not the /Pages tree nodes)
+PAGE_OBJECT_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+PAGE_OBJECT_OVERLAP = 16  # bytes kept so a match split across chunks is seen
+
+
+def is_pdf_upload(file_name, content_type):
+    return (file_name or "").lower().endswith(".pdf") or content_type == (
+        "application/pdf"
+    )
+
+
+def rejected_upload_errors(request):
+    """
+    Errors of PDF uploads rejected while streaming, keyed by form field
+
+    Args:
+        request: Django or DRF request
+
+    Returns:
+        Dict of field name -> [message], or None
+    """
+    django_request = getattr(request, "_request", request)
+    return getattr(django_request, "pdf_upload_errors", None)
+
+
+def check_pdf_file(path):
+    """
+    Header, trailer, readability and page-limit checks for a PDF on disk
+
+    Returns:
+        Dict with success status and page_count, or the error
+    """
+    max_pages = getattr(settings, "PDF_UPLOAD_MAX_PAGES", DEFAULT_PDF_UPLOAD_MAX_PAGES)
+
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_WINDOW + len(PDF_HEADER))
+        f.seek(max(os.path.getsize(path) - SNIFF_WINDOW, 0))
+        tail = f.read()
+
+    if PDF_HEADER not in head:
+        return {"success": False, "error": "File is not a PDF (no %PDF- header)."}
+    if PDF_TRAILER not in tail:
+        return {
+            "success": False,
+            "error": "File is truncated: the PDF trailer (%%EOF) is missing.",
+        }
+
+    try:
+        with fitz.open(path) as doc:
+            page_count = len(doc)
+    except Exception:
+        return {"success": False, "error": "File is not a readable PDF."}
+
+    if page_count > max_pages:
+        return {"success": False, "error": f"PDF has more than {max_pages} pages."}
+    return {"success": True, "page_count": page_count}
+
+
+class PDFUploadHandler(FileUploadHandler):
+    """
+    Stream PDF uploads to disk, hashing and sniffing them on the way
+
+    Other uploads are left to the next handlers in FILE_UPLOAD_HANDLERS.
+    """
+
+    def new_file(self, field_name, file_name, content_type, *args, **kwargs):
+        super().new_file(field_name, file_name, content_type, *args, **kwargs)
+
+        self.activated = is_pdf_upload(file_name, content_type)
+        if not self.activated:
+            return
+
+        self.max_bytes = getattr(
+            settings, "PDF_UPLOAD_MAX_BYTES", DEFAULT_PDF_UPLOAD_MAX_BYTES
+        )
+        self.max_pages = getattr(
+            settings, "PDF_UPLOAD_MAX_PAGES", DEFAULT_PDF_UPLOAD_MAX_PAGES
+        )
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset, self.content_type_extra
+        )
+        self.digest = hashlib.sha256()
+        self.received = 0
+        self.head = b""
+        self.tail = b""
+        self.pages_seen = 0
+
+        # This handler alone receives the file's data
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.activated:
+            return raw_data
+
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self.reject(f"File is larger than {self.max_bytes} bytes.")
+
+        if len(self.head) < SNIFF_WINDOW + len(PDF_HEADER):
+            self.head += raw_data[: SNIFF_WINDOW + len(PDF_HEADER)]
+            if len(self.head) >= SNIFF_WINDOW + len(PDF_HEADER):
+                self.check_header()
+
+        # Count page objects, including one split across two chunks
+        window = self.tail[-PAGE_OBJECT_OVERLAP:] + raw_data
+        matches = PAGE_OBJECT_RE.findall(window)
+        overlap_matches = PAGE_OBJECT_RE.findall(self.tail[-PAGE_OBJECT_OVERLAP:])
+        self.pages_seen += len(matches) - len(overlap_matches)
+        if self.pages_seen > self.max_pages:
+            self.reject(f"PDF has more than {self.max_pages} pages.")
+
+        self.tail = (self.tail + raw_data)[-SNIFF_WINDOW:]
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.activated:
+            return None
+
+        # Header, trailer and the real page count (page trees in compressed
+        # object streams are not visible to the streaming count)
+        self.file.flush()
+        result = check_pdf_file(self.file.temporary_file_path())
+        if not result["success"]:
+            self.reject(result["error"])
+
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.digest.hexdigest()
+        self.file.page_count = result["page_count"]
+        return self.file
+
+    def upload_interrupted(self):
+        if getattr(self, "activated", False) and hasattr(self, "file"):
+            self.file.close()  # Deletes the temporary file
+
+    def check_header(self):
+        if PDF_HEADER not in self.head[: SNIFF_WINDOW + len(PDF_HEADER)]:
+            self.reject("File is not a PDF (no %PDF- header).")
+
+    def reject(self, message):
+        """Record why the file was refused and stop reading the request"""
+        errors = getattr(self.request, "pdf_upload_errors", None) or {}
+        errors[self.field_name] = [message]
+        self.request.pdf_upload_errors = errors
+
+        self.activated = False
+        self.file.close()
+        print(f"🚫 Upload {self.file_name} rejected: {message}")
+        raise StopUpload(connection_reset=True)
@@ -1,6 +1,12 @@
+import binascii
 import hashlib
 import io
 import math
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
 import qrcode
 from PyPDF2 import PdfReader, PdfWriter
 from reportlab.pdfgen import canvas
@@ -8,9 +14,67 @@ from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import cm
 import fitz  # PyMuPDF
 
+from .font_stego.layout import (
+    COVER_FONT_SIZE,
+    COVER_STORY_GAP,
+    FOOTER_START_X,
+    FOOTER_TOP,
+    LINE_HEIGHT,
+    REFERENCE_PAGE_SIZE,
+    STEGO_FONT_NAME,
+    codepoints_of,
+    cover_text_fits,
+    footer_glyph_capacity,
+    footer_line_capacity,
+    footer_line_width,
+    layout_cover_text,
+)
+
 # Global font size mapping for binary encoding
 font_size_map = {"0": 7, "1": 9}
 
+# Email border stamp geometry (points): the border sits BORDER_MARGIN in from
+# the page edges and the top 1/BORDER_STEP_FRACTION of the right border holds
+# one step per digit pair, indented by pair value * BORDER_STEP_SIZE
+BORDER_MARGIN = 36
+BORDER_STEP_SIZE = 0.125 * cm
+BORDER_STEP_FRACTION = 16
+BORDER_STEP_PAIRS = 10
+BORDER_MAX_STEPS = 40
+
+# Zoom used when the border has to be read from a rendered page (scans)
+BORDER_RASTER_ZOOM = 3
+
+# QR code stamp: size and distance from the bottom right page corner (points)
+QR_CODE_SIZE = 50
+QR_CODE_MARGIN = 20
+
+# Font steganography payload frame: 16-bit payload length (bytes) followed
+# by a 16-bit CRC (CRC-CCITT) of the UTF-8 payload, then the payload itself
+PAYLOAD_HEADER_FORMAT = ">HH"
+PAYLOAD_HEADER_BITS = struct.calcsize(PAYLOAD_HEADER_FORMAT) * 8
+PAYLOAD_MAX_BYTES = 0xFFFF
+
+# Multi-page frame header: sequence index, frame count, chunk length, CRC-16
+PAGE_FRAME_HEADER_FORMAT = ">HHHH"
+PAGE_FRAME_HEADER_BITS = struct.calcsize(PAGE_FRAME_HEADER_FORMAT) * 8
+
+# Smallest page range worth handing to a separate decoding process
+MULTI_PAGE_MIN_PAGES_PER_WORKER = 25
+
+# Options for serializing processed documents: drop unused and duplicate
+# objects, deflate streams and clean each page's content into one stream
+# (every insert_text adds a content stream, and a page's many tiny streams
+# otherwise dominate the file size)
+PDF_SAVE_OPTIONS = {"garbage": 3, "deflate": True, "clean": True}
+
+# Text extraction flags for reading the stego footer. Passing flags replaces
+# the "dict" defaults (fitz.TEXTFLAGS_DICT), so of those only the mediabox
+# clip is kept: TEXT_PRESERVE_IMAGES, TEXT_PRESERVE_LIGATURES and
+# TEXT_PRESERVE_WHITESPACE are left unset on purpose, as only the spans and
+# their sizes are needed
+FOOTER_TEXT_FLAGS = fitz.TEXT_MEDIABOX_CLIP
+
 
 def email_to_number(email):
     """
@@ -164,7 +228,7 @@ def add_border_to_pdf(input_pdf, output_pdf, email_number):
         c = canvas.Canvas(packet, pagesize=(page_width, page_height))
 
         # Define border parameters
-        margin = 36  # 0.5 inch margin
+        margin = BORDER_MARGIN  # 0.5 inch margin
         border_width = 1  # 1 point border width
 
         # Process email number as pairs of digits (01-40)
@@ -177,16 +241,20 @@ def add_border_to_pdf(input_pdf, output_pdf, email_number):
                 digit_pairs.append(0)  # Default for incomplete pair
 
         # Make sure we have 10 pairs
-        while len(digit_pairs) < 10:
+        while len(digit_pairs) < BORDER_STEP_PAIRS:
             digit_pairs.append(0)
-        digit_pairs = digit_pairs[:10]  # Take only the first 10 pairs
+        digit_pairs = digit_pairs[:BORDER_STEP_PAIRS]  # Take only the first 10 pairs
 
         print("Processing digit pairs:", digit_pairs)  # Debug print
 
         # Calculate parameters for the stepped border
         right_border_height = page_height - 2 * margin
-        step_section_height = right_border_height / 16  # Using 1/16 of height
-        segment_height = step_section_height / 10  # height of each step segment
+        step_section_height = (
+            right_border_height / BORDER_STEP_FRACTION
+        )  # Using 1/16 of height
+        segment_height = (
+            step_section_height / BORDER_STEP_PAIRS
+        )  # height of each step segment
 
         # Draw the horizontal borders (top and bottom)
         c.setLineWidth(border_width)
@@ -208,11 +276,11 @@ def add_border_to_pdf(input_pdf, output_pdf, email_number):
         )
 
         # Define a smaller step size for up to 40 steps
-        step_size = 0.125 * cm  # 1/4 of 0.5cm
+        step_size = BORDER_STEP_SIZE  # 1/4 of 0.5cm
 
         # Draw reference dots at every 5 steps (5, 10, 15, etc)
         dot_size = 0.75  # Very tiny dots
-        for step in range(5, 41, 5):
+        for step in range(5, BORDER_MAX_STEPS + 1, 5):
             dot_x = page_width - margin - step * step_size
             dot_y = page_height - margin + 5
             c.circle(dot_x, dot_y, dot_size, fill=1)
@@ -224,7 +292,7 @@ def add_border_to_pdf(input_pdf, output_pdf, email_number):
         current_y = page_height - margin - step_section_height
 
         # Process each digit pair (total of 10 pairs)
-        for i in range(10):
+        for i in range(BORDER_STEP_PAIRS):
             # Get the value from the digit pair (01-40)
             pair_value = digit_pairs[i]
 
@@ -281,6 +349,192 @@ def add_border_to_pdf(input_pdf, output_pdf, email_number):
     return output_pdf
 
 
+def decode_border_from_pdf(pdf_path, page_number=0):
+    """
+    Recover the email number stamped by add_border_to_pdf.
+
+    The step indents are read straight from the page's vector drawing paths,
+    so no rendering is needed for PDFs produced by this app. Pages without
+    vector borders (e.g. scanned copies, or scanned images opened directly)
+    fall back to locating the border in a rendered grayscale image.
+
+    Args:
+        pdf_path: Path to the bordered PDF (or a scanned image of a page)
+        page_number: Page to read the border from
+
+    Returns:
+        Dict with success status, the 20-digit number, recovered email and
+        the method that found the border ("vector" or "raster")
+    """
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception as e:
+        return {"success": False, "error": f"Could not open document: {str(e)}"}
+
+    try:
+        if not 0 <= page_number < len(doc):
+            return {"success": False, "error": f"Page {page_number + 1} not found"}
+
+        page = doc[page_number]
+        method = "vector"
+        digit_pairs = _read_border_steps_vector(page)
+        if digit_pairs is None:
+            print("🔍 No vector border found, falling back to raster decoding")
+            method = "raster"
+            digit_pairs = _read_border_steps_raster(page)
+    finally:
+        doc.close()
+
+    if digit_pairs is None:
+        return {"success": False, "error": "No stepped border found on the page"}
+
+    number = "".join(f"{pair:02d}" for pair in digit_pairs)
+
+    # Trailing "00" pairs are padding for emails shorter than 10 characters
+    significant = number
+    while significant.endswith("00"):
+        significant = significant[:-2]
+
+    print(f"✅ Border decoded ({method}): {number}")
+    return {
+        "success": True,
+        "number": number,
+        "email": number_to_email(significant),
+        "method": method,
+    }
+
+
+def _read_border_steps_vector(page):
+    """
+    Read the ten step indents from the line segments in the page's drawings
+
+    Returns:
+        List of digit pair values, or None if the border is not found
+    """
+    page_width, page_height = page.rect.width, page.rect.height
+    step_section_height = (page_height - 2 * BORDER_MARGIN) / BORDER_STEP_FRACTION
+    segment_height = step_section_height / BORDER_STEP_PAIRS
+    tolerance = BORDER_STEP_SIZE / 2
+
+    vertical_lines = []
+    for path in page.get_drawings():
+        for item in path["items"]:
+            if item[0] != "l":
+                continue
+            p1, p2 = item[1], item[2]
+            if abs(p1.x - p2.x) <= tolerance:
+                vertical_lines.append(
+                    ((p1.x + p2.x) / 2, min(p1.y, p2.y), max(p1.y, p2.y))
+                )
+
+    # Anchor on the straight part of the right border: the longest vertical
+    # line in the right half of the page, ending where the steps begin
+    right_border = max(
+        (line for line in vertical_lines if line[0] > page_width / 2),
+        key=lambda line: line[2] - line[1],
+        default=None,
+    )
+    if right_border is None or right_border[2] - right_border[1] < page_height / 2:
+        return None
+    right_x, steps_bottom = right_border[0], right_border[1]
+
+    # Fitz y grows downwards, so step 0 is the lowest segment of the section
+    min_x = right_x - BORDER_MAX_STEPS * BORDER_STEP_SIZE - tolerance
+    indents = {}
+    for x, top, bottom in vertical_lines:
+        if abs((bottom - top) - segment_height) > segment_height / 4:
+            continue
+        if not min_x <= x <= right_x + tolerance:
+            continue
+        step = int((steps_bottom - (top + bottom) / 2) // segment_height)
+        if 0 <= step < BORDER_STEP_PAIRS:
+            indents.setdefault(step, right_x - x)
+
+    if len(indents) != BORDER_STEP_PAIRS:
+        return None
+
+    return [
+        round(indents[step] / BORDER_STEP_SIZE) for step in range(BORDER_STEP_PAIRS)
+    ]
+
+
+def _read_border_steps_raster(page, zoom=BORDER_RASTER_ZOOM):
+    """
+    Read the ten step indents from a rendered image of the page (scans)
+
+    Returns:
+        List of digit pair values, or None if the border is not found
+    """
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY)
+    dark = (
+        np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width) < 128
+    )
+    height, width = dark.shape
+
+    # Border lines are the columns/rows that stay dark along most of the page
+    right_profile = dark[int(height * 0.3) : int(height * 0.9), width // 2 :].mean(
+        axis=0
+    )
+    top_profile = dark[: int(height * 0.15), int(width * 0.2) : int(width * 0.6)].mean(
+        axis=1
+    )
+    bottom_profile = dark[
+        int(height * 0.85) :, int(width * 0.2) : int(width * 0.6)
+    ].mean(axis=1)
+    if min(right_profile.max(), top_profile.max(), bottom_profile.max()) < 0.8:
+        return None
+
+    right_x = width // 2 + _dark_run_center(right_profile, int(right_profile.argmax()))
+    top_y = _dark_run_center(top_profile, int(top_profile.argmax()))
+    bottom_y = int(height * 0.85) + _dark_run_center(
+        bottom_profile, int(bottom_profile.argmax())
+    )
+
+    # Scale from the measured border so slightly shrunk scans still decode
+    scale = (bottom_y - top_y) / (page.rect.height - 2 * BORDER_MARGIN)
+    step_px = BORDER_STEP_SIZE * scale
+    step_section_px = (bottom_y - top_y) / BORDER_STEP_FRACTION
+    segment_px = step_section_px / BORDER_STEP_PAIRS
+
+    window_left = max(0, int(right_x - (BORDER_MAX_STEPS + 1) * step_px))
+    window_right = min(width, int(right_x + step_px / 2) + 1)
+
+    digit_pairs = []
+    for step in range(BORDER_STEP_PAIRS):
+        # Sample the middle half of the segment to stay clear of the
+        # horizontal connectors at either end
+        segment_bottom = top_y + step_section_px - step * segment_px
+        rows = slice(
+            int(segment_bottom - segment_px * 0.75),
+            int(segment_bottom - segment_px * 0.25),
+        )
+        profile = dark[rows, window_left:window_right].mean(axis=0)
+        columns = np.flatnonzero(profile >= 0.75)
+        if len(columns) == 0:
+            return None
+
+        # The step is the rightmost vertical run inside the window
+        x = window_left + _dark_run_center(profile, int(columns[-1]), threshold=0.75)
+        pair_value = round((right_x - x) / step_px)
+        if not 0 <= pair_value <= BORDER_MAX_STEPS:
+            return None
+        digit_pairs.append(pair_value)
+
+    return digit_pairs
+
+
+def _dark_run_center(profile, index, threshold=None):
+    """Center of the contiguous run of dark columns/rows around `index`"""
+    if threshold is None:
+        threshold = profile[index] * 0.8
+    start = end = index
+    while start > 0 and profile[start - 1] >= threshold:
+        start -= 1
+    while end < len(profile) - 1 and profile[end + 1] >= threshold:
+        end += 1
+    return (start + end) / 2
+
+
 def email_to_cipher(email):
     """
     Convert an email address to a cipher string:
@@ -510,66 +764,77 @@ def generate_qr_code(data, box_size=5, border=1):
 
 def add_qr_code_to_pdf(input_pdf, output_pdf, email):
     """
-    Add a QR code to the bottom right corner of each page of the PDF using our cipher
-    No temporary files - works entirely in memory
+    Add a QR code to the bottom right corner of the first page using our cipher
+    File-based wrapper around add_qr_code_to_pdf_bytes
+
+    Args:
+        input_pdf: Input PDF file path or file-like object
+        output_pdf: Output PDF file path
+        email: The email address to encode in the QR code
+
+    Returns:
+        Path to the output PDF
     """
-    from reportlab.lib.utils import ImageReader
+    pdf_content = add_qr_code_to_pdf_bytes(_read_pdf_source(input_pdf), email)
 
-    reader = PdfReader(input_pdf)
-    writer = PdfWriter()
+    with open(output_pdf, "wb") as output_file:
+        output_file.write(pdf_content)
 
-    # Encode the email using our new cipher and generate QR code
-    encoded_data = email_to_cipher(email)
-    qr_buffer = generate_qr_code(encoded_data, box_size=3, border=1)
+    return output_pdf
 
-    for page_num in range(len(reader.pages)):
-        page = reader.pages[page_num]
 
-        # Only add QR code to the first page (page_num == 0)
-        if page_num == 0:
-            page_width = float(page.mediabox.width)
-            page_height = float(page.mediabox.height)
-
-            # Create a new PDF with Reportlab to draw the QR code
-            packet = io.BytesIO()
-            c = canvas.Canvas(packet, pagesize=(page_width, page_height))
-
-            # Define QR code parameters
-            qr_size = 50  # Size of QR code in points (approximately 0.7 inch)
-            margin = 20  # Margin from the edge in points
-
-            # Use ImageReader to read directly from BytesIO buffer
-            qr_buffer.seek(0)  # Reset buffer position
-            qr_image = ImageReader(qr_buffer)
-
-            # Place the QR code at the bottom right corner
-            c.drawImage(
-                qr_image,
-                page_width - qr_size - margin,  # X position
-                margin,  # Y position
-                width=qr_size,
-                height=qr_size,
-            )
+def add_qr_code_to_pdf_bytes(pdf_content, email, progress=None):
+    """
+    Add the cipher QR code to a PDF held in memory
 
-            c.save()
+    Args:
+        pdf_content: Input PDF as bytes or a readable file-like object
+        email: The email address to encode in the QR code
+        progress: Optional ProgressReporter for the job
 
-            # Move to the beginning of the BytesIO buffer
-            packet.seek(0)
+    Returns:
+        The processed PDF as bytes
+    """
+    doc = fitz.open(stream=_read_pdf_source(pdf_content), filetype="pdf")
+    try:
+        add_qr_code_to_document(doc, email, progress=progress)
+        return doc.tobytes(**PDF_SAVE_OPTIONS)
+    finally:
+        doc.close()
 
-            # Create a new PDF with the QR code
-            qr_pdf = PdfReader(packet)
 
-            # Merge the QR code PDF with the current page
-            page.merge_page(qr_pdf.pages[0])
+def add_qr_code_to_document(doc, email, progress=None):
+    """
+    Add the cipher QR code to the bottom right corner of the first page of
+    an already open document
 
-        # Add the page to the output PDF (whether it has QR code or not)
-        writer.add_page(page)
+    Args:
+        doc: Open fitz.Document, modified in place and left open
+        email: The email address to encode in the QR code
+        progress: Optional ProgressReporter for the job
+    """
+    if len(doc) == 0:
+        return
 
-    # Write the output PDF
-    with open(output_pdf, "wb") as output_file:
-        writer.write(output_file)
+    if progress:
+        progress.start_stage("qr_code", 1)
 
-    return output_pdf
+    # Encode the email using our cipher and generate QR code
+    encoded_data = email_to_cipher(email)
+    qr_buffer = generate_qr_code(encoded_data, box_size=3, border=1)
+
+    page = doc[0]
+    page_rect = page.rect
+    qr_rect = fitz.Rect(
+        page_rect.width - QR_CODE_SIZE - QR_CODE_MARGIN,
+        page_rect.height - QR_CODE_SIZE - QR_CODE_MARGIN,
+        page_rect.width - QR_CODE_MARGIN,
+        page_rect.height - QR_CODE_MARGIN,
+    )
+    page.insert_image(qr_rect, stream=qr_buffer.getvalue())
+
+    if progress:
+        progress.advance()
 
 
 # def add_qr_code_to_pdf(input_pdf, output_pdf, email):
@@ -653,7 +918,193 @@ def process_qr_code(qr_data):
         raise ValueError(f"Failed to decode QR code data: {str(e)}")
 
 
-# Add these exact functions from your scripts:
+def cover_text_fits_footer(cover_text, page_size=REFERENCE_PAGE_SIZE):
+    """
+    Check that a cover text fits in one page footer even if every glyph is
+    encoded at the largest font size
+
+    Returns:
+        Tuple of (fits, lines needed, lines available)
+    """
+    return cover_text_fits(cover_text, max(font_size_map.values()), page_size)
+
+
+def single_page_message_capacity(page_size=REFERENCE_PAGE_SIZE):
+    """
+    Most UTF-8 message bytes one page footer can ever carry, whatever the
+    cover text (one bit per glyph, minus the length/CRC header)
+    """
+    glyphs = footer_glyph_capacity(max(font_size_map.values()), page_size)
+    return max(0, (glyphs - PAYLOAD_HEADER_BITS) // 8)
+
+
+def payload_bit_length(message):
+    """
+    Number of bits (= non-space cover characters) needed to hide a message,
+    including the length/CRC header
+    """
+    return PAYLOAD_HEADER_BITS + 8 * len(message.encode("utf-8"))
+
+
+def pack_payload(message):
+    """
+    Packs a message into a framed bit array for font steganography
+
+    Args:
+        message: Input string to pack (any UTF-8 text)
+
+    Returns:
+        numpy uint8 array of 0/1 values: length header, CRC, UTF-8 payload
+    """
+    payload = message.encode("utf-8")
+    if len(payload) > PAYLOAD_MAX_BYTES:
+        raise ValueError(
+            f"Message too long: {len(payload)} bytes (max {PAYLOAD_MAX_BYTES})"
+        )
+
+    header = struct.pack(
+        PAYLOAD_HEADER_FORMAT, len(payload), binascii.crc_hqx(payload, 0)
+    )
+    return np.unpackbits(np.frombuffer(header + payload, dtype=np.uint8))
+
+
+def payload_frame_bits(header_bits):
+    """
+    Total number of bits in a frame, read from its length header
+
+    Args:
+        header_bits: Bit array holding at least the first 16 bits of a frame
+
+    Returns:
+        Header plus payload size in bits
+    """
+    payload_length = int.from_bytes(np.packbits(header_bits[:16]).tobytes(), "big")
+    return PAYLOAD_HEADER_BITS + 8 * payload_length
+
+
+def unpack_payload(bits):
+    """
+    Unpacks a framed bit array produced by pack_payload
+
+    Args:
+        bits: numpy array of 0/1 values (extra trailing bits are ignored)
+
+    Returns:
+        Original string message
+
+    Raises:
+        ValueError: If the frame is truncated, fails its CRC or is not UTF-8
+    """
+    data = np.packbits(np.asarray(bits, dtype=np.uint8)).tobytes()
+    header_size = struct.calcsize(PAYLOAD_HEADER_FORMAT)
+    if len(data) < header_size:
+        raise ValueError("Incomplete payload header")
+
+    payload_length, crc = struct.unpack(PAYLOAD_HEADER_FORMAT, data[:header_size])
+    payload = data[header_size : header_size + payload_length]
+    if len(payload) < payload_length:
+        raise ValueError(
+            f"Truncated payload: expected {payload_length} bytes, got {len(payload)}"
+        )
+    if binascii.crc_hqx(payload, 0) != crc:
+        raise ValueError("Payload CRC mismatch")
+
+    return payload.decode("utf-8")
+
+
+def page_frame_chunk_bytes(cover_capacity):
+    """
+    Payload bytes one page can carry in multi-page mode
+
+    Args:
+        cover_capacity: Non-space characters in the cover text (bits per page)
+    """
+    return max(0, (cover_capacity - PAGE_FRAME_HEADER_BITS) // 8)
+
+
+def page_frames_needed(message, cover_capacity):
+    """Number of pages a message needs in multi-page mode (0 if it cannot fit)"""
+    chunk_bytes = page_frame_chunk_bytes(cover_capacity)
+    if chunk_bytes == 0:
+        return 0
+    return max(1, math.ceil(len(message.encode("utf-8")) / chunk_bytes))
+
+
+def pack_page_frames(message, chunk_bytes):
+    """
+    Splits a message into sequenced frames, one per page
+
+    Each frame: sequence index, frame count, chunk length (bytes) and
+    CRC-16 of the chunk, followed by the UTF-8 chunk itself.
+
+    Returns:
+        List of numpy uint8 arrays of 0/1 values, in sequence order
+    """
+    if chunk_bytes <= 0:
+        raise ValueError("Cover text too short to carry a multi-page frame header")
+
+    payload = message.encode("utf-8")
+    chunks = [
+        payload[i : i + chunk_bytes] for i in range(0, len(payload), chunk_bytes)
+    ] or [b""]
+    if len(chunks) > PAYLOAD_MAX_BYTES:
+        raise ValueError(f"Message too long: needs {len(chunks)} frames")
+
+    frames = []
+    for index, chunk in enumerate(chunks):
+        header = struct.pack(
+            PAGE_FRAME_HEADER_FORMAT,
+            index,
+            len(chunks),
+            len(chunk),
+            binascii.crc_hqx(chunk, 0),
+        )
+        frames.append(np.unpackbits(np.frombuffer(header + chunk, dtype=np.uint8)))
+
+    return frames
+
+
+def page_frame_bits(header_bits):
+    """Total number of bits in a multi-page frame, read from its header"""
+    chunk_length = int.from_bytes(np.packbits(header_bits[32:48]).tobytes(), "big")
+    return PAGE_FRAME_HEADER_BITS + 8 * chunk_length
+
+
+def unpack_page_frame(bits):
+    """
+    Unpacks one multi-page frame produced by pack_page_frames
+
+    Returns:
+        Tuple of (sequence index, frame count, chunk bytes)
+
+    Raises:
+        ValueError: If the frame is truncated, inconsistent or fails its CRC
+    """
+    data = np.packbits(np.asarray(bits, dtype=np.uint8)).tobytes()
+    header_size = struct.calcsize(PAGE_FRAME_HEADER_FORMAT)
+    if len(data) < header_size:
+        raise ValueError("Incomplete frame header")
+
+    index, count, chunk_length, crc = struct.unpack(
+        PAGE_FRAME_HEADER_FORMAT, data[:header_size]
+    )
+    chunk = data[header_size : header_size + chunk_length]
+    if index >= count:
+        raise ValueError(f"Invalid frame sequence {index}/{count}")
+    if len(chunk) < chunk_length:
+        raise ValueError("Truncated frame")
+    if binascii.crc_hqx(chunk, 0) != crc:
+        raise ValueError("Frame CRC mismatch")
+
+    return index, count, chunk
+
+
+def bits_to_text(bits):
+    """Render a bit array as a '0'/'1' string (for display only)"""
+    return (np.asarray(bits, dtype=np.uint8) + ord("0")).tobytes().decode("ascii")
+
+
+# Legacy headerless ASCII encoding - kept for decoding older documents
 
 
 def string_to_binary(message):
@@ -705,7 +1156,9 @@ def binary_to_string(binary_data):
     return result
 
 
-def encode_message_in_pdf_font_stego(input_pdf, output_pdf, secret_message, cover_text):
+def encode_message_in_pdf_font_stego(
+    input_pdf, output_pdf, secret_message, cover_text, multi_page=False
+):
     """
     Improved encoding function with separate cover story for plausible deniability
 
@@ -713,14 +1166,103 @@ def encode_message_in_pdf_font_stego(input_pdf, output_pdf, secret_message, cove
     1. Add cover story explanation (8pt font - doesn't encode data)
     2. Add cover text with hidden message encoded via font variations (7pt/9pt)
 
-    NOW: Only adds to the LAST PAGE for better steganography
+    NOW: Only adds to the LAST PAGE for better steganography.
+    With multi_page=True the message is split into sequenced frames and
+    spread across the footers of the last N pages (one frame per page).
     """
-    # Convert secret message to binary
-    binary_data = string_to_binary(secret_message)
+    # Open the PDF
+    try:
+        doc = fitz.open(input_pdf)
+        print(f"\n✅ Opened PDF: {input_pdf}")
+        print(f"📄 Pages: {len(doc)}")
+    except Exception as e:
+        print(f"❌ Error opening PDF: {e}")
+        return {"success": False, "error": f"Error opening PDF: {e}"}
+
+    result = encode_message_in_document_font_stego(
+        doc, secret_message, cover_text, multi_page=multi_page
+    )
+    if not result["success"]:
+        doc.close()
+        return result
 
+    # Save the PDF
+    try:
+        doc.save(output_pdf, **PDF_SAVE_OPTIONS)
+        print(f"\n✅ Saved steganographic PDF with cover story")
+        doc.close()
+        return result
+    except Exception as e:
+        print(f"❌ Error saving PDF: {e}")
+        doc.close()
+        return {"success": False, "error": f"Error saving PDF: {e}"}
+
+
+def encode_message_in_pdf_font_stego_bytes(
+    pdf_content, secret_message, cover_text, multi_page=False, progress=None
+):
+    """
+    Font steganography for a PDF held in memory (no files are written)
+
+    Args:
+        pdf_content: Input PDF as bytes or a readable file-like object
+        secret_message: Message to hide
+        cover_text: Text whose glyph sizes carry the message bits
+        multi_page: Spread the message across the last N pages
+        progress: Optional ProgressReporter for the job
+
+    Returns:
+        Same dict as encode_message_in_pdf_font_stego, plus "pdf_content"
+        (bytes) on success
+    """
+    try:
+        doc = fitz.open(stream=_read_pdf_source(pdf_content), filetype="pdf")
+        print(f"\n✅ Opened PDF from memory")
+        print(f"📄 Pages: {len(doc)}")
+    except Exception as e:
+        print(f"❌ Error opening PDF: {e}")
+        return {"success": False, "error": f"Error opening PDF: {e}"}
+
+    try:
+        result = encode_message_in_document_font_stego(
+            doc, secret_message, cover_text, multi_page=multi_page, progress=progress
+        )
+        if result["success"]:
+            result["pdf_content"] = doc.tobytes(**PDF_SAVE_OPTIONS)
+        return result
+    finally:
+        doc.close()
+
+
+def _read_pdf_source(source):
+    """Bytes of a PDF given as bytes, a readable file-like object or a path"""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if hasattr(source, "read"):
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return source.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def encode_message_in_document_font_stego(
+    doc, secret_message, cover_text, multi_page=False, progress=None
+):
+    """
+    Encode a message into the footer of an already open document (in place)
+
+    Args:
+        doc: Open fitz.Document, modified in place and left open
+        secret_message: Message to hide
+        cover_text: Text whose glyph sizes carry the message bits
+        multi_page: Spread the message across the last N pages
+        progress: Optional ProgressReporter, advanced once per encoded page
+
+    Returns:
+        Dict with success status, message/cover story and pages_used, or error
+    """
     print(f"🔐 SECRET MESSAGE: '{secret_message}'")
-    print(f"🔢 BINARY REPRESENTATION: {binary_data}")
-    print(f"📏 Binary length: {len(binary_data)} bits")
     print(f"📄 Cover text: '{cover_text}'")
     print(f"📏 Cover text length: {len(cover_text)} characters")
 
@@ -728,28 +1270,37 @@ def encode_message_in_pdf_font_stego(input_pdf, output_pdf, secret_message, cove
     non_space_chars = [char for char in cover_text if char != " "]
     print(f"📏 Non-space characters in cover: {len(non_space_chars)}")
 
+    # Convert secret message to framed bit arrays (header + UTF-8 payload)
+    try:
+        if multi_page:
+            frames = pack_page_frames(
+                secret_message, page_frame_chunk_bytes(len(non_space_chars))
+            )
+        else:
+            frames = [pack_payload(secret_message)]
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+
+    total_bits = sum(len(frame) for frame in frames)
+    print(f"📏 Binary length: {total_bits} bits in {len(frames)} frame(s)")
+
     # Check if we have enough cover text
-    if len(binary_data) > len(non_space_chars):
+    if len(frames[0]) > len(non_space_chars):
         print(
-            f"⚠️  WARNING: Message too long! Need {len(binary_data)} chars, have {len(non_space_chars)}"
+            f"⚠️  WARNING: Message too long! Need {len(frames[0])} chars, have {len(non_space_chars)}"
         )
         return {
             "success": False,
-            "error": f"Cover text too short! Need {len(binary_data)} characters, have {len(non_space_chars)}. Please provide longer cover text.",
+            "error": f"Cover text too short! Need {len(frames[0])} characters, have {len(non_space_chars)}. Please provide longer cover text.",
         }
     else:
         print(f"✅ Cover text is sufficient for message")
 
-    # Open the PDF
-    try:
-        doc = fitz.open(input_pdf)
-        print(f"\n✅ Opened PDF: {input_pdf}")
-        print(f"📄 Pages: {len(doc)}")
-    except Exception as e:
-        print(f"❌ Error opening PDF: {e}")
-        return {"success": False, "error": f"Error opening PDF: {e}"}
-
-    space_font_size = 8.0  # Default size for spaces AND cover story
+    if len(frames) > len(doc):
+        return {
+            "success": False,
+            "error": f"Message needs {len(frames)} pages with this cover text, but the PDF only has {len(doc)}. Please provide longer cover text.",
+        }
 
     # 🎭 COVER STORY OPTIONS - Short and realistic
     cover_stories = ["Read at your own pace."]
@@ -758,142 +1309,135 @@ def encode_message_in_pdf_font_stego(input_pdf, output_pdf, secret_message, cove
 
     selected_cover_story = random.choice(cover_stories)
 
-    # 🎯 PROCESS ONLY THE LAST PAGE
-    last_page_num = len(doc) - 1
-    page = doc[last_page_num]
-    page_rect = page.rect
-
-    print(f"\n--- Encoding on LAST Page ({last_page_num + 1}) ---")
-
-    # Calculate footer position - start higher to accommodate cover story
-    footer_y = page_rect.height - 60
-    start_x = 50
-
-    # 🎭 STEP 1: ADD COVER STORY FIRST (8pt font - no encoding)
-    print(f"🎭 Adding cover story: {selected_cover_story}")
-    cover_story_point = fitz.Point(start_x, footer_y)
-    page.insert_text(
-        cover_story_point,
-        selected_cover_story,
-        fontsize=8.0,  # Use default font size - doesn't encode data
-        color=(0.3, 0.3, 0.3),  # Dark gray, subtle but readable
-    )
-
-    # Move down for the main encoded content
-    footer_y += 18  # More space between cover story and encoded text
-
-    # 🔤 STEP 2: PROCESS COVER TEXT WITH HIDDEN MESSAGE ENCODING
-    text_blocks = []
-    binary_index = 0
-    current_word = ""
-    current_font_sizes = []
-
-    # Process each character and group into words for better spacing
-    for char_index, char in enumerate(cover_text):
-        if char == " ":
-            # End of word - add the current word if it exists
-            if current_word:
-                text_blocks.append(
-                    {
-                        "text": current_word,
-                        "font_sizes": current_font_sizes.copy(),
-                        "type": "word",
-                    }
-                )
-                current_word = ""
-                current_font_sizes = []
-
-            # Add space (uses default 8pt - doesn't encode data)
-            text_blocks.append(
-                {"text": " ", "font_sizes": [space_font_size], "type": "space"}
+    if progress:
+        progress.start_stage("font_stego", len(frames))
+
+    # 🎯 PROCESS THE LAST PAGE (or the last N pages for multi-page payloads)
+    first_page_num = len(doc) - len(frames)
+    for frame_index, frame in enumerate(frames):
+        page_num = first_page_num + frame_index
+        print(f"\n--- Encoding frame {frame_index + 1} on Page ({page_num + 1}) ---")
+        try:
+            encoded_bits = _write_stego_footer(
+                doc[page_num], frame, cover_text, selected_cover_story
             )
-        else:
-            # Add character to current word
-            current_word += char
-
-            # 🔐 ENCODE: Determine font size based on binary data
-            if binary_index < len(binary_data):
-                bit = binary_data[binary_index]
-                font_size = font_size_map[bit]  # 7pt for '0', 9pt for '1'
-                binary_index += 1
-                print(f"  Encoding '{char}' -> bit '{bit}' -> {font_size}pt")
-            else:
-                # After message is encoded, use default size
-                font_size = space_font_size
+        except ValueError as e:
+            print(f"❌ {e}")
+            return {"success": False, "error": str(e)}
+        print(f"✅ Encoded {encoded_bits} bits on page {page_num + 1}")
 
-            current_font_sizes.append(font_size)
+        if progress:
+            progress.advance()
 
-    # Don't forget the last word
-    if current_word:
-        text_blocks.append(
-            {"text": current_word, "font_sizes": current_font_sizes, "type": "word"}
-        )
+    location = f"the last {len(frames)} pages" if multi_page else "the last page"
+    print(f"🎭 Cover story: {selected_cover_story}")
 
-    # 🎨 STEP 3: INSERT ENCODED TEXT WITH NATURAL SPACING
-    current_x = start_x
-    line_height = 12
+    return {
+        "success": True,
+        "message": f"Successfully encoded {total_bits} bits on {location} with plausible deniability",
+        "cover_story": selected_cover_story,
+        "pages_used": len(frames),
+    }
 
-    for block in text_blocks:
-        text = block["text"]
-        font_sizes = block["font_sizes"]
 
-        if block["type"] == "space":
-            # Space uses default font - no encoding
-            space_width = 3
-            current_x += space_width
-        else:
-            # Word with encoded characters
-            for i, char in enumerate(text):
-                font_size = font_sizes[i] if i < len(font_sizes) else space_font_size
+def _write_stego_footer(page, binary_data, cover_text, cover_story):
+    """
+    Write the cover story and the encoded cover text into a page footer
 
-                point = fitz.Point(current_x, footer_y)
-                page.insert_text(point, char, fontsize=font_size, color=(0, 0, 0))
+    Args:
+        page: fitz.Page to write on
+        binary_data: numpy 0/1 array of bits to encode
+        cover_text: Visible text whose glyph sizes carry the bits
+        cover_story: Innocuous 8pt line placed above the cover text
 
-                # Better character width calculation
-                base_width = 4.5
-                size_factor = font_size / 8.0
-                char_width = base_width * size_factor
+    Returns:
+        Number of bits encoded
 
-                # Adjust for character types
-                if char in "il|!":
-                    char_width *= 0.5
-                elif char in "mwM":
-                    char_width *= 1.3
+    Raises:
+        ValueError: If the laid-out cover text does not fit in the footer
+    """
+    page_rect = page.rect
 
-                current_x += char_width
+    # 🔤 STEP 1: ASSIGN A FONT SIZE TO EVERY COVER TEXT CHARACTER
+    # Spaces and glyphs after the payload keep the 8pt cover size; the
+    # first len(binary_data) non-space glyphs get 7pt (0) or 9pt (1)
+    glyph_sizes = np.full(len(cover_text), COVER_FONT_SIZE)
+    is_glyph = codepoints_of(cover_text) != ord(" ")
+    encoded = np.flatnonzero(is_glyph)[: len(binary_data)]
+    glyph_sizes[encoded] = np.array([font_size_map["0"], font_size_map["1"]])[
+        binary_data[: len(encoded)]
+    ]
+
+    # 📐 STEP 2: LAY OUT THE WHOLE COVER TEXT USING REAL FONT METRICS
+    layout = layout_cover_text(
+        cover_text, glyph_sizes, footer_line_width(page_rect.width)
+    )
+    available_lines = footer_line_capacity(page_rect.height)
+    if layout["line_count"] > available_lines:
+        raise ValueError(
+            f"Cover text needs {layout['line_count']} footer lines but only "
+            f"{available_lines} fit on the page. Please provide shorter cover text."
+        )
 
-            # Small gap after each word
-            current_x += 1
+    # 🎭 STEP 3: ADD COVER STORY FIRST (8pt font - no encoding)
+    footer_y = page_rect.height - FOOTER_TOP
+    print(f"🎭 Adding cover story: {cover_story}")
+    page.insert_text(
+        fitz.Point(FOOTER_START_X, footer_y),
+        cover_story,
+        fontname=STEGO_FONT_NAME,
+        fontsize=COVER_FONT_SIZE,  # Use default font size - doesn't encode data
+        color=(0.3, 0.3, 0.3),  # Dark gray, subtle but readable
+    )
 
-        # Line wrapping
-        if current_x > page_rect.width - 100:
-            current_x = start_x
-            footer_y += line_height
+    # 🎨 STEP 4: INSERT ENCODED TEXT
+    # Consecutive glyphs on the same line with the same size form one run;
+    # all runs go into a single TextWriter that is committed to the page once.
+    first_baseline = footer_y + COVER_STORY_GAP
+    run_breaks = (
+        np.flatnonzero(
+            (np.diff(glyph_sizes) != 0)
+            | (np.diff(layout["line"]) != 0)
+            | (np.diff(is_glyph.astype(np.int8)) != 0)
+        )
+        + 1
+    )
+    run_starts = np.concatenate(([0], run_breaks)).tolist()
+    run_ends = np.concatenate((run_breaks, [len(cover_text)])).tolist()
+
+    text_writer = fitz.TextWriter(page_rect)
+    glyph_font = fitz.Font(STEGO_FONT_NAME)
+
+    for start, end in zip(run_starts, run_ends):
+        if not is_glyph[start]:
+            continue  # Spaces only advance the layout
+        point = fitz.Point(
+            FOOTER_START_X + layout["x"][start],
+            first_baseline + LINE_HEIGHT * layout["line"][start],
+        )
+        text_writer.append(
+            point,
+            cover_text[start:end],
+            font=glyph_font,
+            fontsize=float(glyph_sizes[start]),
+        )
 
-    print(f"✅ Encoded {binary_index} bits on the last page")
+    # Commit every glyph to the page in one content-stream write
+    text_writer.write_text(page, color=(0, 0, 0))
 
-    # Save the PDF
-    try:
-        doc.save(output_pdf)
-        print(f"\n✅ Saved steganographic PDF with cover story on last page")
-        print(f"🎭 Cover story: {selected_cover_story}")
-        doc.close()
-        return {
-            "success": True,
-            "message": f"Successfully encoded {len(binary_data)} bits on the last page with plausible deniability",
-            "cover_story": selected_cover_story,
-        }
-    except Exception as e:
-        print(f"❌ Error saving PDF: {e}")
-        doc.close()
-        return {"success": False, "error": f"Error saving PDF: {e}"}
+    return len(encoded)
 
 
-def decode_message_from_pdf_font_stego(pdf_path):
+def decode_message_from_pdf_font_stego(pdf_path, multi_page=False):
     """
     UPDATED: Now focuses on LAST PAGE for better steganography
-    Decodes hidden message from font size variations on the last page only
+    Decodes hidden message from font size variations on the last page only.
+    With multi_page=True, frames are collected from every page footer and
+    reassembled (see decode_message_from_pdf_font_stego_multi_page).
     """
+    if multi_page:
+        return decode_message_from_pdf_font_stego_multi_page(pdf_path)
+
     try:
         doc = fitz.open(pdf_path)
         print(f"📄 Analyzing PDF: {pdf_path}")
@@ -914,119 +1458,264 @@ def decode_message_from_pdf_font_stego(pdf_path):
     # 🎯 PROCESS ONLY THE LAST PAGE (where steganographic data is stored)
     last_page_num = total_pages - 1
     page = doc[last_page_num]
-    page_rect = page.rect
 
     print(f"\n📖 LAST PAGE ({last_page_num + 1}) - Looking for hidden message")
     print("-" * 40)
 
-    # Binary text for the last page
-    page_binary_text = ""
+    # Process footer area (where steganographic data is stored)
+    print(f"\n🦶 FOOTER ANALYSIS")
+    bits = _read_footer_bits(page, PAYLOAD_HEADER_BITS, payload_frame_bits)
+    print(f"   Read {len(bits)} bits")
+
+    # Decode the last page's message
+    page_key = f"Page {last_page_num + 1}"
+    if len(bits):
+        try:
+            page_message = unpack_payload(bits)
+            bits = bits[: payload_frame_bits(bits)]
+        except ValueError as e:
+            if _holds_page_frame(page):
+                doc.close()
+                return {
+                    "success": False,
+                    "error": "This PDF holds a message spread over several pages. "
+                    "Decode it again with multi-page mode turned on.",
+                }
+            # No valid frame - fall back to the legacy headerless encoding
+            print(f"⚠️  {e}; trying legacy ASCII decoding")
+            page_message = binary_to_string(bits_to_text(bits))
+
+        page_messages[page_key] = page_message
+        all_binary_data = bits_to_text(bits)
+        print(f"🔓 DECODED MESSAGE: '{page_message}'")
+    else:
+        print("   No text found in footer area.")
+        page_messages[page_key] = "No steganographic data found"
 
-    # Get text with formatting information
-    text_dict = page.get_text("dict")
+    # CLOSE THE DOCUMENT
+    doc.close()
 
-    # Organize text by areas
-    areas = {"header": [], "body": [], "footer": []}
+    if len(all_binary_data) == 0:
+        return {
+            "success": False,
+            "error": "No steganographic data found on the last page!",
+        }
 
-    # Process each text block
-    for block in text_dict["blocks"]:
-        if block.get("type") == 0:  # Text block only
-            block_bbox = block["bbox"]
-            block_rect = fitz.Rect(block_bbox)
+    return {
+        "success": True,
+        "page_messages": page_messages,  # Dictionary of page messages
+        "binary_data": all_binary_data,  # Binary data from last page
+        "total_pages": total_pages,
+    }
 
-            # Classify the area
-            area = _classify_text_area(block_rect, page_rect)
 
-            # Process lines and spans
-            for line in block["lines"]:
-                for span in line["spans"]:
-                    text = span["text"].strip()
+# Worker processes for multi-page decoding, started on first use and kept
+# for the life of the process (so a web request does not start its own)
+_decode_pool = None
 
-                    # Skip empty text
-                    if not text:
-                        continue
 
-                    font_size = span["size"]
-                    font_name = span.get("font", "Unknown")
+def _get_decode_pool():
+    global _decode_pool
+    if _decode_pool is None:
+        _decode_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    return _decode_pool
 
-                    # Clean up font name
-                    clean_font_name = _clean_font_name(font_name)
 
-                    # Add to appropriate area
-                    areas[area].append(
-                        {
-                            "text": text,
-                            "font_name": clean_font_name,
-                            "font_size": font_size,
-                        }
-                    )
+def _discard_decode_pool():
+    """Drop a broken pool, so the next decode starts a new one"""
+    global _decode_pool
+    _decode_pool = None
 
-    # Process footer area (where steganographic data is stored)
-    print(f"\n🦶 FOOTER ANALYSIS")
-    footer_elements = areas["footer"]
 
-    if not footer_elements:
-        print("   No text found in footer area.")
-        page_messages[f"Page {last_page_num + 1}"] = "No steganographic data found"
-    else:
-        for i, element in enumerate(footer_elements, 1):
-            # Truncate text if too long for display
-            display_text = (
-                element["text"]
-                if len(element["text"]) <= 50
-                else element["text"][:47] + "..."
-            )
+def _holds_page_frame(page):
+    """Whether a page footer carries a multi-page frame"""
+    bits = _read_footer_bits(page, PAGE_FRAME_HEADER_BITS, page_frame_bits)
+    try:
+        unpack_page_frame(bits)
+    except ValueError:
+        return False
+    return True
 
-            print(f'   {i:2d}. Text: "{display_text}"')
-            print(
-                f"       Font: {element['font_name']} | Size: {element['font_size']:.1f}pt"
-            )
 
-            # Check if this is our cover story (8pt) or encoded data (7pt/9pt)
-            if element["font_size"] == 8.0:
-                print("       → Cover story text (8pt) - not encoded")
-                continue
-            elif element["font_size"] == font_size_map["0"]:  # 7pt
-                # Convert text to binary representation (0s)
-                print("       → Encoding '0' bits")
-                temp_text = element["text"].replace(" ", "")
-                page_binary_text += "0" * len(temp_text)
-                print(f"       → Added {len(temp_text)} zero bits")
-            elif element["font_size"] == font_size_map["1"]:  # 9pt
-                # Convert text to binary representation (1s)
-                print("       → Encoding '1' bits")
-                temp_text = element["text"].replace(" ", "")
-                page_binary_text += "1" * len(temp_text)
-                print(f"       → Added {len(temp_text)} one bits")
-            else:
-                print(f"       → Unknown font size: {element['font_size']:.1f}pt")
+def decode_message_from_pdf_font_stego_multi_page(pdf_path, max_workers=None):
+    """
+    Decodes a message spread across page footers by the multi-page encoder.
 
-    # Decode the last page's message
-    if page_binary_text:
-        page_message = binary_to_string(page_binary_text)
-        page_messages[f"Page {last_page_num + 1}"] = page_message
-        all_binary_data = page_binary_text
-        print(f"🔓 DECODED MESSAGE: '{page_message}'")
-    else:
-        page_messages[f"Page {last_page_num + 1}"] = "No steganographic data found"
+    Page footers are read in parallel by the shared decoding pool (each
+    task opens the PDF and scans a contiguous page range); valid frames are
+    then ordered by their sequence index and the chunks joined back into
+    the message.
+    """
+    try:
+        with fitz.open(pdf_path) as doc:
+            total_pages = len(doc)
+        print(f"📄 Analyzing PDF: {pdf_path}")
+        print(f"📚 Total pages: {total_pages}")
+    except Exception as e:
+        print(f"❌ Error opening PDF: {e}")
+        return {"success": False, "error": f"Error opening PDF: {e}"}
 
-    # CLOSE THE DOCUMENT
-    doc.close()
+    # One contiguous page range per worker, sized so small documents
+    # don't pay for process start-up
+    workers = min(
+        max_workers or os.cpu_count() or 1,
+        math.ceil(total_pages / MULTI_PAGE_MIN_PAGES_PER_WORKER),
+    )
+    page_ranges = [
+        (start, min(start + math.ceil(total_pages / workers), total_pages))
+        for start in range(0, total_pages, math.ceil(total_pages / workers))
+    ]
+
+    frames = None
+    if len(page_ranges) > 1:
+        print(f"⚙️  Reading {total_pages} pages with {len(page_ranges)} workers")
+        try:
+            results = _get_decode_pool().map(
+                _read_page_frames, [pdf_path] * len(page_ranges), page_ranges
+            )
+            frames = [frame for result in results for frame in result]
+        except BrokenProcessPool as e:
+            # A worker died: read the pages here instead
+            print(f"⚠️  Decoding pool failed ({e}); reading pages in-process")
+            _discard_decode_pool()
+    if frames is None:
+        frames = _read_page_frames(pdf_path, (0, total_pages))
+
+    if not frames:
+        return {
+            "success": False,
+            "error": "No multi-page steganographic data found!",
+        }
 
-    if len(all_binary_data) == 0:
+    # Reassemble: frames must agree on the count and cover every index once
+    frames.sort(key=lambda frame: frame["index"])
+    frame_count = frames[0]["count"]
+    indices = [frame["index"] for frame in frames]
+    if any(frame["count"] != frame_count for frame in frames) or indices != list(
+        range(frame_count)
+    ):
         return {
             "success": False,
-            "error": "No steganographic data found on the last page!",
+            "error": f"Incomplete multi-page message: found frames {indices} of {frame_count}",
         }
 
+    try:
+        message = b"".join(frame["chunk"] for frame in frames).decode("utf-8")
+    except UnicodeDecodeError as e:
+        return {"success": False, "error": f"Invalid message encoding: {e}"}
+
+    print(f"🔓 DECODED MESSAGE ({frame_count} frames): '{message}'")
+
+    page_messages = {
+        f"Page {frame['page'] + 1}": f"Frame {frame['index'] + 1}/{frame_count} ({len(frame['chunk'])} bytes)"
+        for frame in frames
+    }
+    page_messages["Message"] = message
+
     return {
         "success": True,
-        "page_messages": page_messages,  # Dictionary of page messages
-        "binary_data": all_binary_data,  # Binary data from last page
+        "message": message,
+        "page_messages": page_messages,
+        "binary_data": "".join(frame["binary_data"] for frame in frames),
         "total_pages": total_pages,
     }
 
 
+def _read_page_frames(pdf_path, page_range):
+    """
+    Read multi-page frames from the footers of pages [start, end).
+    Runs in a worker process, so it opens its own document handle.
+
+    Returns:
+        List of dicts with page, index, count, chunk and binary_data
+    """
+    frames = []
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(*page_range):
+            bits = _read_footer_bits(
+                doc[page_num], PAGE_FRAME_HEADER_BITS, page_frame_bits
+            )
+            if not len(bits):
+                continue
+            try:
+                index, count, chunk = unpack_page_frame(bits)
+            except ValueError:
+                continue  # Footer text that is not one of our frames
+            frames.append(
+                {
+                    "page": page_num,
+                    "index": index,
+                    "count": count,
+                    "chunk": chunk,
+                    "binary_data": bits_to_text(bits[: page_frame_bits(bits)]),
+                }
+            )
+    return frames
+
+
+def _read_footer_bits(page, header_bits, frame_bits_fn):
+    """
+    Read encoded bits from a page footer, stopping as soon as the frame
+    declared by its header is complete
+
+    Args:
+        page: fitz.Page to read
+        header_bits: Number of bits needed before frame_bits_fn can be called
+        frame_bits_fn: Callable returning the total frame size from its header
+
+    Returns:
+        numpy uint8 array of 0/1 values (may be longer than the frame)
+    """
+    # Bit runs read from the footer - one (bit, count) pair per encoded span
+    run_bits = []
+    run_counts = []
+    bits_read = 0
+    frame_bits = None  # Known once the header has been read
+
+    # Get text with formatting information - only inside the footer area,
+    # so dense body text on the page is never extracted
+    text_dict = page.get_text(
+        "dict", clip=_footer_clip_rect(page.rect), flags=FOOTER_TEXT_FLAGS
+    )
+
+    for span in _iter_text_spans(text_dict):
+        text = span["text"].strip()
+
+        # Skip empty text
+        if not text:
+            continue
+
+        # Cover story (8pt) and any other footer text carry no data
+        if span["size"] == font_size_map["0"]:  # 7pt
+            bit = 0
+        elif span["size"] == font_size_map["1"]:  # 9pt
+            bit = 1
+        else:
+            continue
+
+        count = len(text.replace(" ", ""))
+        run_bits.append(bit)
+        run_counts.append(count)
+        bits_read += count
+
+        if frame_bits is None and bits_read >= header_bits:
+            frame_bits = frame_bits_fn(np.repeat(run_bits, run_counts))
+
+        # Stop reading spans once the declared payload is complete
+        if frame_bits is not None and bits_read >= frame_bits:
+            break
+
+    return np.repeat(np.array(run_bits, dtype=np.uint8), run_counts)
+
+
+def _iter_text_spans(text_dict):
+    """Yield every span of every text block in a get_text("dict") result"""
+    for block in text_dict["blocks"]:
+        if block.get("type") == 0:  # Text block only
+            for line in block["lines"]:
+                yield from line["spans"]
+
+
 def _classify_text_area(block_rect, page_rect):
     """
     EXACT function from simplified_font_analyzer.py
@@ -1046,6 +1735,19 @@ def _classify_text_area(block_rect, page_rect):
         return "body"
 
 
+def _footer_clip_rect(page_rect):
+    """
+    Rectangle covering the footer area (bottom 15% of the page),
+    matching the footer classification in _classify_text_area
+    """
+    return fitz.Rect(
+        page_rect.x0,
+        page_rect.y0 + page_rect.height * 0.85,
+        page_rect.x1,
+        page_rect.y1,
+    )
+
+
 def _clean_font_name(font_name):
     """
     EXACT function from simplified_font_analyzer.py
@@ -5,7 +5,6 @@ import numpy as np
 from django.shortcuts import render, redirect
 from django.http import FileResponse, HttpResponse, JsonResponse
 from django.views import View
-from django.conf import settings
 from django.core.files.base import ContentFile
 from io import BytesIO
 from .forms import (
@@ -21,16 +20,19 @@ from .utils import (
     email_to_number,
     number_to_email,
     add_border_to_pdf,
-    add_qr_code_to_pdf,
+    decode_border_from_pdf,
+    add_qr_code_to_pdf_bytes,
     generate_qr_code,
     process_qr_code,
-    encode_message_in_pdf_font_stego,
+    encode_message_in_pdf_font_stego_bytes,
     decode_message_from_pdf_font_stego,
 )
 
 # Import the watermark service
 from .watermark.service import PDFWatermarkService
+from .downloads import file_download_response
 from .models import WatermarkedDocument
+from .scratch import ScratchSpace
 
 
 def index(request):
@@ -51,27 +53,18 @@ def add_border(request):
             email_number, _ = email_to_number(email)
             print(f"Email converted to number: {email_number}")
 
-            # Create a unique filename for the output PDF
-            output_filename = f"border_{uuid.uuid4().hex}.pdf"
-            output_path = os.path.join(settings.MEDIA_ROOT, output_filename)
-
-            # Save the uploaded PDF temporarily
-            temp_pdf_path = os.path.join(
-                settings.MEDIA_ROOT, f"temp_{uuid.uuid4().hex}.pdf"
-            )
-            with open(temp_pdf_path, "wb+") as destination:
-                for chunk in pdf_file.chunks():
-                    destination.write(chunk)
-
-            # Process the PDF, adding borders
-            add_border_to_pdf(temp_pdf_path, output_path, email_number)
-
-            # Clean up the temporary file
-            os.unlink(temp_pdf_path)
+            # Process the PDF, adding borders; the input and output files
+            # are removed with the scratch space once the result is read
+            with ScratchSpace("add_border") as scratch:
+                temp_pdf_path = scratch.save_upload(pdf_file, ".pdf")
+                output_path = scratch.path(".pdf", pdf_file.size)
+                add_border_to_pdf(temp_pdf_path, output_path, email_number)
+                with open(output_path, "rb") as f:
+                    pdf_content = f.read()
 
             # Return the processed PDF as a download
             return FileResponse(
-                open(output_path, "rb"),
+                BytesIO(pdf_content),
                 as_attachment=True,
                 filename=f"bordered_{pdf_file.name}",
             )
@@ -83,10 +76,26 @@ def add_border(request):
 
 def recover_email(request):
     """
-    View to demonstrate the email recovery from the 10-digit number.
-    In a real application, you'd need a way to extract the number from the PDF.
+    View to recover the email from a bordered PDF.
+    The number is decoded from the uploaded PDF (or scanned page image) when
+    one is given, otherwise it can be typed in by hand.
     """
     if request.method == "POST":
+        uploaded_file = request.FILES.get("document")
+
+        if uploaded_file:
+            with ScratchSpace("recover_email") as scratch:
+                temp_path = scratch.save_upload(uploaded_file)
+                result = decode_border_from_pdf(temp_path)
+
+            if not result["success"]:
+                return HttpResponse(result["error"], status=400)
+
+            return HttpResponse(
+                f"The recovered email is: {result['email']} "
+                f"(number {result['number']}, read from {result['method']} border)"
+            )
+
         # Extract the number from request
         number = request.POST.get("number", "")
 
@@ -95,7 +104,10 @@ def recover_email(request):
             email = number_to_email(number)
             return HttpResponse(f"The recovered email is: {email}")
         else:
-            return HttpResponse("Please provide a valid 10-digit number.", status=400)
+            return HttpResponse(
+                "Please upload a bordered PDF or provide a valid 20-digit number.",
+                status=400,
+            )
 
     # Simple form for demonstration
     return render(request, "pdf_app/recover.html")
@@ -168,16 +180,20 @@ class DownloadWatermarkedView(View):
         """Download the watermarked PDF."""
         try:
             doc = WatermarkedDocument.objects.get(id=doc_id)
-            response = HttpResponse(
-                doc.watermarked_document, content_type="application/pdf"
-            )
-            response["Content-Disposition"] = (
-                f'attachment; filename="{os.path.basename(doc.watermarked_document.name)}"'
-            )
-            return response
         except WatermarkedDocument.DoesNotExist:
             return HttpResponse("Document not found", status=404)
 
+        if not doc.watermarked_document or not os.path.exists(
+            doc.watermarked_document.path
+        ):
+            return HttpResponse("Document not found", status=404)
+
+        return file_download_response(
+            request,
+            doc.watermarked_document.path,
+            os.path.basename(doc.watermarked_document.name),
+        )
+
 
 class ExtractWatermarkView(View):
     """View for extracting watermarks from PDFs or images."""
@@ -199,27 +215,11 @@ class ExtractWatermarkView(View):
 
         file = request.FILES["file"]
 
-        # Save the file temporarily with a unique name to avoid conflicts
-        temp_dir = os.path.join(settings.MEDIA_ROOT, "temp")
-        os.makedirs(temp_dir, exist_ok=True)
-
-        # Use a unique filename to avoid conflicts
-        import uuid
-
-        unique_filename = f"{uuid.uuid4().hex}_{file.name}"
-        temp_path = os.path.join(temp_dir, unique_filename)
-
         try:
-            # Save the uploaded file
-            with open(temp_path, "wb+") as destination:
-                for chunk in file.chunks():
-                    destination.write(chunk)
-
-            # Extract the watermark
-            watermark_text = PDFWatermarkService.extract_watermark(temp_path)
-
-            # Clean up the temporary file
-            os.remove(temp_path)
+            # Extract the watermark from a scratch copy of the upload
+            with ScratchSpace("extract_watermark") as scratch:
+                temp_path = scratch.save_upload(file)
+                watermark_text = PDFWatermarkService.extract_watermark(temp_path)
 
             # Handle AJAX requests
             if request.headers.get("X-Requested-With") == "XMLHttpRequest":
@@ -233,10 +233,6 @@ class ExtractWatermarkView(View):
             )
 
         except Exception as e:
-            # Clean up in case of error
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-
             error_message = str(e)
             print(f"Error extracting watermark: {error_message}")  # Log for debugging
 
@@ -259,37 +255,17 @@ def add_qr_code(request):
             pdf_file = request.FILES["pdf_file"]
             email = form.cleaned_data["email"]
 
-            # Create a unique filename for the output PDF
-            output_filename = f"qrcode_{uuid.uuid4().hex}.pdf"
-            output_path = os.path.join(settings.MEDIA_ROOT, output_filename)
-
-            # Save the uploaded PDF temporarily
-            temp_pdf_path = os.path.join(
-                settings.MEDIA_ROOT, f"temp_{uuid.uuid4().hex}.pdf"
-            )
-            with open(temp_pdf_path, "wb+") as destination:
-                for chunk in pdf_file.chunks():
-                    destination.write(chunk)
-
             try:
-                # Process the PDF, adding QR code using our cipher approach
-                add_qr_code_to_pdf(temp_pdf_path, output_path, email)
-
-                # Clean up the temporary file
-                if os.path.exists(temp_pdf_path):
-                    os.unlink(temp_pdf_path)
+                # Process the PDF in memory, adding QR code using our cipher approach
+                pdf_content = add_qr_code_to_pdf_bytes(pdf_file, email)
 
                 # Return the processed PDF as a download
                 return FileResponse(
-                    open(output_path, "rb"),
+                    BytesIO(pdf_content),
                     as_attachment=True,
                     filename=f"qrcode_{pdf_file.name}",
                 )
             except Exception as e:
-                # Clean up in case of error
-                if os.path.exists(temp_pdf_path):
-                    os.unlink(temp_pdf_path)
-
                 # Log the error
                 print(f"Error adding QR code: {str(e)}")
 
@@ -316,40 +292,30 @@ def scan_qr_code(request):
             try:
                 # If QR code image is uploaded
                 if qr_code_image:
-                    # Save the image temporarily
-                    temp_dir = os.path.join(settings.MEDIA_ROOT, "temp")
-                    os.makedirs(temp_dir, exist_ok=True)
-                    temp_path = os.path.join(temp_dir, qr_code_image.name)
+                    # Read the QR code using OpenCV from a scratch copy
+                    with ScratchSpace("scan_qr_code") as scratch:
+                        temp_path = scratch.save_upload(qr_code_image)
 
-                    with open(temp_path, "wb+") as destination:
-                        for chunk in qr_code_image.chunks():
-                            destination.write(chunk)
+                        try:
+                            import cv2
 
-                    try:
-                        # Read the QR code using OpenCV
-                        import cv2
-
-                        # Read the image
-                        image = cv2.imread(temp_path)
-
-                        if image is None:
-                            error = "Failed to read the uploaded image."
-                        else:
-                            # Initialize QR code detector
-                            detector = cv2.QRCodeDetector()
-                            # Decode the QR code
-                            data, bbox, _ = detector.detectAndDecode(image)
-
-                            if data:
-                                code_string = data
+                            # Read the image
+                            image = cv2.imread(temp_path)
+
+                            if image is None:
+                                error = "Failed to read the uploaded image."
                             else:
-                                error = "Could not detect a QR code in the image."
-                    except Exception as e:
-                        error = f"Error processing QR code image: {str(e)}"
-                    finally:
-                        # Clean up the temporary file
-                        if os.path.exists(temp_path):
-                            os.remove(temp_path)
+                                # Initialize QR code detector
+                                detector = cv2.QRCodeDetector()
+                                # Decode the QR code
+                                data, bbox, _ = detector.detectAndDecode(image)
+
+                                if data:
+                                    code_string = data
+                                else:
+                                    error = "Could not detect a QR code in the image."
+                        except Exception as e:
+                            error = f"Error processing QR code image: {str(e)}"
 
                 # If we have a code string (either entered manually or from QR code)
                 if code_string:
@@ -384,32 +350,16 @@ def font_stego_encode(request):
             secret_message = form.cleaned_data["secret_message"]
             cover_text = form.cleaned_data["cover_text"]
 
-            # Create a unique filename for the output PDF
-            output_filename = f"font_stego_{uuid.uuid4().hex}.pdf"
-            output_path = os.path.join(settings.MEDIA_ROOT, output_filename)
-
-            # Save the uploaded PDF temporarily
-            temp_pdf_path = os.path.join(
-                settings.MEDIA_ROOT, f"temp_{uuid.uuid4().hex}.pdf"
-            )
-            with open(temp_pdf_path, "wb+") as destination:
-                for chunk in pdf_file.chunks():
-                    destination.write(chunk)
-
             try:
-                # Process the PDF using font steganography
-                result = encode_message_in_pdf_font_stego(
-                    temp_pdf_path, output_path, secret_message, cover_text
+                # Process the PDF in memory using font steganography
+                result = encode_message_in_pdf_font_stego_bytes(
+                    pdf_file, secret_message, cover_text
                 )
 
-                # Clean up the temporary file
-                if os.path.exists(temp_pdf_path):
-                    os.unlink(temp_pdf_path)
-
                 if result["success"]:
                     # Return the processed PDF as a download
                     return FileResponse(
-                        open(output_path, "rb"),
+                        BytesIO(result["pdf_content"]),
                         as_attachment=True,
                         filename=f"font_stego_{pdf_file.name}",
                     )
@@ -422,10 +372,6 @@ def font_stego_encode(request):
                     )
 
             except Exception as e:
-                # Clean up in case of error
-                if os.path.exists(temp_pdf_path):
-                    os.unlink(temp_pdf_path)
-
                 # Log the error
                 print(f"Error in font steganography encoding: {str(e)}")
 
@@ -454,21 +400,13 @@ def font_stego_decode(request):
             # Get the uploaded PDF
             pdf_file = request.FILES["pdf_file"]
 
-            # Save the uploaded PDF temporarily
-            temp_pdf_path = os.path.join(
-                settings.MEDIA_ROOT, f"temp_{uuid.uuid4().hex}.pdf"
-            )
-            with open(temp_pdf_path, "wb+") as destination:
-                for chunk in pdf_file.chunks():
-                    destination.write(chunk)
-
             try:
-                # Decode the message from the PDF
-                result = decode_message_from_pdf_font_stego(temp_pdf_path)
-
-                # Clean up the temporary file
-                if os.path.exists(temp_pdf_path):
-                    os.unlink(temp_pdf_path)
+                # Decode the message from a scratch copy of the PDF
+                with ScratchSpace("font_stego_decode") as scratch:
+                    temp_pdf_path = scratch.save_upload(pdf_file, ".pdf")
+                    result = decode_message_from_pdf_font_stego(
+                        temp_pdf_path, multi_page=form.cleaned_data["multi_page"]
+                    )
 
                 if result["success"]:
                     page_messages = result[
@@ -480,10 +418,6 @@ def font_stego_decode(request):
                     error = result["error"]
 
             except Exception as e:
-                # Clean up in case of error
-                if os.path.exists(temp_pdf_path):
-                    os.unlink(temp_pdf_path)
-
                 # Log the error
                 print(f"Error in font steganography decoding: {str(e)}")
                 error = f"Error decoding message: {str(e)}"
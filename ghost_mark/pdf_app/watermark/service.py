@@ -61,7 +61,7 @@ class PDFWatermarkService:
 
     @staticmethod
     def add_invisible_watermark(
-        pdf_file, watermark_text, color=None, skip_first_page=True
+        pdf_file, watermark_text, color=None, skip_first_page=True, progress=None
     ):
         """
         Add an invisible watermark to a PDF file using a fixed near-white color.
@@ -74,6 +74,7 @@ class PDFWatermarkService:
             watermark_text (str): Text to use as watermark (will be obfuscated if it's an email)
             color (str): Color for watermark (uses default if None)
             skip_first_page (bool): If True, don't add watermark to first page
+            progress: Optional ProgressReporter, advanced once per page
 
         Returns:
             BytesIO: Watermarked PDF file as BytesIO
@@ -96,6 +97,9 @@ class PDFWatermarkService:
         print(f"📄 Total pages: {total_pages}")
         print(f"🚫 Skip first page: {skip_first_page}")
 
+        if progress:
+            progress.start_stage("watermark", total_pages)
+
         # Create watermark once (we'll reuse it for all pages that need it)
         packet = BytesIO()
         c = canvas.Canvas(packet, pagesize=letter)
@@ -143,6 +147,9 @@ class PDFWatermarkService:
                 page.merge_page(watermark_pdf.pages[0])
                 output.add_page(page)
 
+            if progress:
+                progress.advance()
+
         # Save the result to BytesIO
         result_pdf = BytesIO()
         output.write(result_pdf)
@@ -150,6 +157,54 @@ class PDFWatermarkService:
 
         return result_pdf
 
+    @staticmethod
+    def add_invisible_watermark_to_document(
+        doc, watermark_text, skip_first_page=True, progress=None
+    ):
+        """
+        Add the invisible header watermark to an already open PyMuPDF document.
+        Draws the same text, color and position as add_invisible_watermark,
+        but writes into the pages in place instead of merging an overlay.
+
+        Args:
+            doc: Open fitz.Document (modified in place and left open)
+            watermark_text (str): Text to use as watermark (will be obfuscated if it's an email)
+            skip_first_page (bool): If True, don't add watermark to first page
+            progress: Optional ProgressReporter, advanced once per page
+        """
+        color = PDFWatermarkService.WATERMARK_COLOR.lstrip("#")
+        r, g, b = tuple(int(color[i : i + 2], 16) for i in (0, 2, 4))
+
+        processed_watermark_text = PDFWatermarkService.obfuscate_email(watermark_text)
+
+        # The overlay version is a letter-sized canvas merged at the page
+        # origin, so the baseline sits at a fixed height above the page bottom
+        _, letter_height = letter
+        baseline_from_bottom = letter_height - 10
+
+        print(f"📄 Total pages: {len(doc)}")
+        print(f"🚫 Skip first page: {skip_first_page}")
+
+        if progress:
+            progress.start_stage("watermark", len(doc))
+
+        for i, page in enumerate(doc):
+            if progress:
+                progress.advance()
+
+            if skip_first_page and i == 0:
+                print(f"📄 Page {i + 1}: Skipping (first page)")
+                continue
+
+            print(f"📄 Page {i + 1}: Adding header watermark")
+            page.insert_text(
+                (20, page.rect.height - baseline_from_bottom),
+                processed_watermark_text,
+                fontname="helv",
+                fontsize=8,
+                color=(r / 255, g / 255, b / 255),
+            )
+
     @staticmethod
     def extract_watermark(file_path):
         """
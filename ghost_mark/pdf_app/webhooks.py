@@ -0,0 +1,254 @@
+# pdf_app/webhooks.py
+"""
+Completion webhooks for async jobs.
+
+A finished job with a callback_url is marked PENDING and delivered by the
+deliver_job_callbacks task, never by the processing task itself. Jobs for
+the same endpoint that finish within WEBHOOK_BATCH_WINDOW seconds go out
+as one POST of {"events": [...]}. Every body is signed so receivers can
+check where it came from:
+
+    X-GhostMark-Timestamp: <unix time>
+    X-GhostMark-Signature: sha256=<hex HMAC-SHA256 of "<timestamp>.<body>">
+
+The secret is WEBHOOK_SIGNING_SECRET (SECRET_KEY when unset).
+
+Callback URLs must be http(s) and resolve to public addresses only, so a
+client cannot make the server POST to loopback, private or link-local
+hosts (such as the cloud metadata endpoint). WEBHOOK_ALLOWED_HOSTS limits
+them further to a list of domains.
+"""
+
+import hashlib
+import hmac
+import ipaddress
+import json
+import socket
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PDFProcessingJob
+
+# Defaults used when the WEBHOOK_* settings are not set
+DEFAULT_WEBHOOK_TIMEOUT = 5  # seconds per request
+DEFAULT_WEBHOOK_BATCH_WINDOW = 2  # seconds to collect events per endpoint
+DEFAULT_WEBHOOK_BATCH_SIZE = 50
+DEFAULT_WEBHOOK_MAX_RETRIES = 6
+DEFAULT_WEBHOOK_RETRY_BACKOFF = 10  # seconds, doubled on every retry
+DEFAULT_WEBHOOK_RETRY_BACKOFF_MAX = 600
+DEFAULT_WEBHOOK_ALLOWED_HOSTS = []  # any public host
+DEFAULT_WEBHOOK_ALLOW_PRIVATE_HOSTS = False
+
+SIGNATURE_HEADER = "X-GhostMark-Signature"
+TIMESTAMP_HEADER = "X-GhostMark-Timestamp"
+
+
+def webhook_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def sign_payload(body, timestamp, secret=None):
+    """
+    Signature header value for a webhook body
+
+    Args:
+        body: Request body as bytes
+        timestamp: Unix timestamp sent in the timestamp header
+        secret: Signing secret (defaults to WEBHOOK_SIGNING_SECRET)
+
+    Returns:
+        "sha256=<hex digest>"
+    """
+    secret = secret or webhook_setting("WEBHOOK_SIGNING_SECRET", settings.SECRET_KEY)
+    message = f"{timestamp}.".encode() + body
+    digest = hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def verify_signature(body, timestamp, signature, secret=None, tolerance=300):
+    """Check a received webhook (for receivers and local stand-ins)"""
+    try:
+        if abs(time.time() - int(timestamp)) > tolerance:
+            return False
+    except (TypeError, ValueError):
+        return False
+    return hmac.compare_digest(sign_payload(body, timestamp, secret), signature)
+
+
+def job_event(job):
+    """Webhook event describing a finished job"""
+    completed = job.status == "COMPLETED"
+    return {
+        "event": "job.completed" if completed else "job.failed",
+        "job_id": job.job_id,
+        "job_type": job.job_type,
+        "status": job.status,
+        "original_filename": job.original_filename,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "processing_time": job.processing_time,
+        "error_message": job.error_message,
+        "download_url": f"/api/download/{job.job_id}/" if completed else None,
+    }
+
+
+def callback_url_error(callback_url):
+    """
+    Why a callback URL may not be used
+
+    Args:
+        callback_url: URL given with the job
+
+    Returns:
+        Error message, or None if the URL may be used
+    """
+    parts = urlsplit(callback_url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return "Callback URL must be an http or https URL."
+    host = parts.hostname.lower()
+
+    allowed_hosts = webhook_setting(
+        "WEBHOOK_ALLOWED_HOSTS", DEFAULT_WEBHOOK_ALLOWED_HOSTS
+    )
+    if allowed_hosts and not any(
+        host == allowed or host.endswith(f".{allowed}") for allowed in allowed_hosts
+    ):
+        return f"Callback host {host} is not allowed."
+
+    if webhook_setting(
+        "WEBHOOK_ALLOW_PRIVATE_HOSTS", DEFAULT_WEBHOOK_ALLOW_PRIVATE_HOSTS
+    ):
+        return None
+
+    try:
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        addresses = socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError, ValueError):
+        return f"Callback host {host} could not be resolved."
+
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            return f"Callback host {host} resolves to a non-public address."
+    return None
+
+
+def post_events(callback_url, events):
+    """
+    POST one signed batch of events
+
+    The URL is checked again before sending, as its host may resolve to a
+    different address than when the job was submitted.
+
+    Returns:
+        Dict with success status and, on failure, the error
+    """
+    error = callback_url_error(callback_url)
+    if error:
+        return {"success": False, "error": error}
+
+    body = json.dumps({"events": events}).encode()
+    timestamp = str(int(time.time()))
+    headers = {
+        "Content-Type": "application/json",
+        TIMESTAMP_HEADER: timestamp,
+        SIGNATURE_HEADER: sign_payload(body, timestamp),
+    }
+
+    try:
+        response = requests.post(
+            callback_url,
+            data=body,
+            headers=headers,
+            timeout=webhook_setting("WEBHOOK_TIMEOUT", DEFAULT_WEBHOOK_TIMEOUT),
+            allow_redirects=False,
+        )
+    except requests.RequestException as e:
+        return {"success": False, "error": f"Request failed: {e}"}
+
+    if 200 <= response.status_code < 300:
+        return {"success": True, "status_code": response.status_code}
+    return {
+        "success": False,
+        "status_code": response.status_code,
+        "error": f"Endpoint answered HTTP {response.status_code}",
+    }
+
+
+def claim_callback_batch(callback_url):
+    """
+    Take the oldest pending callbacks of one endpoint (PENDING -> SENDING)
+
+    Rows locked by a concurrent delivery are skipped, so two tasks never
+    send the same event.
+
+    Returns:
+        List of job primary keys in the batch
+    """
+    batch_size = webhook_setting("WEBHOOK_BATCH_SIZE", DEFAULT_WEBHOOK_BATCH_SIZE)
+    with transaction.atomic():
+        job_ids = list(
+            PDFProcessingJob.objects.select_for_update(skip_locked=True)
+            .filter(callback_url=callback_url, callback_status="PENDING")
+            .order_by("completed_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        PDFProcessingJob.objects.filter(id__in=job_ids).update(
+            callback_status="SENDING"
+        )
+    return job_ids
+
+
+def retry_delay(retries):
+    """Exponential backoff before retry number `retries` + 1"""
+    backoff = webhook_setting("WEBHOOK_RETRY_BACKOFF", DEFAULT_WEBHOOK_RETRY_BACKOFF)
+    backoff_max = webhook_setting(
+        "WEBHOOK_RETRY_BACKOFF_MAX", DEFAULT_WEBHOOK_RETRY_BACKOFF_MAX
+    )
+    return min(backoff * 2**retries, backoff_max)
+
+
+def callback_retry_horizon():
+    """
+    Longest time a delivery can take, counted from the job's completion
+
+    The batch window, every backoff and a timeout per attempt, plus one
+    more maximum backoff for time spent waiting in the queue.
+    """
+    max_retries = webhook_setting("WEBHOOK_MAX_RETRIES", DEFAULT_WEBHOOK_MAX_RETRIES)
+    timeout = webhook_setting("WEBHOOK_TIMEOUT", DEFAULT_WEBHOOK_TIMEOUT)
+    seconds = (
+        webhook_setting("WEBHOOK_BATCH_WINDOW", DEFAULT_WEBHOOK_BATCH_WINDOW)
+        + sum(retry_delay(retries) for retries in range(max_retries))
+        + (max_retries + 1) * timeout
+        + webhook_setting(
+            "WEBHOOK_RETRY_BACKOFF_MAX", DEFAULT_WEBHOOK_RETRY_BACKOFF_MAX
+        )
+    )
+    return timedelta(seconds=seconds)
+
+
+def expire_stale_callbacks():
+    """
+    Give up callbacks still PENDING or SENDING past the retry horizon
+
+    A delivery task lost with its worker (or its broker message) leaves
+    its jobs in SENDING, and nothing would ever claim them again.
+
+    Returns:
+        Number of callbacks marked FAILED
+    """
+    cutoff = timezone.now() - callback_retry_horizon()
+    return PDFProcessingJob.objects.filter(
+        callback_status__in=["PENDING", "SENDING"], completed_at__lt=cutoff
+    ).update(
+        callback_status="FAILED",
+        callback_error="Delivery did not finish within the retry horizon",
+    )
@@ -1,4 +1,6 @@
 #!/bin/bash
 sudo pkill -f gunicorn
-nohup gunicorn --bind 127.0.0.1:8000 ghost_mark.wsgi:application &
+# Serve the ASGI application with uvicorn workers, so async views such as the
+# job events stream (/api/events/<job_id>/) do not tie up a worker per client
+nohup gunicorn --bind 127.0.0.1:8000 -k uvicorn_worker.UvicornWorker ghost_mark.asgi:application &
 echo "Application restarted"
@@ -0,0 +1,18 @@
+#!/bin/bash
+# One Celery worker pool per job queue. Both pools take both queues, their
+# own first; small jobs get ahead through their better priority, which the
+# broker serves first. Reserving workers for small jobs made large ones
+# (and the overall p99) slower: see python -m benchmarks.queue_routing.
+# The bulk pool also drains pdf_processing, the queue every job used before
+# routing; drop it from -Q once `redis-cli llen pdf_processing` is 0.
+# Run as the deploying user (the one the workers run as).
+pkill -f "celery -A ghost_mark"
+nohup celery -A ghost_mark worker -n fast@%h -Q pdf_fast,pdf_bulk -c 2 &
+nohup celery -A ghost_mark worker -n bulk@%h -Q pdf_bulk,pdf_fast,pdf_processing -c 6 &
+# The broker's "priority" queue order applies to every worker, so a worker
+# listening on several queues drains them in order: the job state flush
+# gets its own worker, never starved by a webhook retry backlog
+nohup celery -A ghost_mark worker -n job_state@%h -Q job_state -c 1 &
+nohup celery -A ghost_mark worker -n misc@%h -Q webhooks,cleanup -c 2 &
+nohup celery -A ghost_mark beat &
+echo "Workers restarted"